@@ -0,0 +1,418 @@
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from time import perf_counter, monotonic, sleep
+from typing import Callable, Any
+from tempfile import gettempdir
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tracemalloc
+
+try:
+    import resource
+
+except ImportError:
+    resource = None
+
+from PIL import Image
+
+CACHE_DIR = Path(gettempdir()) / "tk-gif-player-bench"
+
+
+class Config():
+
+    frames: int
+    size: tuple[int, int]
+    colors: int
+    change: float
+
+    def __init__(self, frames: int, size: tuple[int, int], colors: int, change: float) -> None:
+        self.frames = frames
+        self.size = size
+        self.colors = colors
+        self.change = change
+
+    def name(self) -> str:
+        return f"{self.frames}f_{self.size[0]}x{self.size[1]}_{self.colors}c_{round(self.change * 100)}pct"
+
+
+def make_gif(config: Config) -> Path:
+    path = CACHE_DIR / f"{config.name()}.gif"
+
+    if path.exists():
+        return path
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+    def noise(size: tuple[int, int]) -> Image.Image:
+        image = Image.effect_noise(size, 64).point(lambda v: v % config.colors).convert("P")
+        image.putpalette(bytes(v for i in range(config.colors) for v in (i * 37 % 256, i * 91 % 256, i * 53 % 256)))
+
+        return image
+
+    width, height = config.size
+    patch_w = max(1, round(width * config.change ** 0.5))
+    patch_h = max(1, round(height * config.change ** 0.5))
+
+    frame = noise(config.size)
+    frames = [frame]
+
+    for i in range(1, config.frames):
+        frame = frame.copy()
+        x = (i * 17) % max(1, width - patch_w + 1)
+        y = (i * 11) % max(1, height - patch_h + 1)
+
+        frame.paste(noise((patch_w, patch_h)), (x, y))
+        frames.append(frame)
+
+    tmp = path.with_suffix(".tmp")
+    frames[0].save(tmp, format="GIF", save_all=True, append_images=frames[1:], duration=40, loop=0, optimize=False)
+    tmp.replace(path)
+
+    return path
+
+
+def bench_load(path: Path, config: Config) -> dict[str, float]:
+    from core import GifCore
+
+    core = GifCore()
+
+    start = perf_counter()
+    core.load_gif(path)
+
+    return {"seconds": perf_counter() - start, "frames": core.get_n_frames()}
+
+
+def bench_load_lazy(path: Path, config: Config) -> dict[str, float]:
+    from core import GifCore
+
+    core = GifCore()
+    core.set_lazy(True)
+
+    start = perf_counter()
+    core.load_gif(path)
+    opened = perf_counter() - start
+
+    for i in range(core.get_n_frames()):
+        core.get_image(i)
+
+    return {"seconds": perf_counter() - start, "open_seconds": opened, "frames": core.get_n_frames()}
+
+
+def bench_import(path: Path, config: Config) -> dict[str, float]:
+    from core import GifCore
+
+    sources = CACHE_DIR / f"{config.name()}_import"
+
+    if not sources.exists():
+        sources.mkdir()
+
+        with Image.open(path) as image:
+            for i in range(min(config.frames, 32)):
+                image.seek(i)
+                image.convert("RGB").resize((config.size[0] * 4, config.size[1] * 3)).save(sources / f"{i:04}.jpg", quality=90)
+
+    paths = sorted(sources.glob("*.jpg"))
+
+    core = GifCore()
+    core.create_gif(config.size)
+
+    start = perf_counter()
+
+    for image_path in paths:
+        core.ins_image("end", image_path)
+
+    serial = perf_counter() - start
+
+    core.create_gif(config.size)
+
+    start = perf_counter()
+
+    with ProcessPoolExecutor() as executor:
+        for image in core.read_images(paths, executor):
+            core.ins_frame("end", image)
+
+    return {"seconds": serial, "parallel_seconds": perf_counter() - start, "frames": len(paths)}
+
+
+def bench_save(path: Path, config: Config) -> dict[str, float]:
+    from core import GifCore
+
+    core = GifCore()
+    core.set_lazy(True)
+    core.load_gif(path)
+
+    out = CACHE_DIR / f"{config.name()}_out.gif"
+
+    start = perf_counter()
+    core.save_as_gif(out)
+
+    return {"seconds": perf_counter() - start, "bytes": out.stat().st_size}
+
+
+def bench_save_encode(path: Path, config: Config) -> dict[str, float]:
+    from core import GifCore
+
+    core = GifCore()
+    core.set_lazy(True)
+    core.load_gif(path)
+
+    # without an origin to copy from every frame goes through the encoder, as after an edit
+    core.origin = None
+
+    out = CACHE_DIR / f"{config.name()}_encoded.gif"
+
+    start = perf_counter()
+    core.save_as_gif(out)
+
+    return {"seconds": perf_counter() - start, "bytes": out.stat().st_size}
+
+
+def bench_save_legacy(path: Path, config: Config) -> dict[str, float]:
+    from core import GifCore
+
+    core = GifCore()
+    core.set_lazy(True)
+    core.load_gif(path)
+
+    out = CACHE_DIR / f"{config.name()}_legacy.gif"
+
+    start = perf_counter()
+    core.save_as_gif(out, optimize=False)
+
+    return {"seconds": perf_counter() - start, "bytes": out.stat().st_size}
+
+
+def bench_display(path: Path, config: Config) -> dict[str, float]:
+    import tkinter as tk
+    from model import Model
+
+    root = tk.Tk()
+    canvas = tk.Canvas(root, width=config.size[0], height=config.size[1])
+    canvas.pack()
+    root.update()
+
+    model = Model()
+    model.init_canvas(canvas)
+    model.load_gif(path)
+
+    results: dict[str, float] = {}
+
+    for mode in ("items", "blit"):
+        model.set_render_mode(mode)
+
+        start = perf_counter()
+
+        for i in range(model.get_n_frames()):
+            model.display_frame(i)
+            root.update_idletasks()
+
+        seconds = perf_counter() - start
+
+        results[f"{mode}_fps"] = model.get_n_frames() / seconds
+        results[f"{mode}_seconds"] = seconds
+
+    results["seconds"] = results["items_seconds"]
+
+    root.destroy()
+
+    return results
+
+
+def bench_playback(path: Path, config: Config) -> dict[str, float]:
+    import tkinter as tk
+    from model import Model
+
+    root = tk.Tk()
+    canvas = tk.Canvas(root, width=config.size[0], height=config.size[1])
+    canvas.pack()
+    root.update()
+
+    model = Model()
+    model.init_canvas(canvas)
+    model.load_gif(path)
+
+    shown: list[tuple[int, float]] = []
+    model.bind_sync_func(lambda index: shown.append((index, monotonic())))
+
+    duration = min(3.0, sum(model.get_frame_delay(i) for i in range(model.get_n_frames())))
+
+    start = monotonic()
+    model.start_loop()
+    root.after(round(duration * 1000), lambda: model.request_stop(2))
+    root.after(round(duration * 1000) + 50, root.quit)
+    root.mainloop()
+
+    n_frames = model.get_n_frames()
+    lateness: list[float] = []
+    expected = shown[0][1] if shown else start
+    before = shown[0][0] if shown else 0
+
+    for index, at in shown:
+        while before != index:
+            expected += model.get_frame_delay(before)
+            before = (before + 1) % n_frames
+
+        lateness.append(abs(at - expected))
+
+    root.destroy()
+
+    return {
+        "seconds": duration,
+        "frames_shown": len(shown),
+        "dropped": model.scheduler.n_dropped,
+        "mean_error_ms": 1000 * sum(lateness) / max(1, len(lateness)),
+        "max_error_ms": 1000 * max(lateness, default=0),
+    }
+
+
+CASES: dict[str, tuple[Callable[[Path, Config], dict[str, float]], bool]] = {
+    "load_gif": (bench_load, False),
+    "load_gif_lazy": (bench_load_lazy, False),
+    "ins_image": (bench_import, False),
+    "save_as_gif": (bench_save, False),
+    "save_as_gif_encode": (bench_save_encode, False),
+    "save_as_gif_legacy": (bench_save_legacy, False),
+    "display_frame": (bench_display, True),
+    "loop_gif": (bench_playback, True),
+}
+
+
+def peak_rss() -> int:
+    if resource is None:
+        return 0
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_case(name: str, path: Path, config: Config) -> dict[str, Any]:
+    func, _ = CASES[name]
+
+    result = func(path, config)
+    result["peak_rss"] = peak_rss()
+
+    tracemalloc.start()
+    func(path, config)
+    result["peak_alloc"] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return result
+
+
+def start_xvfb() -> subprocess.Popen | None:
+    if os.environ.get("DISPLAY") or shutil.which("Xvfb") is None:
+        return None
+
+    display = f":{90 + os.getpid() % 100}"
+    process = subprocess.Popen(["Xvfb", display, "-screen", "0", "1280x1024x24"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    sleep(1)
+    os.environ["DISPLAY"] = display
+
+    return process
+
+
+def get_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True, cwd=Path(__file__).parent).stdout.strip()
+
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict[str, dict[str, dict[str, float]]], baseline: dict[str, dict[str, dict[str, float]]], threshold: float) -> list[str]:
+    regressions: list[str] = []
+
+    for config_name, cases in results.items():
+        for case, result in cases.items():
+            before = baseline.get(config_name, {}).get(case)
+
+            if not before or "seconds" not in result or "seconds" not in before:
+                continue
+
+            for metric in ("seconds", "peak_rss", "peak_alloc"):
+                if before.get(metric) and result.get(metric, 0) > before[metric] * (1 + threshold):
+                    regressions.append(f"{config_name}/{case}: {metric} {before[metric]:.4g} -> {result[metric]:.4g}")
+
+    return regressions
+
+
+def parse_args(argv: list[str] | None) -> Namespace:
+    parser = ArgumentParser(description="Benchmark the load, decode, render, import and save hot paths.")
+    parser.add_argument("--frames", type=int, nargs="+", default=[50, 400])
+    parser.add_argument("--size", nargs="+", default=["320x240", "1280x720"])
+    parser.add_argument("--colors", type=int, nargs="+", default=[256])
+    parser.add_argument("--change", type=float, nargs="+", default=[0.05, 1.0])
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("-o", "--output", type=Path, help="write JSON results here")
+    parser.add_argument("--baseline", type=Path, help="JSON results of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown against the baseline (0.2 = 20%%)")
+
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+
+    xvfb = start_xvfb()
+    has_display = bool(os.environ.get("DISPLAY")) or sys.platform in ("win32", "darwin")
+
+    configs = [
+        Config(frames, tuple(int(v) for v in size.split("x")), colors, change)
+        for frames in args.frames for size in args.size for colors in args.colors for change in args.change
+    ]
+
+    results: dict[str, dict[str, dict[str, Any]]] = {}
+
+    try:
+        for config in configs:
+            path = make_gif(config)
+            results[config.name()] = {}
+
+            for name in args.cases:
+                if CASES[name][1] and not has_display:
+                    results[config.name()][name] = {"skipped": "no display (install Xvfb)"}
+                    continue
+
+                # a fresh process per case keeps peak RSS separate
+                with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+                    result = executor.submit(run_case, name, path, config).result()
+
+                results[config.name()][name] = result
+                print(f"{config.name()} {name}: {result['seconds']:.3f}s rss={result['peak_rss'] / 1024 ** 2:.1f}MB alloc={result['peak_alloc'] / 1024 ** 2:.1f}MB")
+
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+
+    report = {
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2))
+
+    if args.baseline is not None:
+        regressions = compare(results, json.loads(args.baseline.read_text())["results"], args.threshold)
+
+        for regression in regressions:
+            print(f"regression: {regression}", file=sys.stderr)
+
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
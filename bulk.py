@@ -0,0 +1,41 @@
+def move_order(n_frames: int, indices: list[int], to: int) -> list[int]:
+    block = sorted(set(indices))
+    selected = set(block)
+    rest = [i for i in range(n_frames) if i not in selected]
+
+    to = min(max(to, 0), len(rest))
+
+    return rest[:to] + block + rest[to:]
+
+
+def delete_order(n_frames: int, indices: list[int]) -> list[int]:
+    selected = set(indices)
+
+    return [i for i in range(n_frames) if i not in selected]
+
+
+def duplicate_order(n_frames: int, indices: list[int]) -> list[int]:
+    block = sorted(set(indices))
+    after = block[-1] + 1
+
+    return list(range(after)) + block + list(range(after, n_frames))
+
+
+def reverse_order(n_frames: int, indices: list[int]) -> list[int]:
+    block = sorted(set(indices))
+    order = list(range(n_frames))
+
+    for position, index in zip(block, reversed(block)):
+        order[position] = index
+
+    return order
+
+
+def decimate_order(n_frames: int, indices: list[int], step: int) -> tuple[list[int], dict[int, list[int]]]:
+    block = sorted(set(indices))
+    dropped = set(block) - set(block[::step])
+
+    # every kept frame absorbs the frames dropped after it so the timing is kept
+    groups = {index: block[i:i + step] for i, index in enumerate(block) if i % step == 0}
+
+    return [i for i in range(n_frames) if i not in dropped], groups
\ No newline at end of file
@@ -0,0 +1,116 @@
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from time import perf_counter
+import sys
+
+from core import GifCore
+
+INPUT_SUFFIXES = (".gif", ".apng", ".png")
+
+
+def parse_size(value: str) -> tuple[int, int]:
+    width, height = value.lower().split("x")
+
+    return int(width), int(height)
+
+
+def parse_range(value: str) -> tuple[int, int | None]:
+    start, _, end = value.partition(":")
+
+    return int(start or 0), int(end) if end else None
+
+
+def find_inputs(paths: list[Path], recursive: bool) -> list[tuple[Path, Path]]:
+    found: list[tuple[Path, Path]] = []
+
+    for path in paths:
+        if path.is_dir():
+            files = path.rglob("*") if recursive else path.glob("*")
+
+            found.extend((file, file.relative_to(path)) for file in sorted(files) if file.suffix.lower() in INPUT_SUFFIXES)
+
+        else:
+            found.append((path, Path(path.name)))
+
+    return found
+
+
+def process_file(src: Path, dst: Path, args: Namespace, executor: Executor | None = None) -> tuple[Path, int, float]:
+    start = perf_counter()
+
+    core = GifCore()
+    core.set_lazy(True)
+    core.load_gif(src)
+
+    if args.trim is not None:
+        core.trim(*args.trim)
+
+    if args.reverse:
+        core.reverse()
+
+    if args.fps is not None or args.speed is not None:
+        core.retime(fps=args.fps, speed=args.speed)
+
+    if args.resize is not None:
+        core.resize(args.resize)
+
+    core.set_merge_duplicates(args.merge_duplicates)
+    core.set_parallel_save(executor is not None)
+
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    core.save_as_gif(dst, executor=executor)
+
+    n_frames = core.get_n_frames()
+    core.clear_configure()
+
+    return src, n_frames, perf_counter() - start
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = ArgumentParser(description="Batch convert animated GIF/APNG files without a display.")
+    parser.add_argument("inputs", nargs="+", type=Path, help="files or directories to convert")
+    parser.add_argument("-o", "--output", type=Path, required=True, help="output directory")
+    parser.add_argument("-r", "--recursive", action="store_true", help="walk input directories recursively")
+    parser.add_argument("-f", "--format", choices=("gif", "apng"), default="gif", help="output format")
+    parser.add_argument("--resize", type=parse_size, help="letterbox every frame into WIDTHxHEIGHT")
+    parser.add_argument("--fps", type=float, help="set every frame to this frame rate")
+    parser.add_argument("--speed", type=float, help="scale frame durations by 1 / SPEED")
+    parser.add_argument("--reverse", action="store_true", help="reverse the frame order")
+    parser.add_argument("--trim", type=parse_range, help="keep frames START:END")
+    parser.add_argument("--merge-duplicates", action="store_true", help="merge runs of identical frames into one longer frame")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes")
+
+    args = parser.parse_args(argv)
+
+    inputs = find_inputs(args.inputs, args.recursive)
+    failed = 0
+
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor, ThreadPoolExecutor(max_workers=1) as runner:
+        # a single file has nothing to spread across processes, so its frames are encoded in parallel instead
+        if len(inputs) == 1:
+            src, rel = inputs[0]
+            futures = {runner.submit(process_file, src, (args.output / rel).with_suffix("." + args.format), args, executor): src}
+
+        else:
+            futures = {
+                executor.submit(process_file, src, (args.output / rel).with_suffix("." + args.format), args): src
+                for src, rel in inputs
+            }
+
+        for future in as_completed(futures):
+            try:
+                src, n_frames, seconds = future.result()
+
+            except Exception as error:
+                failed += 1
+                print(f"failed: {futures[future]}: {error}", file=sys.stderr)
+
+            else:
+                print(f"{src}: {n_frames} frames, {seconds:.2f}s")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -1,26 +1,52 @@
-from tkinter import Canvas, PhotoImage, filedialog
+from tkinter import Canvas, filedialog, simpledialog
+from PIL.Image import Image
 from pathlib import Path
-from typing import Literal
+from typing import Literal, Callable, Any, TYPE_CHECKING
 
 from model import Model
+from frames import Frame, FrameSource
+from diskcache import DecodedCache, CachedSource
+from imaging import list_images
+from jobs import Job, JobRunner
 from customdialog import AskNewFileProperty, AskNewFps
 
+if TYPE_CHECKING:
+    from transforms import Transform
+    from workspace import Workspace
+
 
 class Controller():
 
     model: Model
+    workspace: "Workspace | None"
+    jobs: JobRunner
+    own_jobs: list[Job]
 
     state: list[dict[str, tuple[int, int]]]
     current_state: int
+    state_before_transfer: int
+    state_before_job: int
 
-    def __init__(self) -> None:
-        self.model = Model()
+    def __init__(self, workspace: "Workspace | None" = None) -> None:
+        self.model = Model(workspace)
+        self.workspace = workspace
+        self.own_jobs = []
 
         self.init_state_machine()
         self.model.set_fps(24)
 
     def init_canvas(self, canvas: Canvas) -> None:
         self.model.init_canvas(canvas)
+
+        if self.workspace is not None:
+            self.jobs = self.workspace.jobs
+            self.workspace.add(self.model)
+
+        else:
+            self.jobs = JobRunner(canvas)
+
+    def bind_progress_func(self, func: Callable[[Job | None], None]) -> None:
+        self.jobs.bind_progress_func(func)
     
     def bind_sync_func(self, func: object) -> None:
         self.model.bind_sync_func(func)
@@ -30,22 +56,164 @@ class Controller():
             {"set": (1, 1), "ins": (0, 0), "save": (0, 0), "play": (0, 0), "stop":(0, 0), "edit": (0, 0)}, # when none
             {"set": (1, 1), "ins": (1, 1), "save": (1, 1), "play": (1, 2), "stop":(0, 1), "edit": (1, 1)}, # when idle
             {"set": (1, 1), "ins": (1, 2), "save": (1, 2), "play": (0, 2), "stop":(1, 1), "edit": (1, 2)}, # when play
+            {"set": (0, 3), "ins": (0, 3), "save": (0, 3), "play": (0, 3), "stop":(0, 3), "edit": (0, 3)}, # when busy
         ]
 
         self.current_state = 0
-
-    def get_icons(self) -> dict[str, PhotoImage]:
-        return self.model.get_icons()
+        self.state_before_transfer = 0
+        self.state_before_job = 0
 
     def is_transfer_to_state(self, command: Literal["set", "ins", "save", "play", "stop", "edit"]) -> bool:
         is_vailed, next_state = self.state[self.current_state][command]
 
         print(f"state: {command}: {self.current_state} > {next_state}")
 
+        self.state_before_transfer = self.current_state
         self.current_state = next_state
 
         return is_vailed
 
+    def is_busy(self) -> bool:
+        return self.current_state == 3
+
+    def run_job(self, name: str, work: Callable[[Job], Any], on_batch: Callable[[list[Any]], None] | None = None, on_done: Callable[[Any], None] | None = None, on_error: Callable[[BaseException], None] | None = None) -> Job:
+        if self.current_state == 2:
+            self.animation("pause")
+            self.current_state = 1
+
+        self.state_before_job = self.current_state
+        self.current_state = 3
+
+        def done(result: Any) -> None:
+            self.current_state = self.state_before_job
+            self.own_jobs.remove(job)
+
+            if on_done is not None:
+                on_done(result)
+
+        def error(exception: BaseException) -> None:
+            self.current_state = self.state_before_job
+            self.own_jobs.remove(job)
+
+            if on_error is None:
+                raise exception
+
+            on_error(exception)
+
+        job = Job(name, on_batch, done, error)
+        self.own_jobs.append(job)
+
+        return self.jobs.submit(job, work)
+
+    def cancel_job(self) -> None:
+        # the job runner may be shared with other documents, only this one's jobs are cancelled
+        for job in self.own_jobs:
+            job.cancel()
+
+    def set_visible(self, visible: bool) -> None:
+        if self.workspace is not None:
+            self.workspace.set_visible(self.model, visible)
+
+        else:
+            self.model.set_visible(visible)
+
+    def close(self) -> None:
+        self.cancel_job()
+        self.model.shutdown()
+
+        if self.workspace is not None:
+            self.workspace.remove(self.model)
+
+    def set_render_mode(self, mode: Literal["items", "blit", "tiles"]) -> None:
+        self.model.set_render_mode(mode)
+
+    def set_zoom(self, zoom: float | Literal["fit"]) -> None:
+        self.model.set_zoom(zoom)
+
+    def pan(self, dx: int, dy: int) -> None:
+        self.model.pan_by(dx, dy)
+
+    def zoom(self, factor: float) -> None:
+        self.model.zoom_by(factor)
+
+    def resize_canvas(self) -> None:
+        self.model.request_resize()
+
+    def set_lazy(self, lazy: bool) -> None:
+        self.model.set_lazy(lazy)
+
+    def set_memory_budget(self) -> int | None:
+        budget = self.workspace.memory_budget if self.workspace is not None else self.model.memory_budget
+        current = budget // 1024 ** 2 if budget is not None else 0
+
+        megabytes = simpledialog.askinteger("メモリ上限", "画像に使うメモリの上限 (MB, 0で無制限)", initialvalue=current, minvalue=0)
+
+        if megabytes is None:
+            return budget
+
+        budget = megabytes * 1024 ** 2 if megabytes else None
+
+        if self.workspace is not None:
+            self.workspace.set_memory_budget(budget)
+
+        else:
+            self.model.set_memory_budget(budget)
+
+        return budget
+
+    def get_memory_usage(self) -> dict[str, int | None]:
+        if self.workspace is not None:
+            return self.workspace.get_memory_usage()
+
+        return self.model.get_memory_usage()
+
+    def get_frame_names(self) -> list[str]:
+        return self.model.get_frame_names()
+
+    def get_fps(self) -> float:
+        return self.model.fps
+
+    def is_playing(self) -> bool:
+        return self.current_state == 2
+
+    def set_disk_cache(self, enabled: bool) -> None:
+        self.model.set_disk_cache(DecodedCache() if enabled else None)
+
+    def clear_disk_cache(self) -> None:
+        DecodedCache().clear()
+
+    def set_dedup(self, dedup: bool) -> None:
+        self.model.set_dedup(dedup)
+
+    def set_merge_duplicates(self, merge: bool) -> None:
+        self.model.set_merge_duplicates(merge)
+
+    def set_parallel_save(self, parallel: bool) -> None:
+        self.model.set_parallel_save(parallel)
+
+    def set_fps_override(self, override: bool) -> None:
+        self.model.set_fps_override(override)
+
+    def set_telemetry(self, enabled: bool) -> None:
+        self.model.set_telemetry(enabled)
+
+    def get_telemetry(self) -> dict[str, Any]:
+        return self.model.get_telemetry()
+
+    def export_telemetry(self) -> bool:
+        types = [
+            ("CSV", "*.csv"), ("JSON", "*.json")
+        ]
+
+        filename = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=types, initialfile="telemetry")
+
+        if not filename:
+            return False
+
+        self.model.export_telemetry(Path(filename))
+
+        return True
+
     def set_fps(self) -> float:
         fps = AskNewFps(title="fpsの変更").get()
 
@@ -70,52 +238,172 @@ class Controller():
 
         return path.name, size
     
-    def open_gif(self) -> tuple[int, str, list[str], tuple[int, int]]:
-        path = Path(filedialog.askopenfilename(filetypes=[("GIF", "*.gif"), ("APNG", "*.apng")]))
+    def open_gif(self, on_batch: Callable[[list[str]], None], on_done: Callable[[int], None], on_error: Callable[[BaseException], None] | None = None) -> tuple[str, tuple[int, int]] | None:
+        filename = filedialog.askopenfilename(filetypes=[("GIF", "*.gif"), ("APNG", "*.apng")])
 
-        size, frames_name = self.model.load_gif(path)
+        # nothing was opened, so whatever was loaded, and playing, carries on as it was
+        if not filename:
+            self.current_state = self.state_before_transfer
+            return None
 
-        n_frames = self.model.get_n_frames()
+        path = Path(filename)
+
+        size = self.model.begin_load(path)
 
         self.current_path = path
 
-        return n_frames, path.name, frames_name, size 
+        if self.model.lazy or self.model.disk_cache is not None:
+            def work(job: Job) -> FrameSource | CachedSource:
+                job.report(0, 1)
+
+                return self.model.open_source(path)
+
+            def done(source: FrameSource | CachedSource | None) -> None:
+                if source is not None:
+                    on_batch(self.model.attach_source(source, path))
+                    self.model.display_frame(0)
+
+                on_done(self.model.get_n_frames())
+
+            self.run_job("gifを開いています", work, on_done=done, on_error=on_error)
+
+        else:
+            def work(job: Job) -> None:
+                for i, (image, duration) in enumerate(self.model.read_gif(path, job.report)):
+                    job.emit((image, duration, self.model.get_frame_name(path, i), self.model.hash_image(image), i))
+
+            def batch(items: list[tuple[Image, int | None, str, bytes | None, int]]) -> None:
+                is_first = self.model.get_n_frames() == 0
+
+                for image, duration, name, digest, origin in items:
+                    self.model.ins_frame("end", image, duration, name, digest, origin)
+
+                if is_first:
+                    self.model.display_frame(0)
+
+                on_batch([item[2] for item in items])
+
+            def done(_: None) -> None:
+                self.model.history.clear()
+
+                on_done(self.model.get_n_frames())
+
+            def error(exception: BaseException) -> None:
+                self.model.history.clear()
+
+                if on_error is None:
+                    raise exception
+
+                on_error(exception)
+
+            # the frames streamed in while opening are not an edit
+            self.model.history.begin("open")
+
+            self.run_job("gifを開いています", work, batch, done, error)
+
+        return path.name, size
     
-    def ins_images(self) -> tuple[int, list[str]]:
+    def ins_images(self, on_batch: Callable[[list[str]], None], on_done: Callable[[int], None], on_error: Callable[[BaseException], None] | None = None) -> bool:
         filenames = filedialog.askopenfilenames()
 
-        names: list[str] = []
-        
-        for filename in filenames:
-            path = Path(filename)
+        if not filenames:
+            return False
 
-            self.model.ins_image("end", path)
+        return self.ins_paths([Path(filename) for filename in filenames], on_batch, on_done, on_error)
 
-            names.append(path.name)
+    def ins_directory(self, on_batch: Callable[[list[str]], None], on_done: Callable[[int], None], on_error: Callable[[BaseException], None] | None = None) -> bool:
+        dirname = filedialog.askdirectory()
 
-        n_frames = self.model.get_n_frames()
+        if not dirname:
+            return False
+
+        pattern = simpledialog.askstring("連番画像の読み込み", "ファイル名のパターン (例: frame_*.png)", initialvalue="*")
+
+        if not pattern:
+            return False
+
+        paths = list_images(Path(dirname), pattern)
+
+        if not paths:
+            return False
+
+        return self.ins_paths(paths, on_batch, on_done, on_error)
+
+    def ins_paths(self, paths: list[Path], on_batch: Callable[[list[str]], None], on_done: Callable[[int], None], on_error: Callable[[BaseException], None] | None = None) -> bool:
+        def work(job: Job) -> None:
+            images = self.model.read_images(paths, self.jobs.get_process_pool(), job.report)
+
+            for path, image in zip(paths, images):
+                job.emit((image, path.name, self.model.hash_image(image)))
+
+        def batch(items: list[tuple[Image, str, bytes | None]]) -> None:
+            for image, name, digest in items:
+                self.model.ins_frame("end", image, name=name, digest=digest)
+
+            on_batch([name for _, name, _ in items])
 
-        return n_frames, names
+        def done(_: None) -> None:
+            self.model.history.end()
 
-    def save_gif(self) -> None:
+            on_done(self.model.get_n_frames())
+
+        def error(exception: BaseException) -> None:
+            self.model.history.end()
+
+            if on_error is None:
+                raise exception
+
+            on_error(exception)
+
+        # one import is one undo step however many batches it arrives in
+        self.model.history.begin("insert")
+
+        self.run_job("画像を読み込んでいます", work, batch, done, error)
+
+        return True
+
+    def save_gif(self, on_done: Callable[[int, int], None] | None = None, on_error: Callable[[BaseException], None] | None = None) -> bool:
         types = [
             ("GIF", "*.gif"), ("APNG", "*.apng")
         ]
 
-        path = Path(filedialog.asksaveasfilename(defaultextension=".gif", filetypes=types, initialfile=self.current_path))
+        filename = filedialog.asksaveasfilename(defaultextension=".gif", filetypes=types, initialfile=self.current_path)
+
+        if not filename:
+            return False
 
-        self.model.save_as_gif(path)
+        path = Path(filename)
+
+        n_frames = self.model.get_n_frames()
 
-    def export_frame(self, index: int, name: str) -> None:
+        def done(written: int | None) -> None:
+            # a cancelled save finishes with no result and has nothing to report
+            if written is not None and on_done is not None:
+                on_done(written, n_frames - written)
+
+        executor = self.jobs.get_process_pool() if self.model.parallel_save else None
+
+        self.run_job("保存しています", lambda job: self.model.save_as_gif(path, job.report, executor=executor), on_done=done, on_error=on_error)
+
+        return True
+
+    def export_frame(self, index: int, name: str, on_done: Callable[[Any], None] | None = None, on_error: Callable[[BaseException], None] | None = None) -> bool:
         types = [
             ("GIF", "*.gif"), ("PNG", "*.png"), ("JPEG", ["*.jpg", "*.jpeg"])
         ]
 
         initialfilename = f"{name}"
 
-        path = Path(filedialog.asksaveasfilename(defaultextension=".gif", filetypes=types, initialfile=initialfilename))
+        filename = filedialog.asksaveasfilename(defaultextension=".gif", filetypes=types, initialfile=initialfilename)
+
+        if not filename:
+            return False
 
-        self.model.save_frame(index, path)
+        path = Path(filename)
+
+        self.run_job("エクスポートしています", lambda job: self.model.save_frame(index, path), on_done=on_done, on_error=on_error)
+
+        return True
 
     def animation(self, command: Literal["play", "stop", "pause"]) -> None:
         if command == "play":
@@ -129,7 +417,188 @@ class Controller():
             self.model.request_stop(2)
 
     def display_frame(self, index: int) -> None:
-        self.model.display_frame(index)
+        self.model.seek_frame(index)
+
+    def get_frame(self, index: int) -> Frame | None:
+        if index >= self.model.get_n_frames():
+            return None
+
+        return self.model.images[index]
+
+    def move_frames(self, indices: list[int], to: Literal["Up", "Down"]) -> tuple[list[int], list[int]]:
+        start = min(indices)
+        target = start - 1 if to == "Up" else start + 1
+
+        order = self.model.move_frames(indices, target)
+        target = order.index(sorted(indices)[0])
+
+        return order, list(range(target, target + len(set(indices))))
+
+    def delete_frames(self, indices: list[int]) -> tuple[list[int], list[int]]:
+        order = self.model.delete_frames(indices)
+
+        if not order:
+            # nothing is left to play, paused rather than stopped as there is no first frame to rewind to
+            if self.current_state == 2 and self.is_transfer_to_state("stop"):
+                self.animation("pause")
+
+            return order, []
+
+        return order, [min(min(indices), len(order) - 1)]
+
+    def duplicate_frames(self, indices: list[int]) -> tuple[list[int], list[int]]:
+        order = self.model.duplicate_frames(indices)
+        start = max(indices) + 1
+
+        return order, list(range(start, start + len(set(indices))))
+
+    def reverse_frames(self, indices: list[int]) -> tuple[list[int], list[int]]:
+        return self.model.reverse_frames(indices), sorted(indices)
+
+    def decimate_frames(self, indices: list[int]) -> tuple[list[int], list[int]] | None:
+        step = simpledialog.askinteger("間引き", "何フレームごとに残しますか", initialvalue=2, minvalue=2)
+
+        if not step:
+            return None
+
+        order = self.model.decimate_frames(indices, step)
+        kept = set(sorted(indices)[::step])
+
+        return order, [position for position, i in enumerate(order) if i in kept]
+
+    def undo(self) -> tuple[list[str], list[int]] | None:
+        if (command := self.model.undo()) is None:
+            return None
+
+        # a command that only changed the size moved no frames, the selection stays where it was
+        if not command.splices:
+            return self.model.get_frame_names(), self.get_restored_selection(self.model.current_frame, 0)
+
+        splice = command.splices[0]
+
+        return self.model.get_frame_names(), self.get_restored_selection(splice.index, len(splice.removed))
+
+    def redo(self) -> tuple[list[str], list[int]] | None:
+        if (command := self.model.redo()) is None:
+            return None
+
+        # a command that only changed the size moved no frames, the selection stays where it was
+        if not command.splices:
+            return self.model.get_frame_names(), self.get_restored_selection(self.model.current_frame, 0)
+
+        splice = command.splices[0]
+
+        return self.model.get_frame_names(), self.get_restored_selection(splice.index, len(splice.inserted))
+
+    def get_restored_selection(self, index: int, n: int) -> list[int]:
+        n_frames = self.model.get_n_frames()
+
+        if n_frames == 0:
+            return []
+
+        if n == 0:
+            return [min(index, n_frames - 1)]
+
+        return list(range(index, min(index + n, n_frames)))
+
+    def set_history_limit(self) -> int | None:
+        steps = simpledialog.askinteger("元に戻す回数", "元に戻せる操作の数", initialvalue=self.model.history.max_steps, minvalue=1)
+
+        if not steps:
+            return None
+
+        self.model.history.set_limits(steps, self.model.history.max_bytes)
+
+        return steps
+
+    def get_size(self) -> tuple[int, int]:
+        return self.model.size
+
+    def ask_transforms(self, kind: Literal["resize", "crop", "rotate_left", "rotate_right", "flip_h", "flip_v", "adjust", "fade"]) -> list["Transform"] | None:
+        from transforms import Resize, Crop, Rotate, Flip, Adjust, Fade
+
+        w, h = self.model.size
+
+        if kind == "resize":
+            text = simpledialog.askstring("サイズ変更", "新しいサイズ (幅x高さ)", initialvalue=f"{w}x{h}")
+
+            try:
+                size = tuple(int(v) for v in text.lower().split("x")) if text else None
+
+            except ValueError:
+                return None
+
+            if size is None or len(size) != 2 or min(size) < 1:
+                return None
+
+            return [Resize(size)]
+
+        if kind == "crop":
+            text = simpledialog.askstring("切り抜き", "切り抜く範囲 (x0,y0,x1,y1)", initialvalue=f"0,0,{w},{h}")
+
+            try:
+                box = tuple(int(v) for v in text.split(",")) if text else None
+
+            except ValueError:
+                return None
+
+            if box is None or len(box) != 4 or not (0 <= box[0] < box[2] <= w and 0 <= box[1] < box[3] <= h):
+                return None
+
+            return [Crop(box)]
+
+        if kind in ("rotate_left", "rotate_right"):
+            return [Rotate(1 if kind == "rotate_left" else 3)]
+
+        if kind in ("flip_h", "flip_v"):
+            return [Flip(kind == "flip_h")]
+
+        if kind == "adjust":
+            brightness = simpledialog.askfloat("明るさ・コントラスト", "明るさ (1.0で元のまま)", initialvalue=1.0, minvalue=0.0)
+
+            if brightness is None:
+                return None
+
+            contrast = simpledialog.askfloat("明るさ・コントラスト", "コントラスト (1.0で元のまま)", initialvalue=1.0, minvalue=0.0)
+
+            if contrast is None:
+                return None
+
+            return [Adjust(brightness, contrast)]
+
+        if kind == "fade":
+            n_in = simpledialog.askinteger("フェード", "フェードインのフレーム数", initialvalue=10, minvalue=0)
+
+            if n_in is None:
+                return None
+
+            n_out = simpledialog.askinteger("フェード", "フェードアウトのフレーム数", initialvalue=10, minvalue=0)
+
+            if n_out is None:
+                return None
+
+            return [Fade(n_in, n_out)]
+
+        return None
+
+    def transform(self, kind: Literal["resize", "crop", "rotate_left", "rotate_right", "flip_h", "flip_v", "adjust", "fade"], on_done: Callable[[tuple[int, int]], None] | None = None, on_error: Callable[[BaseException], None] | None = None) -> bool:
+        if self.model.get_n_frames() == 0 or not (transforms := self.ask_transforms(kind)):
+            return False
+
+        def done(result: tuple[list[Frame], tuple[int, int]] | None) -> None:
+            if result is None:
+                return
+
+            self.model.replace_frames(*result)
+            self.model.display_frame(min(self.model.current_frame, self.model.get_n_frames() - 1))
+
+            if on_done is not None:
+                on_done(self.model.size)
+
+        # the whole animation is built off the UI thread, then swapped in as one undoable step
+        self.run_job("変換しています", lambda job: self.model.build_transformed(transforms, job.report), on_done=done, on_error=on_error)
+
+        return True
 
     def delete_frame(self, index: int) -> int:
         self.model.del_frame(index)
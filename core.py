@@ -0,0 +1,470 @@
+from pathlib import Path
+from functools import partial
+from PIL import Image
+from typing import Literal, Callable, Iterator, TYPE_CHECKING
+from concurrent.futures import Executor
+
+from frames import Frame, FrameSource, count_frames
+from imaging import adjust_image, load_image
+from gifencoder import sample_palette
+from streamwriter import save_animation
+from diskcache import DecodedCache, CachedSource, hash_file
+from bulk import move_order, delete_order, duplicate_order, reverse_order, decimate_order
+from history import History, Command, Splice, diff_frames
+from dedup import DedupIndex, hash_image, merge_runs
+from gifsplice import GifOrigin, save_spliced
+from gifparallel import save_parallel
+
+# transforms brings NumPy with it, which is only needed once a transform is run
+if TYPE_CHECKING:
+    from transforms import Transform
+
+class GifCore():
+
+    images: list[Frame]
+    source: FrameSource | CachedSource | None
+    origin: GifOrigin | None
+    disk_cache: DecodedCache | None
+    history: History
+    dedup_index: DedupIndex
+    dedup: bool
+    merge_duplicates: bool
+    parallel_save: bool
+    lazy: bool
+    prefetch: int
+    size: tuple[int, int]
+    n_frames: int
+    fps: float
+    fps_override: bool
+
+    def __init__(self) -> None:
+        self.images = []
+        self.source = None
+        self.origin = None
+        self.disk_cache = None
+        self.history = History()
+        self.dedup_index = DedupIndex()
+        self.dedup = True
+        self.merge_duplicates = False
+        self.parallel_save = False
+        self.lazy = False
+        self.prefetch = 2
+        self.size = (0, 0)
+        self.n_frames = 0
+        self.fps = 24
+        self.fps_override = False
+
+    def clear_configure(self) -> None:
+        if self.source is not None:
+            self.source.close()
+
+        self.images = []
+        self.source = None
+        self.origin = None
+        self.size = (0, 0)
+        self.n_frames = 0
+
+        self.history.clear()
+        self.dedup_index.clear()
+
+    def forget_frame(self, frame: Frame) -> None:
+        pass
+
+    def set_lazy(self, lazy: bool) -> None:
+        self.lazy = lazy
+
+    def set_disk_cache(self, cache: DecodedCache | None) -> None:
+        self.disk_cache = cache
+
+    def set_dedup(self, dedup: bool) -> None:
+        self.dedup = dedup
+
+    def set_merge_duplicates(self, merge: bool) -> None:
+        self.merge_duplicates = merge
+
+    def set_parallel_save(self, parallel: bool) -> None:
+        self.parallel_save = parallel
+
+    def get_dedup_report(self) -> dict[str, int]:
+        return {"frames": self.dedup_index.n_shared, "bytes": self.dedup_index.saved_bytes}
+
+    def hash_image(self, image: Image.Image) -> bytes | None:
+        return hash_image(image) if self.dedup else None
+
+    def set_fps(self, fps: float) -> None:
+        self.fps = fps
+
+    def set_fps_override(self, override: bool) -> None:
+        self.fps_override = override
+
+    def get_frame_delay(self, index: int) -> float:
+        duration = self.images[index].duration
+
+        if self.fps_override or not duration:
+            return 1 / self.fps
+
+        return duration / 1000
+
+    def get_frame_duration(self, index: int) -> int:
+        duration = self.images[index].duration
+
+        # the override only changes playback, saving and editing keep each frame's own timing
+        if duration is None:
+            return round(1000 / self.fps)
+
+        return duration
+
+    def get_n_frames(self) -> int:
+        return self.n_frames
+
+    def set_size(self, size: tuple[int, int]) -> None:
+        self.size = size
+
+    def create_gif(self, size: tuple[int, int]) -> None:
+        self.clear_configure()
+
+        self.size = size
+
+    def load_gif(self, path: Path) -> tuple[tuple[int, int], list[str]]:
+        size = self.begin_load(path)
+
+        if self.lazy or self.disk_cache is not None:
+            frames_name = self.attach_source(self.open_source(path), path)
+
+        else:
+            frames_name: list[str] = []
+
+            for i, (croped, duration) in enumerate(self.read_gif(path)):
+                self.ins_frame(i, croped, duration, self.get_frame_name(path, i), origin=i)
+
+                frames_name.append(self.get_frame_name(path, i))
+
+        self.history.clear()
+
+        return size, frames_name
+
+    def begin_load(self, path: Path) -> tuple[int, int]:
+        self.clear_configure()
+
+        with Image.open(path) as image:
+            self.size = image.size
+            is_gif = image.format == "GIF"
+
+        if is_gif:
+            self.origin = GifOrigin(path)
+
+        return self.size
+
+    def get_frame_name(self, path: Path, index: int) -> str:
+        return f"{path.stem}_{index}"
+
+    def read_gif(self, path: Path, progress: Callable[[int, int], None] | None = None) -> Iterator[tuple[Image.Image, int | None]]:
+        image = Image.open(path)
+        n_frames = count_frames(image, path)
+
+        for i in range(n_frames):
+            image.seek(i)
+            croped = image.crop()
+
+            yield croped, image.info.get("duration")
+
+            if progress is not None:
+                progress(i + 1, n_frames)
+
+    def open_source(self, path: Path) -> FrameSource | CachedSource:
+        if self.disk_cache is None:
+            return FrameSource(path, cache_size=self.prefetch + 2)
+
+        key = hash_file(path)
+
+        if (cached := self.disk_cache.lookup(path, key)) is not None:
+            return cached
+
+        source = FrameSource(path, cache_size=self.prefetch + 2)
+
+        images = (source.get(i) for i in range(source.n_frames))
+        durations = [source.get_duration(i) for i in range(source.n_frames)]
+        boxes = [source.get_box(i) for i in range(source.n_frames)]
+
+        if not self.disk_cache.store(key, source.size, images, durations, boxes):
+            return source
+
+        source.close()
+
+        return self.disk_cache.lookup(path, key) or FrameSource(path, cache_size=self.prefetch + 2)
+
+    def attach_source(self, source: FrameSource | CachedSource, path: Path) -> list[str]:
+        self.source = source
+        self.size = source.size
+
+        frames_name: list[str] = []
+
+        for i in range(source.n_frames):
+            frame = Frame(source=source, index=i, duration=source.get_duration(i), box=source.get_box(i), name=self.get_frame_name(path, i), origin=i)
+
+            self.images.append(frame)
+
+            frames_name.append(self.get_frame_name(path, i))
+
+        self.n_frames = source.n_frames
+
+        return frames_name
+
+    def ins_image(self, index: int | Literal["end"], path: Path) -> None:
+        image = self.read_image(path)
+
+        self.ins_frame(index, image, name=path.name)
+
+    def read_image(self, path: Path) -> Image.Image:
+        return load_image(path, self.size)
+
+    def read_images(self, paths: list[Path], executor: Executor, progress: Callable[[int, int], None] | None = None) -> Iterator[Image.Image]:
+        futures = [executor.submit(load_image, path, self.size) for path in paths]
+
+        try:
+            for i, future in enumerate(futures):
+                yield future.result()
+
+                if progress is not None:
+                    progress(i + 1, len(futures))
+
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def adjust_image(self, image: Image.Image) -> Image.Image:
+        return adjust_image(image, self.size)
+
+    def ins_frame(self, index: int | Literal["end"], image: Image.Image, duration: int | None = None, name: str | None = None, digest: bytes | None = None, origin: int | None = None) -> None:
+        if index == "end":
+            index = self.n_frames
+
+        frame = Frame(image=image, duration=duration, name=name, origin=origin)
+
+        if self.dedup:
+            frame = self.dedup_index.intern(frame, digest)
+
+        self.images.insert(index, frame)
+        self.n_frames += 1
+
+        self.history.record("insert", Splice(index, (), (frame,)))
+
+    def del_frame(self, index: int) -> None:
+        frame = self.images[index]
+
+        self.forget_frame(frame)
+
+        del self.images[index]
+        self.n_frames -= 1
+
+        self.history.record("delete", Splice(index, (frame,), ()))
+
+    def replace_frame(self, index: int, ins_index: int) -> None:
+        before = list(self.images)
+        frame = self.images.pop(index)
+
+        self.images.insert(ins_index, frame)
+
+        self.history.record("move", diff_frames(before, self.images))
+
+    def get_frame_names(self) -> list[str]:
+        return [frame.name or f"frame_{i}" for i, frame in enumerate(self.images)]
+
+    def get_image(self, index: int) -> Image.Image:
+        return self.images[index].get_image()
+
+    def set_frames(self, frames: list[Frame]) -> None:
+        self.history.record("edit", diff_frames(self.images, frames))
+
+        self.swap_frames(frames)
+
+    def swap_frames(self, frames: list[Frame]) -> None:
+        kept = {id(frame.content) for frame in frames}
+
+        for frame in self.images:
+            if id(frame.content) not in kept:
+                self.forget_frame(frame)
+
+        self.images = frames
+        self.n_frames = len(frames)
+
+    def undo(self) -> Command | None:
+        if (command := self.history.undo()) is None:
+            return None
+
+        frames = list(self.images)
+
+        for splice in reversed(command.splices):
+            frames[splice.index:splice.index + len(splice.inserted)] = splice.removed
+
+        self.swap_frames(frames)
+
+        if command.sizes is not None:
+            self.set_size(command.sizes[0])
+
+        return command
+
+    def redo(self) -> Command | None:
+        if (command := self.history.redo()) is None:
+            return None
+
+        frames = list(self.images)
+
+        for splice in command.splices:
+            frames[splice.index:splice.index + len(splice.removed)] = splice.inserted
+
+        self.swap_frames(frames)
+
+        if command.sizes is not None:
+            self.set_size(command.sizes[1])
+
+        return command
+
+    def reorder(self, order: list[int]) -> list[int]:
+        self.set_frames([self.images[i] for i in order])
+
+        return order
+
+    def move_frames(self, indices: list[int], to: int) -> list[int]:
+        return self.reorder(move_order(self.n_frames, indices, to))
+
+    def delete_frames(self, indices: list[int]) -> list[int]:
+        return self.reorder(delete_order(self.n_frames, indices))
+
+    def duplicate_frames(self, indices: list[int]) -> list[int]:
+        return self.reorder(duplicate_order(self.n_frames, indices))
+
+    def reverse_frames(self, indices: list[int]) -> list[int]:
+        return self.reorder(reverse_order(self.n_frames, indices))
+
+    def decimate_frames(self, indices: list[int], step: int) -> list[int]:
+        order, groups = decimate_order(self.n_frames, indices, step)
+        durations = {index: sum(self.get_frame_duration(i) for i in group) for index, group in groups.items()}
+
+        self.set_frames([self.images[i].with_duration(durations[i]) if i in durations else self.images[i] for i in order])
+
+        return order
+
+    def replace_frames(self, frames: list[Frame], size: tuple[int, int]) -> None:
+        self.history.begin("transform")
+        self.set_frames(frames)
+        self.history.record_size("transform", self.size, size)
+        self.history.end()
+
+        self.set_size(size)
+
+    def resize(self, size: tuple[int, int]) -> None:
+        transform = partial(adjust_image, size=size)
+
+        self.replace_frames([frame.with_transform(transform) for frame in self.images], size)
+
+    def build_transformed(self, transforms: list["Transform"], progress: Callable[[int, int], None] | None = None) -> tuple[list[Frame], tuple[int, int]]:
+        from transforms import get_output_size, transform_images
+
+        per_frame = any(transform.per_frame for transform in transforms)
+
+        # frames sharing content are transformed once, unless the result depends on where the frame is
+        firsts: dict[object, int] = {}
+
+        for i, frame in enumerate(self.images):
+            firsts.setdefault(i if per_frame else id(frame.content), i)
+
+        todo = list(firsts.values())
+        images = transform_images(((i, self.get_image(i)) for i in todo), self.n_frames, self.size, transforms)
+        done: dict[int, Frame] = {}
+
+        for n, (i, image) in enumerate(zip(todo, images)):
+            done[i] = Frame(image=image, duration=self.images[i].duration, name=self.images[i].name)
+
+            if progress is not None:
+                progress(n + 1, len(todo))
+
+        frames: list[Frame] = []
+
+        for i, frame in enumerate(self.images):
+            first = done[firsts[i if per_frame else id(frame.content)]]
+
+            if i not in done:
+                first = Frame(image=first.image, duration=frame.duration, name=frame.name, content=first.content)
+
+            frames.append(first)
+
+        return frames, get_output_size(self.size, transforms)
+
+    def transform(self, transforms: list["Transform"], progress: Callable[[int, int], None] | None = None) -> None:
+        self.replace_frames(*self.build_transformed(transforms, progress))
+
+    def retime(self, fps: float | None = None, speed: float | None = None) -> None:
+        if fps is not None:
+            durations = [round(1000 / fps)] * self.n_frames
+
+        elif speed is not None:
+            durations = [max(1, round(self.get_frame_duration(i) / speed)) for i in range(self.n_frames)]
+
+        else:
+            raise ValueError("retime needs 'fps' or 'speed'.")
+
+        self.set_frames([frame.with_duration(duration) for frame, duration in zip(self.images, durations)])
+
+    def reverse(self) -> None:
+        self.set_frames(self.images[::-1])
+
+    def trim(self, start: int, end: int | None = None) -> None:
+        self.set_frames(self.images[start:end])
+
+    def save_frame(self, index: int, path: Path) -> None:
+        image = self.get_image(index)
+        image.save(path)
+
+    def iter_frames(self, progress: Callable[[int, int], None] | None = None) -> Iterator[tuple[Image.Image, int]]:
+        for i in range(self.n_frames):
+            yield self.get_image(i), self.get_frame_duration(i)
+
+            if progress is not None:
+                progress(i + 1, self.n_frames)
+
+    def iter_merged_frames(self, progress: Callable[[int, int], None] | None = None) -> Iterator[tuple[Image.Image, int]]:
+        def keyed() -> Iterator[tuple[object, Image.Image, int]]:
+            for i, (image, duration) in enumerate(self.iter_frames(progress)):
+                yield self.images[i].content, image, duration
+
+        return merge_runs(keyed())
+
+    def iter_spliced_frames(self, progress: Callable[[int, int], None] | None = None) -> Iterator[tuple[int | None, Callable[[], Image.Image], int]]:
+        for i in range(self.n_frames):
+            yield self.images[i].origin, partial(self.get_image, i), self.get_frame_duration(i)
+
+            if progress is not None:
+                progress(i + 1, self.n_frames)
+
+    def can_splice(self, path: Path) -> bool:
+        if self.origin is None or self.merge_duplicates or path.suffix.lower() != ".gif":
+            return False
+
+        return self.origin.is_copyable(self.size)
+
+    def save_as_gif(self, path: Path, progress: Callable[[int, int], None] | None = None, optimize: bool = True, executor: Executor | None = None) -> int:
+        if not optimize:
+            images = [image for image, _ in self.iter_frames(progress)]
+
+            topimg = images[0]
+            topimg.save(path, save_all=True, append_images=images[1:], optimize=False, loop=0, comment="test")
+
+            return len(images)
+
+        if self.can_splice(path):
+            written, _ = save_spliced(path, self.origin, self.iter_spliced_frames(progress), loop=0, comment="test")
+
+            return written
+
+        palette = None
+
+        if path.suffix.lower() == ".gif":
+            palette = sample_palette(self.get_image, self.n_frames)
+
+        frames = self.iter_merged_frames(progress) if self.merge_duplicates else self.iter_frames(progress)
+
+        if palette is not None and self.parallel_save and executor is not None:
+            return save_parallel(path, frames, self.size, palette, executor, loop=0, comment="test")
+
+        return save_animation(path, frames, self.size, self.n_frames, palette, loop=0, comment="test")
\ No newline at end of file
@@ -0,0 +1,84 @@
+from hashlib import blake2b
+from typing import Iterable, Iterator
+from weakref import WeakValueDictionary
+from PIL import Image
+
+from frames import Frame
+
+MAX_DURATION = 655350
+
+
+def hash_image(image: Image.Image) -> bytes:
+    digest = blake2b(digest_size=16)
+
+    # the first GIF frame decodes as "P" and the rest as "RGB"/"RGBA", so compare what is shown
+    if image.mode != "RGBA":
+        image = image.convert("RGBA")
+
+    digest.update(f"{image.size}".encode())
+    digest.update(image.tobytes())
+
+    return digest.digest()
+
+
+class DedupIndex():
+
+    frames: WeakValueDictionary[bytes, Frame]
+    n_shared: int
+    saved_bytes: int
+
+    def __init__(self) -> None:
+        self.frames = WeakValueDictionary()
+        self.n_shared = 0
+        self.saved_bytes = 0
+
+    def intern(self, frame: Frame, digest: bytes | None = None) -> Frame:
+        if digest is None:
+            digest = hash_image(frame.image)
+
+        if (shared := self.frames.get(digest)) is None:
+            self.frames[digest] = frame
+            return frame
+
+        self.n_shared += 1
+        self.saved_bytes += frame.get_bytes()
+
+        # same pixels, same content token, so the photo cache holds one PhotoImage for the run
+        return Frame(shared.image, shared.source, shared.index, frame.duration, shared.box, shared.transforms, frame.name, shared.content, frame.origin)
+
+    def clear(self) -> None:
+        self.frames.clear()
+        self.n_shared = 0
+        self.saved_bytes = 0
+
+
+def merge_runs(frames: Iterable[tuple[object, Image.Image, int]], max_duration: int = MAX_DURATION) -> Iterator[tuple[Image.Image, int]]:
+    run_key: object = None
+    run_image: Image.Image | None = None
+    run_digest: bytes | None = None
+    run_duration = 0
+
+    for key, image, duration in frames:
+        digest = None
+
+        if run_image is not None and run_duration + duration <= max_duration:
+            same = key is run_key
+
+            # frames that were not deduplicated on load are compared by their pixels
+            if not same:
+                run_digest = run_digest or hash_image(run_image)
+                digest = hash_image(image)
+                same = digest == run_digest
+
+            if same:
+                run_key = key
+                run_duration += duration
+                continue
+
+        if run_image is not None:
+            yield run_image, run_duration
+
+        run_key, run_image, run_digest, run_duration = key, image, digest, duration
+
+    if run_image is not None:
+        yield run_image, run_duration
\ No newline at end of file
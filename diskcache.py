@@ -0,0 +1,162 @@
+from pathlib import Path
+from hashlib import blake2b
+from mmap import mmap, ACCESS_READ
+from typing import BinaryIO, Iterable
+import json
+import os
+
+from PIL import Image
+
+CACHE_DIR = Path.home() / ".cache" / "tk-gif-player" / "frames"
+
+
+def hash_file(path: Path, chunk_size: int = 1024 ** 2) -> str:
+    digest = blake2b(digest_size=16)
+
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+
+    return f"{digest.hexdigest()}_{path.stat().st_size}"
+
+
+class CachedSource():
+
+    path: Path
+    size: tuple[int, int]
+    n_frames: int
+    durations: list[int | None]
+    boxes: list[tuple[int, int, int, int] | None]
+    frame_bytes: int
+    file: BinaryIO
+    data: mmap
+
+    def __init__(self, path: Path, data_path: Path, meta: dict) -> None:
+        self.path = path
+        self.size = tuple(meta["size"])
+        self.n_frames = meta["n_frames"]
+        self.durations = meta["durations"]
+        self.boxes = [tuple(box) if box else None for box in meta["boxes"]]
+        self.frame_bytes = self.size[0] * self.size[1] * 4
+
+        self.file = open(data_path, "rb")
+        self.data = mmap(self.file.fileno(), 0, access=ACCESS_READ)
+
+    def get_duration(self, index: int) -> int | None:
+        return self.durations[index]
+
+    def get_box(self, index: int) -> tuple[int, int, int, int] | None:
+        return self.boxes[index]
+
+    def get(self, index: int) -> Image.Image:
+        offset = index * self.frame_bytes
+
+        # the image shares memory with the mapping, nothing is copied or decoded
+        return Image.frombuffer("RGBA", self.size, memoryview(self.data)[offset:offset + self.frame_bytes], "raw", "RGBA", 0, 1)
+
+    def close(self) -> None:
+        try:
+            self.data.close()
+
+        except BufferError:
+            # frames still in use keep the mapping alive until they are collected
+            pass
+
+        self.file.close()
+
+
+class DecodedCache():
+
+    directory: Path
+    max_bytes: int
+
+    def __init__(self, directory: Path = CACHE_DIR, max_bytes: int = 2 * 1024 ** 3) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def get_paths(self, key: str) -> tuple[Path, Path]:
+        return self.directory / f"{key}.rgba", self.directory / f"{key}.json"
+
+    def lookup(self, path: Path, key: str | None = None) -> CachedSource | None:
+        data_path, meta_path = self.get_paths(key or hash_file(path))
+
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            source = CachedSource(path, data_path, meta)
+
+        except (OSError, ValueError, KeyError):
+            return None
+
+        if len(source.data) != source.n_frames * source.frame_bytes:
+            source.close()
+            return None
+
+        os.utime(meta_path)
+
+        return source
+
+    def store(self, key: str, size: tuple[int, int], images: Iterable[Image.Image], durations: list[int | None], boxes: list[tuple[int, int, int, int] | None]) -> bool:
+        n_bytes = len(durations) * size[0] * size[1] * 4
+
+        if n_bytes > self.max_bytes:
+            return False
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.evict(self.max_bytes - n_bytes)
+
+        data_path, meta_path = self.get_paths(key)
+        tmp = data_path.with_suffix(".tmp")
+
+        with open(tmp, "wb") as f:
+            for image in images:
+                f.write(image.convert("RGBA").tobytes())
+
+        tmp.replace(data_path)
+
+        meta = {"size": list(size), "n_frames": len(durations), "durations": durations, "boxes": boxes}
+        meta_path.write_text(json.dumps(meta), encoding="utf-8")
+
+        return True
+
+    def get_entries(self) -> list[tuple[float, int, str]]:
+        entries: list[tuple[float, int, str]] = []
+
+        if not self.directory.exists():
+            return entries
+
+        for meta_path in self.directory.glob("*.json"):
+            data_path = meta_path.with_suffix(".rgba")
+
+            try:
+                entries.append((meta_path.stat().st_mtime, meta_path.stat().st_size + data_path.stat().st_size, meta_path.stem))
+
+            except OSError:
+                continue
+
+        return sorted(entries)
+
+    def evict(self, max_bytes: int) -> None:
+        entries = self.get_entries()
+        total = sum(n_bytes for _, n_bytes, _ in entries)
+
+        for _, n_bytes, key in entries:
+            if total <= max_bytes:
+                break
+
+            if self.remove(key):
+                total -= n_bytes
+
+    def remove(self, key: str) -> bool:
+        try:
+            for path in self.get_paths(key):
+                path.unlink(missing_ok=True)
+
+        except OSError:
+            # still mapped by an open document on Windows
+            return False
+
+        return True
+
+    def clear(self) -> None:
+        for _, _, key in self.get_entries():
+            self.remove(key)
\ No newline at end of file
@@ -0,0 +1,331 @@
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Any, TYPE_CHECKING
+
+from lru import LRUCache
+
+# the list is built before any file is open, so PIL is only loaded once there are frames to show
+if TYPE_CHECKING:
+    from PIL import Image, ImageTk
+    from frames import Frame
+
+
+def make_thumbnail(frame: "Frame", size: tuple[int, int]) -> "Image.Image":
+    from PIL import Image
+
+    image = frame.get_image().copy()
+
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA")
+
+    image.thumbnail(size, Image.Resampling.BILINEAR)
+
+    return image
+
+
+class FrameList(tk.Canvas):
+
+    names: list[str]
+    selection: set[int]
+    anchor: int
+    active: int
+    top: int
+    row_height: int
+    thumb_size: tuple[int, int]
+    rows: list[tuple[int, int, int]]
+
+    get_frame: Callable[[int], "Frame | None"] | None
+    yscrollcommand: Callable[[float, float], Any] | None
+
+    thumbs: LRUCache[object, "ImageTk.PhotoImage"]
+    pending: dict[object, Future]
+    executor: ThreadPoolExecutor
+    redraw_id: str | None
+    poll_id: str | None
+
+    def __init__(self, master: tk.Misc, thumb_size: tuple[int, int] = (64, 48), max_thumbs: int = 1024, **kw) -> None:
+        super().__init__(master, bg="white", highlightthickness=1, takefocus=True, **kw)
+
+        self.names = []
+        self.selection = set()
+        self.anchor = 0
+        self.active = 0
+        self.top = 0
+        self.thumb_size = thumb_size
+        self.row_height = thumb_size[1] + 4
+        self.rows = []
+
+        self.get_frame = None
+        self.yscrollcommand = None
+
+        self.thumbs = LRUCache(max_items=max_thumbs)
+        self.pending = {}
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="thumbnail")
+        self.redraw_id = None
+        self.poll_id = None
+
+        self.bind("<Configure>", lambda event: self.redraw())
+        self.bind("<ButtonPress-1>", self.event_click)
+        self.bind("<KeyPress>", self.event_key)
+        self.bind("<MouseWheel>", lambda event: self.yview("scroll", -1 if event.delta > 0 else 1, "units"))
+        self.bind("<Button-4>", lambda event: self.yview("scroll", -1, "units"))
+        self.bind("<Button-5>", lambda event: self.yview("scroll", 1, "units"))
+        self.bind("<Destroy>", lambda event: self.executor.shutdown(wait=False, cancel_futures=True))
+
+    def configure(self, cnf: dict[str, Any] | None = None, **kw) -> Any:
+        if "yscrollcommand" in kw:
+            self.yscrollcommand = kw.pop("yscrollcommand")
+
+        return super().configure(cnf, **kw)
+
+    config = configure
+
+    def bind_frame_func(self, func: Callable[[int], "Frame | None"]) -> None:
+        self.get_frame = func
+
+    def to_index(self, index: int | str) -> int:
+        if index == tk.END:
+            return len(self.names)
+
+        return int(index)
+
+    def size(self) -> int:
+        return len(self.names)
+
+    def get(self, first: int | str, last: int | str | None = None) -> str | tuple[str, ...]:
+        if last is None:
+            return self.names[self.to_index(first)]
+
+        return tuple(self.names[self.to_index(first):self.to_index(last) + 1])
+
+    def insert(self, index: int | str, *elements: str) -> None:
+        index = self.to_index(index)
+
+        if index < len(self.names):
+            self.selection = {i + len(elements) if i >= index else i for i in self.selection}
+
+        self.names[index:index] = elements
+
+        self.request_redraw()
+
+    def delete(self, first: int | str, last: int | str | None = None) -> None:
+        first = self.to_index(first)
+        last = first if last is None else min(self.to_index(last), len(self.names) - 1)
+
+        if last < first:
+            return
+
+        n = last - first + 1
+
+        del self.names[first:last + 1]
+        self.selection = {i - n if i > last else i for i in self.selection if not first <= i <= last}
+
+        self.request_redraw()
+
+    def curselection(self) -> tuple[int, ...]:
+        return tuple(sorted(self.selection))
+
+    def selection_clear(self, first: int | str, last: int | str | None = None) -> None:
+        first = self.to_index(first)
+        last = first if last is None else self.to_index(last)
+
+        self.selection = {i for i in self.selection if not first <= i <= last}
+
+        self.request_redraw()
+
+    def selection_set(self, first: int | str, last: int | str | None = None) -> None:
+        first = self.to_index(first)
+        last = first if last is None else min(self.to_index(last), len(self.names) - 1)
+
+        self.selection.update(i for i in range(first, last + 1) if 0 <= i < len(self.names))
+
+        if self.selection:
+            self.anchor = self.active = min(self.selection)
+
+        self.request_redraw()
+
+    def see(self, index: int | str) -> None:
+        y = self.to_index(index) * self.row_height
+        height = self.winfo_height()
+
+        if y < self.top:
+            self.set_top(y)
+
+        elif y + self.row_height > self.top + height:
+            self.set_top(y + self.row_height - height)
+
+    def yview(self, *args: Any) -> tuple[float, float] | None:
+        total = max(len(self.names) * self.row_height, 1)
+        height = self.winfo_height()
+
+        if not args:
+            return self.top / total, min((self.top + height) / total, 1.0)
+
+        if args[0] == "moveto":
+            self.set_top(round(float(args[1]) * total))
+
+        elif args[0] == "scroll":
+            step = self.row_height if args[2] == "units" else max(height - self.row_height, self.row_height)
+            self.set_top(self.top + int(args[1]) * step)
+
+        return None
+
+    def set_top(self, top: int) -> None:
+        total = len(self.names) * self.row_height
+
+        self.top = min(max(top, 0), max(total - self.winfo_height(), 0))
+
+        self.request_redraw()
+
+    def request_redraw(self) -> None:
+        if self.redraw_id is None:
+            self.redraw_id = self.after_idle(self.redraw)
+
+    def get_visible_range(self) -> range:
+        first = self.top // self.row_height
+        count = self.winfo_height() // self.row_height + 2
+
+        return range(first, min(first + count, len(self.names)))
+
+    def redraw(self) -> None:
+        if self.redraw_id is not None:
+            self.after_cancel(self.redraw_id)
+            self.redraw_id = None
+
+        # keep the scroll position valid after deletes and resizes
+        self.top = min(self.top, max(len(self.names) * self.row_height - self.winfo_height(), 0))
+
+        visible = self.get_visible_range()
+        width = self.winfo_width()
+        tw, th = self.thumb_size
+
+        while len(self.rows) < len(visible):
+            self.rows.append((
+                self.create_rectangle(0, 0, 0, 0, width=0),
+                self.create_image(0, 0, anchor=tk.NW),
+                self.create_text(0, 0, anchor=tk.W),
+            ))
+
+        for slot, (rect, image, text) in enumerate(self.rows):
+            if slot >= len(visible):
+                for item in (rect, image, text):
+                    self.itemconfigure(item, state=tk.HIDDEN)
+
+                continue
+
+            index = visible[slot]
+            y = index * self.row_height - self.top
+            selected = index in self.selection
+
+            self.coords(rect, 0, y, width, y + self.row_height)
+            self.itemconfigure(rect, state=tk.NORMAL, fill="#3875d7" if selected else "white")
+
+            self.coords(image, 2, y + 2)
+            self.itemconfigure(image, state=tk.NORMAL, image=self.get_thumbnail(index) or "")
+
+            self.coords(text, tw + 8, y + self.row_height / 2)
+            self.itemconfigure(text, state=tk.NORMAL, text=self.names[index], fill="white" if selected else "black")
+
+        self.request_thumbnails(visible)
+
+        if self.yscrollcommand is not None:
+            self.yscrollcommand(*self.yview())
+
+    def get_thumbnail(self, index: int) -> "ImageTk.PhotoImage | None":
+        if self.get_frame is None or (frame := self.get_frame(index)) is None:
+            return None
+
+        return self.thumbs.get(frame.content)
+
+    def request_thumbnails(self, visible: range) -> None:
+        if self.get_frame is None:
+            return
+
+        wanted: set[object] = set()
+
+        for index in visible:
+            if (frame := self.get_frame(index)) is None or frame.content in self.thumbs:
+                continue
+
+            wanted.add(frame.content)
+
+            if frame.content not in self.pending:
+                self.pending[frame.content] = self.executor.submit(make_thumbnail, frame, self.thumb_size)
+
+        # rows that scrolled away are not worth decoding any more
+        for content in [content for content in self.pending if content not in wanted]:
+            if self.pending[content].cancel():
+                del self.pending[content]
+
+        if self.pending and self.poll_id is None:
+            self.poll_id = self.after(50, self.poll_thumbnails)
+
+    def poll_thumbnails(self) -> None:
+        from PIL import ImageTk
+
+        self.poll_id = None
+
+        done = [content for content, future in self.pending.items() if future.done()]
+
+        for content in done:
+            future = self.pending.pop(content)
+
+            if not future.cancelled() and future.exception() is None:
+                self.thumbs.put(content, ImageTk.PhotoImage(image=future.result()), 1)
+
+        if done:
+            self.redraw()
+
+        elif self.pending:
+            self.poll_id = self.after(50, self.poll_thumbnails)
+
+    def event_click(self, event: tk.Event) -> None:
+        self.focus_set()
+
+        index = (self.top + event.y) // self.row_height
+
+        if index >= len(self.names):
+            return
+
+        if event.state & 0x0001:
+            low, high = sorted((self.anchor, index))
+            self.selection = set(range(low, high + 1))
+
+        elif event.state & 0x0004:
+            self.selection ^= {index}
+            self.anchor = index
+
+        else:
+            self.selection = {index}
+            self.anchor = index
+
+        self.active = index
+        self.redraw()
+        self.event_generate("<<ListboxSelect>>")
+
+    def event_key(self, event: tk.Event) -> None:
+        if event.keysym not in ("Up", "Down", "Prior", "Next", "Home", "End") or not self.names:
+            return
+
+        current = self.active
+        page = max(self.winfo_height() // self.row_height - 1, 1)
+
+        index = {
+            "Up": current - 1, "Down": current + 1,
+            "Prior": current - page, "Next": current + page,
+            "Home": 0, "End": len(self.names) - 1,
+        }[event.keysym]
+        index = min(max(index, 0), len(self.names) - 1)
+
+        if event.state & 0x0001:
+            low, high = sorted((self.anchor, index))
+            self.selection = set(range(low, high + 1))
+
+        else:
+            self.selection = {index}
+            self.anchor = index
+
+        self.active = index
+        self.see(index)
+        self.redraw()
+        self.event_generate("<<ListboxSelect>>")
\ No newline at end of file
@@ -0,0 +1,347 @@
+from pathlib import Path
+from collections import OrderedDict
+from typing import NamedTuple, Callable, BinaryIO, TYPE_CHECKING
+from mmap import mmap, ACCESS_READ
+from threading import Lock
+from io import BytesIO
+from math import ceil
+from PIL import Image
+
+if TYPE_CHECKING:
+    from diskcache import CachedSource
+    from spill import SpillStore
+
+
+class FrameInfo(NamedTuple):
+    start: int
+    end: int
+    box: tuple[int, int, int, int]
+    duration: int
+    disposal: int
+    transparency: int | None
+    descriptor: int
+
+
+def scan_gif(path: Path) -> tuple[tuple[int, int], list[FrameInfo]]:
+    with open(path, "rb") as f, mmap(f.fileno(), 0, access=ACCESS_READ) as data:
+        if data[:3] != b"GIF" or len(data) < 13:
+            raise ValueError(f"{path} is not a GIF file.")
+
+        size = int.from_bytes(data[6:8], "little"), int.from_bytes(data[8:10], "little")
+        flags = data[10]
+        pos = 13
+
+        if flags & 0x80:
+            pos += 3 * 2 ** ((flags & 7) + 1)
+
+        infos: list[FrameInfo] = []
+        start = None
+        duration, disposal, transparency = 0, 0, None
+        length = len(data)
+
+        while pos < length:
+            block = data[pos]
+
+            # a file cut short ends at the last frame it holds whole, as PIL and browsers show it
+            if block == 0x21:
+                if pos + 2 > length:
+                    break
+
+                label = data[pos + 1]
+
+                if label == 0xF9:
+                    if pos + 8 > length:
+                        break
+
+                    start = pos
+                    packed = data[pos + 3]
+                    duration = int.from_bytes(data[pos + 4:pos + 6], "little") * 10
+                    disposal = (packed >> 2) & 7
+                    transparency = data[pos + 6] if packed & 1 else None
+
+                if (pos := _skip_sub_blocks(data, pos + 2)) is None:
+                    break
+
+            elif block == 0x2C:
+                if pos + 10 > length:
+                    break
+
+                if start is None:
+                    start = pos
+
+                descriptor = pos
+
+                x, y, w, h = (int.from_bytes(data[pos + i:pos + i + 2], "little") for i in (1, 3, 5, 7))
+                packed = data[pos + 9]
+                pos += 10
+
+                if packed & 0x80:
+                    pos += 3 * 2 ** ((packed & 7) + 1)
+
+                if (pos := _skip_sub_blocks(data, pos + 1)) is None:
+                    break
+
+                infos.append(FrameInfo(start, pos, (x, y, x + w, y + h), duration, disposal, transparency, descriptor))
+
+                start = None
+                duration, disposal, transparency = 0, 0, None
+
+            else:
+                break
+
+    return size, infos
+
+
+def count_frames(image: Image.Image, path: Path) -> int:
+    if image.format == "GIF":
+        return len(scan_gif(path)[1])
+
+    return getattr(image, "n_frames", 1)
+
+
+def _skip_sub_blocks(data: mmap, pos: int) -> int | None:
+    length = len(data)
+
+    while pos < length and (size := data[pos]) != 0:
+        pos += size + 1
+
+    return pos + 1 if pos < length else None
+
+
+class SeekIndex():
+
+    file: BinaryIO
+    data: mmap
+    size: tuple[int, int]
+    infos: list[FrameInfo]
+    header: bytes
+    background: tuple[int, int, int, int]
+    interval: int
+    checkpoints: dict[int, tuple[Image.Image, Image.Image | None]]
+    cursor: tuple[int, Image.Image, Image.Image | None] | None
+
+    def __init__(self, path: Path, interval: int = 16, max_bytes: int | None = 256 * 1024 ** 2) -> None:
+        self.size, self.infos = scan_gif(path)
+
+        self.file = open(path, "rb")
+        self.data = mmap(self.file.fileno(), 0, access=ACCESS_READ)
+
+        flags = self.data[10]
+        table_end = 13 + (3 * 2 ** ((flags & 7) + 1) if flags & 0x80 else 0)
+        self.header = bytes(self.data[:table_end])
+
+        if flags & 0x80:
+            i = 13 + 3 * self.data[11]
+            self.background = tuple(self.header[i:i + 3]) + (255,)
+
+        else:
+            self.background = (0, 0, 0, 255)
+
+        # fewer checkpoints for big animations so that they stay within max_bytes
+        if max_bytes is not None:
+            interval = max(interval, ceil(len(self.infos) * self.size[0] * self.size[1] * 4 / max_bytes))
+
+        self.interval = interval
+        self.checkpoints = {}
+        self.cursor = None
+
+        self.build()
+
+    def build(self) -> None:
+        canvas = Image.new("RGBA", self.size)
+        restore = None
+
+        for i in range(len(self.infos)):
+            restore = self.step(i, canvas, restore)
+
+            if i % self.interval == 0:
+                self.checkpoints[i] = (canvas.copy(), restore)
+
+        self.cursor = (len(self.infos) - 1, canvas, restore) if self.infos else None
+
+    def decode_patch(self, index: int) -> Image.Image:
+        info = self.infos[index]
+        x0, y0, x1, y1 = info.box
+
+        # a one frame GIF of just this frame's box, so only its own pixels are decoded
+        header = bytearray(self.header)
+        header[6:10] = (x1 - x0).to_bytes(2, "little") + (y1 - y0).to_bytes(2, "little")
+
+        body = bytearray(self.data[info.start:info.end])
+        offset = info.descriptor - info.start
+        body[offset + 1:offset + 5] = bytes(4)
+
+        with Image.open(BytesIO(bytes(header) + bytes(body) + b";")) as image:
+            return image.convert("RGBA")
+
+    def step(self, index: int, canvas: Image.Image, restore: Image.Image | None) -> Image.Image | None:
+        if index > 0:
+            before = self.infos[index - 1]
+
+            if before.disposal == 2:
+                canvas.paste((0, 0, 0, 0) if before.transparency is not None else self.background, before.box)
+
+            elif before.disposal == 3 and restore is not None:
+                canvas.paste(restore, before.box[:2])
+
+        info = self.infos[index]
+        restore = canvas.crop(info.box) if info.disposal == 3 else None
+
+        patch = self.decode_patch(index)
+        canvas.paste(patch, info.box[:2], patch)
+
+        return restore
+
+    def get(self, index: int) -> Image.Image:
+        start = index - index % self.interval
+
+        if self.cursor is not None and start <= self.cursor[0] <= index:
+            current, canvas, restore = self.cursor
+
+        else:
+            current, (canvas, restore) = start, self.checkpoints[start]
+            canvas = canvas.copy()
+
+        for i in range(current + 1, index + 1):
+            restore = self.step(i, canvas, restore)
+
+        self.cursor = (index, canvas, restore)
+
+        return canvas.copy()
+
+    def close(self) -> None:
+        self.checkpoints.clear()
+        self.cursor = None
+        self.data.close()
+        self.file.close()
+
+
+class Frame():
+
+    image: Image.Image | None
+    source: "FrameSource | CachedSource | SpillStore | None"
+    index: int
+    duration: int | None
+    box: tuple[int, int, int, int] | None
+    transforms: tuple[Callable[[Image.Image], Image.Image], ...]
+    name: str | None
+    content: object
+    origin: int | None
+
+    def __init__(self, image: Image.Image | None = None, source: "FrameSource | CachedSource | SpillStore | None" = None, index: int = 0, duration: int | None = None, box: tuple[int, int, int, int] | None = None, transforms: tuple[Callable[[Image.Image], Image.Image], ...] = (), name: str | None = None, content: object | None = None, origin: int | None = None) -> None:
+        if image is None and source is None:
+            raise ValueError("Frame needs an image or a source.")
+
+        self.image = image
+        self.source = source
+        self.index = index
+        self.duration = duration
+        self.box = box
+        self.transforms = transforms
+        self.name = name
+
+        # frames that only differ in timing share this token, and with it their cached photos
+        self.content = content if content is not None else object()
+
+        # position in the loaded GIF while the pixels are untouched, so a save can copy the encoded bytes
+        self.origin = origin
+
+    def get_image(self) -> Image.Image:
+        if self.image is not None:
+            image = self.image
+
+        else:
+            image = self.source.get(self.index)
+
+        for transform in self.transforms:
+            image = transform(image)
+
+        return image
+
+    def get_bytes(self) -> int:
+        if self.image is None:
+            return 0
+
+        return self.image.width * self.image.height * len(self.image.getbands())
+
+    def spill(self, store: "SpillStore", key: int) -> None:
+        self.source = store
+        self.index = key
+        self.image = None
+
+    def with_duration(self, duration: int | None) -> "Frame":
+        return Frame(self.image, self.source, self.index, duration, self.box, self.transforms, self.name, self.content, self.origin)
+
+    def with_transform(self, transform: Callable[[Image.Image], Image.Image]) -> "Frame":
+        return Frame(self.image, self.source, self.index, self.duration, None, self.transforms + (transform,), self.name)
+
+
+class FrameSource():
+
+    path: Path
+    image: Image.Image
+    size: tuple[int, int]
+    n_frames: int
+    infos: list[FrameInfo] | None
+    seek_index: SeekIndex | None
+    cache: OrderedDict[int, Image.Image]
+    cache_size: int
+    lock: Lock
+
+    def __init__(self, path: Path, cache_size: int = 8, checkpoint_interval: int = 16) -> None:
+        self.path = path
+        self.image = Image.open(path)
+        self.size = self.image.size
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.lock = Lock()
+
+        if self.image.format == "GIF":
+            self.seek_index = SeekIndex(path, checkpoint_interval)
+            self.infos = self.seek_index.infos
+            self.n_frames = len(self.infos)
+
+        else:
+            self.seek_index = None
+            self.infos = None
+            self.n_frames = getattr(self.image, "n_frames", 1)
+
+    def get_duration(self, index: int) -> int | None:
+        if self.infos is None:
+            return None
+
+        return self.infos[index].duration
+
+    def get_box(self, index: int) -> tuple[int, int, int, int] | None:
+        if self.infos is None:
+            return None
+
+        return self.infos[index].box
+
+    def get(self, index: int) -> Image.Image:
+        with self.lock:
+            if index in self.cache:
+                self.cache.move_to_end(index)
+                return self.cache[index]
+
+            if self.seek_index is not None:
+                image = self.seek_index.get(index)
+
+            else:
+                self.image.seek(index)
+                image = self.image.crop()
+
+            self.cache[index] = image
+
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+            return image
+
+    def close(self) -> None:
+        with self.lock:
+            self.cache.clear()
+            self.image.close()
+
+            if self.seek_index is not None:
+                self.seek_index.close()
\ No newline at end of file
@@ -0,0 +1,204 @@
+from typing import BinaryIO, Callable, Iterable
+from math import ceil, sqrt
+from PIL import Image, ImageChops, GifImagePlugin
+
+
+class Palette():
+
+    image: Image.Image
+    n_colors: int
+    transparency: int
+    colors: bytes
+    table: bytes
+
+    def __init__(self, colors: bytes) -> None:
+        self.n_colors = len(colors) // 3
+        self.transparency = self.n_colors
+
+        # unused entries repeat colour 0, so quantize never needs them
+        colors = colors + colors[:3] * (256 - self.n_colors)
+
+        self.image = Image.new("P", (1, 1))
+        self.image.putpalette(colors)
+
+        self.colors = colors
+        self.table = bytes(range(self.n_colors)) + bytes(256 - self.n_colors)
+
+    def quantize(self, image: Image.Image) -> Image.Image:
+        indexed = image.convert("RGB").quantize(palette=self.image, dither=Image.Dither.NONE)
+
+        return Image.frombytes("P", indexed.size, indexed.tobytes().translate(self.table))
+
+
+def build_palette(images: Iterable[Image.Image], n_images: int, colors: int = 255, thumb_size: int = 64) -> Palette:
+    cols = ceil(sqrt(n_images))
+    rows = ceil(n_images / cols)
+
+    montage = Image.new("RGB", (cols * thumb_size, rows * thumb_size))
+
+    for i, image in enumerate(images):
+        thumb = normalize(image).convert("RGB").resize((thumb_size, thumb_size), Image.Resampling.NEAREST)
+
+        montage.paste(thumb, ((i % cols) * thumb_size, (i // cols) * thumb_size))
+
+    quantized = montage.quantize(min(colors, 255), method=Image.Quantize.MEDIANCUT, dither=Image.Dither.NONE)
+
+    return Palette(bytes(quantized.getpalette()))
+
+
+def sample_palette(get_image: Callable[[int], Image.Image], n_frames: int, n_samples: int = 64, colors: int = 255) -> Palette:
+    step = max(1, n_frames // n_samples)
+    indices = range(0, n_frames, step)
+
+    return build_palette((get_image(i) for i in indices), len(indices), colors)
+
+
+def normalize(image: Image.Image) -> Image.Image:
+    image = image.convert("RGBA")
+    alpha = image.getchannel("A")
+
+    if alpha.getextrema() == (255, 255):
+        return image
+
+    alpha = alpha.point(lambda v: 255 if v >= 128 else 0)
+
+    normalized = Image.new("RGBA", image.size)
+    normalized.paste(image, mask=alpha)
+    normalized.putalpha(alpha)
+
+    return normalized
+
+
+def needs_clear(before: Image.Image, after: Image.Image) -> bool:
+    if after.getchannel("A").getextrema()[0] == 255:
+        return False
+
+    return ImageChops.subtract(before.getchannel("A"), after.getchannel("A")).getbbox() is not None
+
+
+def encode_frame(image: Image.Image, before: Image.Image | None, palette: Palette, duration: int, disposal: int, full: bool = False, local: bool = False) -> bytes:
+    if before is None:
+        box = image.getchannel("A").getbbox()
+        unchanged = ImageChops.invert(image.getchannel("A"))
+
+    else:
+        diff = ImageChops.difference(image, before)
+        box = diff.getbbox(alpha_only=False)
+
+        r, g, b, a = diff.split()
+        unchanged = ImageChops.lighter(ImageChops.lighter(r, g), ImageChops.lighter(b, a)).point(lambda v: 255 if v == 0 else 0)
+
+    if full:
+        box = (0, 0) + image.size
+
+    elif box is None:
+        box = (0, 0, 1, 1)
+
+    indexed = palette.quantize(image.crop(box))
+    indexed.paste(palette.transparency, mask=unchanged.crop(box))
+
+    if local:
+        indexed.putpalette(palette.colors)
+
+    data = GifImagePlugin.getdata(indexed, offset=box[:2], duration=duration, disposal=disposal, transparency=palette.transparency, include_color_table=local)
+
+    return b"".join(data)
+
+
+def encode_header(size: tuple[int, int], palette: Palette, loop: int | None = 0, comment: str | None = None) -> bytes:
+    header = b"GIF89a" + size[0].to_bytes(2, "little") + size[1].to_bytes(2, "little")
+    header += bytes((0xF7, palette.transparency, 0)) + palette.colors
+
+    return header + encode_extensions(loop, comment)
+
+
+def encode_extensions(loop: int | None = 0, comment: str | None = None) -> bytes:
+    header = b""
+
+    if loop is not None:
+        header += b"!\xff\x0bNETSCAPE2.0\x03\x01" + loop.to_bytes(2, "little") + b"\x00"
+
+    if comment:
+        data = comment.encode("utf-8")
+
+        header += b"!\xfe" + b"".join(bytes((len(data[i:i + 255]),)) + data[i:i + 255] for i in range(0, len(data), 255)) + b"\x00"
+
+    return header
+
+
+class GifEncoder():
+
+    fp: BinaryIO
+    size: tuple[int, int]
+    palette: Palette
+    before: Image.Image | None
+    pending: tuple[Image.Image, int] | None
+    n_frames: int
+
+    def __init__(self, fp: BinaryIO, size: tuple[int, int], palette: Palette, loop: int | None = 0, comment: str | None = None, header: bool = True) -> None:
+        self.fp = fp
+        self.size = size
+        self.palette = palette
+        self.before = None
+        self.pending = None
+        self.n_frames = 0
+
+        if header:
+            self.fp.write(encode_header(size, palette, loop, comment))
+
+    def prepare(self, image: Image.Image) -> Image.Image:
+        image = normalize(image)
+
+        if image.size != self.size:
+            canvas = Image.new("RGBA", self.size)
+            canvas.paste(image, (0, 0))
+            image = canvas
+
+        return image
+
+    def resume(self, before: Image.Image, following: Image.Image) -> None:
+        # continues a stream another encoder has written up to "before", as if it had been written here
+        before = self.prepare(before)
+
+        self.before = None if needs_clear(before, self.prepare(following)) else before
+        self.n_frames = 1
+
+    def add_frame(self, image: Image.Image, duration: int) -> None:
+        image = self.prepare(image)
+
+        if self.pending is not None:
+            pending, pending_duration = self.pending
+
+            # a pixel can only turn transparent again if the previous frame clears the whole canvas
+            if needs_clear(pending, image):
+                self.write_frame(pending, pending_duration, disposal=2, full=True)
+                self.before = None
+
+            else:
+                self.write_frame(pending, pending_duration, disposal=1)
+                self.before = pending
+
+        self.pending = (image, duration)
+
+    def write_frame(self, image: Image.Image, duration: int, disposal: int, full: bool = False) -> None:
+        full = full or self.n_frames == 0
+
+        self.fp.write(encode_frame(image, self.before, self.palette, duration, disposal, full))
+        self.n_frames += 1
+
+    def flush(self, following: Image.Image | None = None) -> None:
+        if following is not None:
+            # the frame after decides how the last one is disposed of, it is written by someone else
+            self.add_frame(following, 0)
+
+        elif self.pending is not None:
+            image, duration = self.pending
+
+            self.write_frame(image, duration, disposal=1)
+
+        self.pending = None
+
+    def close(self) -> None:
+        self.flush()
+
+        self.fp.write(b";")
\ No newline at end of file
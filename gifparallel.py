@@ -0,0 +1,73 @@
+from pathlib import Path
+from collections import deque
+from concurrent.futures import Executor, Future
+from typing import Iterable
+from io import BytesIO
+import os
+
+from PIL import Image
+
+from gifencoder import GifEncoder, Palette, encode_header
+
+
+def encode_chunk(size: tuple[int, int], palette: Palette, frames: list[tuple[Image.Image, int]], before: Image.Image | None, following: Image.Image | None) -> bytes:
+    fp = BytesIO()
+    encoder = GifEncoder(fp, size, palette, header=False)
+
+    # the frames on either side of the chunk fix its disposals and deltas, so the bytes match one encoder
+    if before is not None:
+        encoder.resume(before, frames[0][0])
+
+    for image, duration in frames:
+        encoder.add_frame(image, duration)
+
+    encoder.flush(following)
+
+    return fp.getvalue()
+
+
+def save_parallel(path: Path, frames: Iterable[tuple[Image.Image, int]], size: tuple[int, int], palette: Palette, executor: Executor, loop: int | None = 0, comment: str | None = None, chunk_size: int = 16, max_pending: int | None = None) -> int:
+    if max_pending is None:
+        max_pending = 2 * (os.cpu_count() or 1)
+
+    pending: deque[Future] = deque()
+    chunk: list[tuple[Image.Image, int]] = []
+    before: Image.Image | None = None
+    written = 0
+
+    # written beside the target first, the source may be the very file being replaced
+    tmp = path.with_name(path.name + ".tmp")
+
+    try:
+        with open(tmp, "wb") as fp:
+            fp.write(encode_header(size, palette, loop, comment))
+
+            for image, duration in frames:
+                if len(chunk) == chunk_size:
+                    pending.append(executor.submit(encode_chunk, size, palette, chunk, before, image))
+                    before, chunk = chunk[-1][0], []
+
+                    # blocks are written in order, and only a few chunks of frames are held at a time
+                    while len(pending) >= max_pending:
+                        fp.write(pending.popleft().result())
+
+                chunk.append((image, duration))
+                written += 1
+
+            if chunk:
+                pending.append(executor.submit(encode_chunk, size, palette, chunk, before, None))
+
+            while pending:
+                fp.write(pending.popleft().result())
+
+            fp.write(b";")
+
+        tmp.replace(path)
+
+    finally:
+        for future in pending:
+            future.cancel()
+
+        tmp.unlink(missing_ok=True)
+
+    return written
\ No newline at end of file
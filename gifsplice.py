@@ -0,0 +1,228 @@
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterable, NamedTuple
+from PIL import Image
+
+from frames import FrameInfo, scan_gif
+from gifencoder import Palette, normalize, needs_clear, encode_frame, encode_extensions
+
+
+class ExactPalette(Palette):
+
+    lookup: dict[bytes, int]
+
+    def __init__(self, colors: bytes) -> None:
+        super().__init__(colors)
+
+        self.lookup = {colors[i * 3:i * 3 + 3]: i for i in range(self.n_colors)}
+
+    def quantize(self, image: Image.Image) -> Image.Image:
+        # mapping onto a fixed palette goes through a bucketed colour cache, a median cut of
+        # an image that has fewer colours than it asks for keeps every one of them
+        indexed = image.convert("RGB").quantize(256, method=Image.Quantize.MEDIANCUT, dither=Image.Dither.NONE)
+        colors = bytes(indexed.getpalette())
+
+        table = bytes(self.lookup.get(colors[i:i + 3], 0) for i in range(0, len(colors), 3))
+
+        return Image.frombytes("P", indexed.size, indexed.tobytes().translate(table.ljust(256, b"\0")))
+
+
+def get_palette(image: Image.Image) -> tuple[Palette, bool]:
+    rgb = image.convert("RGB")
+
+    # a frame with few colours gets all of them, so it is written without any loss
+    if (colors := rgb.getcolors(255)) is not None:
+        return ExactPalette(b"".join(bytes(color) for _, color in colors)), True
+
+    quantized = rgb.quantize(255, method=Image.Quantize.MEDIANCUT, dither=Image.Dither.NONE)
+
+    return Palette(bytes(quantized.getpalette()[:255 * 3])), False
+
+
+class GifOrigin():
+
+    path: Path
+    stamp: tuple[int, int]
+    size: tuple[int, int]
+    header: bytes
+    infos: list[FrameInfo]
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.size, self.infos = scan_gif(path)
+        self.stamp = self.get_stamp()
+
+        with open(path, "rb") as f:
+            screen = f.read(13)[6:]
+            table = 3 * 2 ** ((screen[4] & 7) + 1) if screen[4] & 0x80 else 0
+
+            self.header = b"GIF89a" + screen + f.read(table)
+
+    def get_stamp(self) -> tuple[int, int]:
+        stat = self.path.stat()
+
+        return stat.st_mtime_ns, stat.st_size
+
+    def is_copyable(self, size: tuple[int, int]) -> bool:
+        try:
+            if self.get_stamp() != self.stamp:
+                return False
+
+        except OSError:
+            return False
+
+        # with "restore" disposals the canvas under a frame depends on more than the frame before it
+        return size == self.size and all(info.disposal in (0, 1) for info in self.infos)
+
+    def read_frame(self, f: BinaryIO, index: int, duration: int) -> bytes:
+        info = self.infos[index]
+        delay = int(duration / 10).to_bytes(2, "little")
+
+        f.seek(info.start)
+        data = bytearray(f.read(info.end - info.start))
+
+        if info.start == info.descriptor:
+            return b"!\xf9\x04" + bytes((info.disposal << 2,)) + delay + b"\x00\x00" + bytes(data)
+
+        data[4:6] = delay
+
+        return bytes(data)
+
+
+class SpliceFrame(NamedTuple):
+    origin: int | None
+    get_image: Callable[[], Image.Image]
+    duration: int
+    image: Image.Image | None
+    palette: Palette | None
+    exact: bool
+
+
+class GifSpliceWriter():
+
+    fp: BinaryIO
+    source: BinaryIO
+    origin: GifOrigin
+    before: Image.Image | None
+    last_copied: SpliceFrame | None
+    pending: SpliceFrame | None
+    synced: int | None
+    n_frames: int
+    n_copied: int
+
+    def __init__(self, fp: BinaryIO, source: BinaryIO, origin: GifOrigin, loop: int | None = 0, comment: str | None = None) -> None:
+        self.fp = fp
+        self.source = source
+        self.origin = origin
+        self.before = None
+        self.last_copied = None
+        self.pending = None
+
+        # the output canvas matches the source canvas just before this source frame is drawn
+        self.synced = 0
+
+        self.n_frames = 0
+        self.n_copied = 0
+
+        self.fp.write(origin.header + encode_extensions(loop, comment))
+
+    def can_copy(self, origin: int) -> bool:
+        pending = self.pending
+
+        if pending is None:
+            return origin == self.synced
+
+        if pending.image is None:
+            return origin == pending.origin + 1
+
+        return pending.exact and pending.origin is not None and origin == pending.origin + 1
+
+    def add_frame(self, origin: int | None, get_image: Callable[[], Image.Image], duration: int) -> None:
+        if origin is not None and self.can_copy(origin):
+            frame = SpliceFrame(origin, get_image, duration, None, None, True)
+
+        else:
+            image = normalize(get_image())
+            frame = SpliceFrame(origin, get_image, duration, image, *get_palette(image))
+
+        self.flush(frame)
+        self.pending = frame
+
+    def get_before(self) -> Image.Image | None:
+        if self.last_copied is not None:
+            self.before = normalize(self.last_copied.get_image())
+            self.last_copied = None
+
+        return self.before
+
+    def flush(self, following: SpliceFrame | None) -> None:
+        pending = self.pending
+
+        if pending is None:
+            return
+
+        clears = following is not None and following.image is not None
+
+        if pending.image is None:
+            image = normalize(pending.get_image()) if clears else None
+
+            if image is not None and needs_clear(image, following.image):
+                # what is under a copied frame is not known here, but it is transparent wherever the frame is
+                self.write_encoded(image, None, get_palette(image)[0], pending.duration, disposal=2, full=True)
+                self.before = None
+                self.synced = None
+
+            else:
+                self.fp.write(self.origin.read_frame(self.source, pending.origin, pending.duration))
+                self.n_frames += 1
+                self.n_copied += 1
+
+                self.before = image
+                self.last_copied = pending if image is None else None
+                self.synced = pending.origin + 1
+
+            return
+
+        before = self.get_before()
+
+        if clears and needs_clear(pending.image, following.image):
+            self.write_encoded(pending.image, before, pending.palette, pending.duration, disposal=2, full=True)
+            self.before = None
+            self.synced = None
+
+        else:
+            self.write_encoded(pending.image, before, pending.palette, pending.duration, disposal=1)
+            self.before = pending.image
+            self.synced = pending.origin + 1 if pending.exact and pending.origin is not None else None
+
+    def write_encoded(self, image: Image.Image, before: Image.Image | None, palette: Palette, duration: int, disposal: int, full: bool = False) -> None:
+        full = full or self.n_frames == 0
+
+        self.fp.write(encode_frame(image, before, palette, duration, disposal, full, local=True))
+        self.n_frames += 1
+
+    def close(self) -> None:
+        self.flush(None)
+        self.pending = None
+
+        self.fp.write(b";")
+
+
+def save_spliced(path: Path, origin: GifOrigin, frames: Iterable[tuple[int | None, Callable[[], Image.Image], int]], loop: int | None = 0, comment: str | None = None) -> tuple[int, int]:
+    # written beside the target first, the source may be the very file being replaced
+    tmp = path.with_name(path.name + ".tmp")
+
+    try:
+        with open(tmp, "wb") as fp, open(origin.path, "rb") as source:
+            writer = GifSpliceWriter(fp, source, origin, loop, comment)
+
+            for index, get_image, duration in frames:
+                writer.add_frame(index, get_image, duration)
+
+            writer.close()
+
+        tmp.replace(path)
+
+    finally:
+        tmp.unlink(missing_ok=True)
+
+    return writer.n_frames, writer.n_copied
\ No newline at end of file
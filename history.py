@@ -0,0 +1,159 @@
+from typing import NamedTuple
+
+from frames import Frame
+
+
+class Splice(NamedTuple):
+    index: int
+    removed: tuple[Frame, ...]
+    inserted: tuple[Frame, ...]
+
+
+def diff_frames(before: list[Frame], after: list[Frame]) -> Splice | None:
+    n = min(len(before), len(after))
+    start = 0
+
+    while start < n and before[start] is after[start]:
+        start += 1
+
+    end = 0
+
+    while end < n - start and before[len(before) - 1 - end] is after[len(after) - 1 - end]:
+        end += 1
+
+    if start == len(before) == len(after):
+        return None
+
+    return Splice(start, tuple(before[start:len(before) - end]), tuple(after[start:len(after) - end]))
+
+
+class Command():
+
+    name: str
+    splices: list[Splice]
+    sizes: tuple[tuple[int, int], tuple[int, int]] | None
+    n_bytes: int
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.splices = []
+        self.sizes = None
+        self.n_bytes = 0
+
+    def add(self, splice: Splice) -> None:
+        last = self.splices[-1] if self.splices else None
+
+        # consecutive appends, as in an import, fold into one splice
+        if last is not None and not splice.removed and last.index + len(last.inserted) == splice.index:
+            self.splices[-1] = Splice(last.index, last.removed, last.inserted + splice.inserted)
+
+        else:
+            self.splices.append(splice)
+
+        inserted = {id(frame.content) for frame in splice.inserted}
+        dropped = {id(frame.content): frame for frame in splice.removed if id(frame.content) not in inserted}
+
+        # only pixels that left the document are kept alive by the history, the rest is references
+        self.n_bytes += 8 * (len(splice.removed) + len(splice.inserted))
+        self.n_bytes += sum(frame.get_bytes() for frame in dropped.values())
+
+
+class History():
+
+    undo_stack: list[Command]
+    redo_stack: list[Command]
+    group: Command | None
+    max_steps: int | None
+    max_bytes: int | None
+
+    def __init__(self, max_steps: int | None = 200, max_bytes: int | None = 512 * 1024 ** 2) -> None:
+        self.undo_stack = []
+        self.redo_stack = []
+        self.group = None
+        self.max_steps = max_steps
+        self.max_bytes = max_bytes
+
+    def set_limits(self, max_steps: int | None = 200, max_bytes: int | None = 512 * 1024 ** 2) -> None:
+        self.max_steps = max_steps
+        self.max_bytes = max_bytes
+
+        self.trim()
+
+    def get_bytes(self) -> int:
+        return sum(command.n_bytes for command in self.undo_stack + self.redo_stack)
+
+    def begin(self, name: str) -> None:
+        if self.group is None:
+            self.group = Command(name)
+
+    def end(self) -> None:
+        group, self.group = self.group, None
+
+        if group is not None and (group.splices or group.sizes):
+            self.push(group)
+
+    def record(self, name: str, splice: Splice | None) -> None:
+        if splice is None:
+            return
+
+        if self.group is not None:
+            self.group.add(splice)
+            return
+
+        command = Command(name)
+        command.add(splice)
+
+        self.push(command)
+
+    def record_size(self, name: str, before: tuple[int, int], after: tuple[int, int]) -> None:
+        if before == after:
+            return
+
+        if self.group is not None:
+            self.group.sizes = (self.group.sizes[0] if self.group.sizes else before, after)
+            return
+
+        command = Command(name)
+        command.sizes = (before, after)
+
+        self.push(command)
+
+    def push(self, command: Command) -> None:
+        self.undo_stack.append(command)
+        self.redo_stack.clear()
+
+        self.trim()
+
+    def trim(self) -> None:
+        if self.max_steps is not None:
+            del self.undo_stack[:max(len(self.undo_stack) - self.max_steps, 0)]
+
+        if self.max_bytes is not None:
+            total = self.get_bytes()
+
+            # the newest step is always kept so the last edit can be undone
+            while total > self.max_bytes and len(self.undo_stack) > 1:
+                total -= self.undo_stack.pop(0).n_bytes
+
+    def undo(self) -> Command | None:
+        if not self.undo_stack:
+            return None
+
+        command = self.undo_stack.pop()
+        self.redo_stack.append(command)
+
+        return command
+
+    def redo(self) -> Command | None:
+        if not self.redo_stack:
+            return None
+
+        command = self.redo_stack.pop()
+        self.undo_stack.append(command)
+
+        return command
+
+    def clear(self) -> None:
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.group = None
\ No newline at end of file
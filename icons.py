@@ -0,0 +1,57 @@
+import tkinter as tk
+from pathlib import Path
+import marshal
+import os
+
+ICONS_PATH = Path(__file__).with_name("icons.ini")
+CACHE_PATH = Path.home() / ".cache" / "tk-gif-player" / "icons.bin"
+
+
+def read_icons(path: Path) -> dict[str, str]:
+    from configparser import ConfigParser
+
+    c = ConfigParser()
+    c.read(path, encoding="utf-8")
+
+    return dict(c.items("icons"))
+
+
+def get_stamp(path: Path) -> tuple[int, int]:
+    stat = path.stat()
+
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_icon_data(path: Path = ICONS_PATH, cache_path: Path = CACHE_PATH) -> dict[str, str]:
+    stamp = get_stamp(path)
+
+    try:
+        with open(cache_path, "rb") as f:
+            cached_stamp, icons = marshal.load(f)
+
+        if cached_stamp == stamp:
+            return icons
+
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+
+    icons = read_icons(path)
+
+    # built once per change of icons.ini, later starts skip the ini parser
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+
+        with open(tmp, "wb") as f:
+            marshal.dump((stamp, icons), f)
+
+        tmp.replace(cache_path)
+
+    except OSError:
+        pass
+
+    return icons
+
+
+def load_icons(path: Path = ICONS_PATH, cache_path: Path = CACHE_PATH) -> dict[str, tk.PhotoImage]:
+    return {name: tk.PhotoImage(data=value) for name, value in load_icon_data(path, cache_path).items()}
\ No newline at end of file
@@ -0,0 +1,39 @@
+from pathlib import Path
+from math import ceil
+from re import split
+from PIL import Image, ImageOps
+
+
+def adjust_image(image: Image.Image, size: tuple[int, int]) -> Image.Image:
+    width_prod, height_prod = image.width / size[0], image.height / size[1]
+
+    scale = width_prod if width_prod > height_prod else height_prod
+
+    image = ImageOps.scale(image, 1 / scale)
+    image = ImageOps.pad(image, size)
+
+    return image
+
+
+def load_image(path: Path, size: tuple[int, int], draft_ratio: float = 2.0) -> Image.Image:
+    image = Image.open(path)
+
+    scale = max(image.width / size[0], image.height / size[1])
+
+    # JPEG can decode at 1/2, 1/4 or 1/8 scale, which skips most of the IDCT work
+    if image.format == "JPEG" and scale >= draft_ratio:
+        image.draft(None, (ceil(image.width / scale), ceil(image.height / scale)))
+
+    return adjust_image(image, size)
+
+
+def natural_key(path: Path) -> list[int | str]:
+    return [int(part) if part.isdigit() else part.lower() for part in split(r"(\d+)", path.name)]
+
+
+def list_images(directory: Path, pattern: str = "*", recursive: bool = False) -> list[Path]:
+    extensions = Image.registered_extensions()
+
+    paths = directory.rglob(pattern) if recursive else directory.glob(pattern)
+
+    return sorted((path for path in paths if path.is_file() and path.suffix.lower() in extensions), key=natural_key)
\ No newline at end of file
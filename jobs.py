@@ -0,0 +1,166 @@
+from tkinter import Misc
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future
+from multiprocessing import get_context
+from queue import SimpleQueue, Empty
+from threading import Event
+from typing import Any, Callable
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job():
+
+    name: str
+    total: int
+    done: int
+    cancelled: Event
+    results: SimpleQueue
+    future: Future | None
+
+    on_batch: Callable[[list[Any]], None] | None
+    on_done: Callable[[Any], None] | None
+    on_error: Callable[[BaseException], None] | None
+
+    def __init__(self, name: str, on_batch: Callable[[list[Any]], None] | None = None, on_done: Callable[[Any], None] | None = None, on_error: Callable[[BaseException], None] | None = None) -> None:
+        self.name = name
+        self.total = 0
+        self.done = 0
+        self.cancelled = Event()
+        self.results = SimpleQueue()
+        self.future = None
+
+        self.on_batch = on_batch
+        self.on_done = on_done
+        self.on_error = on_error
+
+    def report(self, done: int, total: int) -> None:
+        self.done = done
+        self.total = total
+
+        if self.cancelled.is_set():
+            raise JobCancelled(self.name)
+
+    def emit(self, item: Any) -> None:
+        if self.cancelled.is_set():
+            raise JobCancelled(self.name)
+
+        self.results.put(item)
+
+    def cancel(self) -> None:
+        self.cancelled.set()
+
+    def is_cancelled(self) -> bool:
+        return self.cancelled.is_set()
+
+    def take_batch(self, size: int) -> list[Any]:
+        batch: list[Any] = []
+
+        try:
+            while len(batch) < size:
+                batch.append(self.results.get_nowait())
+
+        except Empty:
+            pass
+
+        return batch
+
+
+class JobRunner():
+
+    widget: Misc
+    executor: ThreadPoolExecutor
+    process_pool: ProcessPoolExecutor | None
+    jobs: list[Job]
+    interval: int
+    batch_size: int
+    after_id: str | None
+
+    on_progress: Callable[[Job | None], None] | None
+
+    def __init__(self, widget: Misc, max_workers: int = 2, interval: int = 50, batch_size: int = 64) -> None:
+        self.widget = widget
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self.process_pool = None
+        self.jobs = []
+        self.interval = interval
+        self.batch_size = batch_size
+        self.after_id = None
+        self.on_progress = None
+
+    def bind_progress_func(self, func: Callable[[Job | None], None]) -> None:
+        self.on_progress = func
+
+    def get_process_pool(self) -> ProcessPoolExecutor:
+        if self.process_pool is None:
+            # created from a job thread of a running Tk process, which is not safe to fork
+            self.process_pool = ProcessPoolExecutor(mp_context=get_context("spawn"))
+
+        return self.process_pool
+
+    def is_busy(self) -> bool:
+        return len(self.jobs) > 0
+
+    def submit(self, job: Job, work: Callable[[Job], Any]) -> Job:
+        job.future = self.executor.submit(self.run, job, work)
+
+        self.jobs.append(job)
+
+        if self.after_id is None:
+            self.after_id = self.widget.after(self.interval, self.poll)
+
+        return job
+
+    def run(self, job: Job, work: Callable[[Job], Any]) -> Any:
+        try:
+            return work(job)
+
+        except JobCancelled:
+            return None
+
+    def cancel_all(self) -> None:
+        for job in self.jobs:
+            job.cancel()
+
+    def poll(self) -> None:
+        self.after_id = None
+
+        for job in list(self.jobs):
+            finished = job.future.done()
+
+            while batch := job.take_batch(self.batch_size):
+                if job.on_batch is not None:
+                    job.on_batch(batch)
+
+                if not finished:
+                    break
+
+            if finished and job.results.empty():
+                self.jobs.remove(job)
+                self.finish(job)
+
+        if self.on_progress is not None:
+            self.on_progress(self.jobs[0] if self.jobs else None)
+
+        if self.jobs:
+            self.after_id = self.widget.after(self.interval, self.poll)
+
+    def finish(self, job: Job) -> None:
+        error = job.future.exception()
+
+        if error is not None:
+            if job.on_error is None:
+                raise error
+
+            job.on_error(error)
+
+        elif job.on_done is not None:
+            job.on_done(job.future.result())
+
+    def shutdown(self) -> None:
+        self.cancel_all()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+        if self.process_pool is not None:
+            self.process_pool.shutdown(wait=False, cancel_futures=True)
\ No newline at end of file
@@ -0,0 +1,82 @@
+from collections import OrderedDict
+from typing import Hashable, Generic, TypeVar
+
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+
+    items: OrderedDict[K, tuple[V, int]]
+    max_items: int | None
+    max_bytes: int | None
+    n_bytes: int
+    n_evicted: int
+
+    def __init__(self, max_items: int | None = None, max_bytes: int | None = None) -> None:
+        self.items = OrderedDict()
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.n_bytes = 0
+        self.n_evicted = 0
+
+    def __contains__(self, key: K) -> bool:
+        return key in self.items
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def set_limits(self, max_items: int | None = None, max_bytes: int | None = None) -> None:
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+
+        self.evict()
+
+    def get(self, key: K) -> V | None:
+        if key not in self.items:
+            return None
+
+        self.items.move_to_end(key)
+
+        return self.items[key][0]
+
+    def put(self, key: K, value: V, n_bytes: int) -> None:
+        self.discard(key)
+
+        self.items[key] = (value, n_bytes)
+        self.n_bytes += n_bytes
+
+        self.evict(keep=key)
+
+    def discard(self, key: K) -> None:
+        if key in self.items:
+            _, n_bytes = self.items.pop(key)
+            self.n_bytes -= n_bytes
+
+    def clear(self) -> None:
+        self.items.clear()
+        self.n_bytes = 0
+
+    def evict(self, keep: K | None = None) -> None:
+        while self.is_over() and len(self.items) > 0:
+            key = next(iter(self.items))
+
+            if key == keep:
+                if len(self.items) == 1:
+                    break
+
+                self.items.move_to_end(key)
+                continue
+
+            self.discard(key)
+            self.n_evicted += 1
+
+    def is_over(self) -> bool:
+        if self.max_items is not None and len(self.items) > self.max_items:
+            return True
+
+        if self.max_bytes is not None and self.n_bytes > self.max_bytes:
+            return True
+
+        return False
\ No newline at end of file
@@ -1,158 +1,463 @@
 from pathlib import Path
-from PIL import Image, ImageOps, ImageTk
-from tkinter import Canvas, PhotoImage
-from time import sleep
-from threading import Thread
-from typing import Literal
-from configparser import ConfigParser
-
-class Model():
-
-    images: list[Image.Image]
-    frames: list[ImageTk.PhotoImage]
-    size: tuple[int, int]
-    n_frames: int
+from PIL import Image, ImageTk
+from tkinter import Canvas
+from typing import Literal, Any, TYPE_CHECKING
+from time import perf_counter
+
+from core import GifCore
+from frames import Frame
+from lru import LRUCache
+from scheduler import PlaybackScheduler
+from render import ItemRenderer, BlitRenderer, TileRenderer
+from telemetry import PlaybackTelemetry
+from scaling import ScaledFrameCache
+from spill import SpillStore
+from readahead import ReadAhead
+
+if TYPE_CHECKING:
+    from workspace import Workspace
+
+class Model(GifCore):
+
+    photos: LRUCache[object, ImageTk.PhotoImage]
     current_frame: int
-    before: int | None
     stop_request: int
 
-    canvas: Canvas
-    fps: float
+    workspace: "Workspace | None"
+    visible: bool
+    resume: bool
 
-    def __init__(self) -> None:
-        self.images = []
-        self.frames = []
-        self.size = (0, 0)
-        self.n_frames = 0
+    canvas: Canvas
+    scheduler: PlaybackScheduler
+    renderer: ItemRenderer | BlitRenderer | TileRenderer
+    telemetry: PlaybackTelemetry
+    scaled: ScaledFrameCache
+    readahead: ReadAhead
+    zoom: float | Literal["fit"]
+    scale: float
+    pan: tuple[int, int]
+    resize_id: str | None
+
+    spill: SpillStore
+    memory_budget: int | None
+    frame_bytes: int
+    n_evicted: int
+    n_spilled: int
+    enforce_id: str | None
+
+    def __init__(self, workspace: "Workspace | None" = None) -> None:
+        super().__init__()
+
+        self.workspace = workspace
+        self.visible = True
+        self.resume = False
+
+        self.photos = LRUCache()
         self.current_frame = 0
         self.stop_request = 0
-        self.before = None
+        self.telemetry = PlaybackTelemetry()
+        self.scaled = ScaledFrameCache()
+        self.readahead = ReadAhead(self.get_frame, self.get_n_frames, self.decode_display_image, self.has_photo, pool=workspace.decode_pool if workspace is not None else None)
+        self.zoom = 1.0
+        self.scale = 1.0
+        self.pan = (0, 0)
+        self.resize_id = None
+
+        self.spill = SpillStore()
+        self.memory_budget = 1024 ** 3
+        self.frame_bytes = 0
+        self.n_evicted = 0
+        self.n_spilled = 0
+        self.enforce_id = None
 
     def init_canvas(self, canvas: Canvas) -> None:
         self.canvas = canvas
+        self.renderer = ItemRenderer(self, canvas)
+        self.scheduler = PlaybackScheduler(canvas, self.loop_gif, self.get_frame_delay, self.get_n_frames, self.workspace.clock if self.workspace is not None else None)
 
     def bind_sync_func(self, func: object) -> None:
         self.bound_func = func
 
-    def get_icons(self) -> dict[str, PhotoImage]:
-        c = ConfigParser()
-        c.read("./icons.ini", encoding="utf-8")
-        icons = c.items("icons")
-
-        ret_dict: dict[str, PhotoImage] = {}
-
-        for name, value in icons:
-            ret_dict[name] = PhotoImage(data=value)
+    def clear_configure(self) -> None:
+        if hasattr(self, "scheduler"):
+            self.scheduler.stop()
 
-        return ret_dict
+        super().clear_configure()
 
-    def clear_configure(self) -> None:
-        self.images = []
-        self.frames = []
-        self.size = (0, 0)
-        self.n_frames = 0
+        self.photos.clear()
+        self.scaled.clear()
+        self.readahead.flush()
+        self.spill.clear()
+        self.frame_bytes = 0
         self.current_frame = 0
         self.stop_request = 0
-        self.before = None
 
-    def set_fps(self, fps: float) -> None:
-        self.fps = fps
+        self.pan = (0, 0)
+
+        if not hasattr(self, "renderer"):
+            return
+
+        if isinstance(self.renderer, TileRenderer):
+            self.renderer.clear()
+
+        else:
+            self.renderer.reset()
+
+    def forget_frame(self, frame: Frame) -> None:
+        self.photos.discard(frame.content)
+        self.scaled.discard(frame)
+
+        if hasattr(self, "renderer") and isinstance(self.renderer, TileRenderer):
+            self.renderer.discard(frame)
+
+    def shutdown(self) -> None:
+        if hasattr(self, "scheduler"):
+            self.scheduler.stop()
+
+        self.readahead.close()
+        self.scaled.clear()
+        self.spill.clear()
+
+        # the read-ahead workers are gone by now, so nothing else reads from the file
+        if self.source is not None:
+            self.source.close()
+            self.source = None
+
+    def ins_frame(self, index: int | Literal["end"], image: Image.Image, duration: int | None = None, name: str | None = None, digest: bytes | None = None, origin: int | None = None) -> None:
+        super().ins_frame(index, image, duration, name, digest, origin)
+
+        self.request_enforce()
+
+    def swap_frames(self, frames: list[Frame]) -> None:
+        super().swap_frames(frames)
+
+        self.readahead.flush()
+
+        self.request_enforce()
+
+    def set_size(self, size: tuple[int, int]) -> None:
+        super().set_size(size)
+
+        # photos of the new frames are built lazily, only as they come on screen
+        self.pan = (0, 0)
+        self.apply_scale()
+
+        if hasattr(self, "renderer"):
+            self.renderer.reset()
+
+    def set_visible(self, visible: bool) -> None:
+        self.visible = visible
+
+        if not visible:
+            # a hidden document stops drawing and decoding, and picks up where it was when it is shown again
+            self.resume = self.resume or self.scheduler.is_running()
+            self.scheduler.stop()
+            self.readahead.set_playing(False)
+            self.readahead.flush()
+
+        elif self.resume:
+            self.resume = False
+            self.start_loop()
+
+    def set_memory_budget(self, budget: int | None) -> None:
+        self.memory_budget = budget
+
+        self.enforce_budget()
+
+    def get_frame_bytes(self) -> int:
+        seen: set[int] = set()
+        total = 0
+
+        for frame in self.images:
+            if frame.image is not None and id(frame.image) not in seen:
+                seen.add(id(frame.image))
+                total += frame.get_bytes()
+
+        return total
+
+    def get_memory_usage(self) -> dict[str, int | None]:
+        return {
+            "photos": self.photos.n_bytes,
+            "scaled": self.scaled.images.n_bytes,
+            "frames": self.frame_bytes,
+            "spilled": self.spill.get_bytes(),
+            "budget": self.memory_budget,
+            "evicted": self.n_evicted,
+            "spilled_frames": self.n_spilled,
+            "shared": self.dedup_index.saved_bytes,
+            "shared_frames": self.dedup_index.n_shared,
+        }
+
+    def request_enforce(self) -> None:
+        if self.enforce_id is None and hasattr(self, "canvas"):
+            self.enforce_id = self.canvas.after_idle(self.enforce_budget)
+
+    def evict_photos(self) -> None:
+        limit = self.memory_budget - self.frame_bytes - self.scaled.images.n_bytes
+
+        # the most recently shown photo is the last one and always stays
+        while self.photos.n_bytes > limit and len(self.photos) > 1:
+            self.photos.discard(next(iter(self.photos.items)))
+            self.n_evicted += 1
+
+    def enforce_budget(self) -> None:
+        self.enforce_id = None
+        self.frame_bytes = self.get_frame_bytes()
+
+        # a shared budget is split again between the documents now that this one holds a different amount
+        if self.workspace is not None:
+            self.workspace.rebalance()
+
+        else:
+            self.fit_budget()
+
+    def fit_budget(self) -> None:
+        if self.memory_budget is None:
+            return
+
+        self.evict_photos()
+
+        over = self.photos.n_bytes + self.scaled.images.n_bytes + self.frame_bytes - self.memory_budget
+
+        if over > 0 and self.scaled.images.n_bytes > 0:
+            over -= self.scaled.images.n_bytes
+            self.scaled.clear()
+
+        if over <= 0:
+            return
+
+        sharing: dict[int, list[Frame]] = {}
+
+        for frame in self.images:
+            if frame.image is not None:
+                sharing.setdefault(id(frame.image), []).append(frame)
+
+        # frames far from the playhead go to disk first
+        n_frames, current = self.n_frames, self.current_frame
+        order = sorted(range(n_frames), key=lambda i: min((i - current) % n_frames, (current - i) % n_frames), reverse=True)
+
+        for i in order:
+            if over <= 0:
+                break
+
+            frame = self.images[i]
+
+            if frame.image is None:
+                continue
+
+            over -= frame.get_bytes()
+            key = self.spill.put(frame.image)
+
+            for shared in sharing[id(frame.image)]:
+                shared.spill(self.spill, key)
+                self.n_spilled += 1
+
+        self.frame_bytes = self.get_frame_bytes()
+
+    def set_render_mode(self, mode: Literal["items", "blit", "tiles"]) -> None:
+        self.renderer.reset()
+        self.readahead.flush()
+
+        if mode == "items":
+            self.renderer = ItemRenderer(self, self.canvas)
+
+        elif mode == "blit":
+            self.renderer = BlitRenderer(self, self.canvas)
+            self.photos.clear()
+
+        elif mode == "tiles":
+            self.renderer = TileRenderer(self, self.canvas)
+            self.photos.clear()
+            self.scaled.clear()
+
+        else:
+            raise ValueError("Invaild render mode. (Not 'items', 'blit' or 'tiles')")
+
+        if self.n_frames > 0:
+            self.display_frame(self.current_frame)
+
+    def set_lazy(self, lazy: bool, max_frames: int | None = 64, max_bytes: int | None = 256 * 1024 ** 2) -> None:
+        super().set_lazy(lazy)
+
+        if lazy:
+            self.photos.set_limits(max_frames, max_bytes)
+
+        else:
+            self.photos.set_limits()
 
-    def get_n_frames(self) -> int:
-        return self.n_frames
-    
     def get_canvas_size(self) -> tuple[int, int]:
         return self.canvas.winfo_width(), self.canvas.winfo_height()
 
-    def create_gif(self, size: tuple[int, int]) -> None:
-        self.clear_configure()
+    def set_zoom(self, zoom: float | Literal["fit"]) -> None:
+        self.zoom = zoom
 
-        self.size = size
+        self.update_scale()
 
-    def load_gif(self, path: Path) -> tuple[tuple[int, int], list[str]]:
-        image = Image.open(path)
+    def get_scale(self) -> float:
+        if self.zoom != "fit":
+            return self.zoom
 
-        self.clear_configure()
+        w, h = self.get_canvas_size()
 
-        self.size = image.size
+        if w <= 1 or h <= 1 or 0 in self.size:
+            return 1.0
 
-        frames_name: list[str] = []
+        return round(min(w / self.size[0], h / self.size[1]), 3)
 
-        for i in range(image.n_frames):
-            image.seek(i)
-            croped = image.crop()
+    def get_view_origin(self, size: tuple[int, int]) -> tuple[int, int]:
+        w, h = self.get_canvas_size()
 
-            self.ins_frame(i, croped)
+        # an image smaller than the canvas is centred, a larger one is panned
+        x = (w - size[0]) // 2 if size[0] <= w else -min(max(self.pan[0], 0), size[0] - w)
+        y = (h - size[1]) // 2 if size[1] <= h else -min(max(self.pan[1], 0), size[1] - h)
 
-            frames_name.append(f"{path.stem}_{i}")
+        return x, y
 
-        self.display_frame(0)
+    def pan_by(self, dx: int, dy: int) -> None:
+        w, h = self.get_canvas_size()
+        size = round(self.size[0] * self.scale), round(self.size[1] * self.scale)
 
-        return image.size, frames_name
-    
-    def ins_image(self, index: int | Literal["end"], path: Path) -> None:
-        image = Image.open(path)
+        self.pan = (
+            min(max(self.pan[0] - dx, 0), max(size[0] - w, 0)),
+            min(max(self.pan[1] - dy, 0), max(size[1] - h, 0)),
+        )
 
-        image = self.adjust_image(image)
+        if self.n_frames > 0:
+            self.display_frame(self.current_frame)
 
-        self.ins_frame(index, image)
+    def zoom_by(self, factor: float) -> None:
+        scale = min(max(round(self.scale * factor, 3), 0.05), 16.0)
+        w, h = self.get_canvas_size()
+
+        # keep the point under the centre of the canvas in place
+        self.pan = (
+            round((self.pan[0] + w / 2) * scale / self.scale - w / 2),
+            round((self.pan[1] + h / 2) * scale / self.scale - h / 2),
+        )
+
+        self.set_zoom(scale)
+
+    def request_resize(self, delay: int = 200) -> None:
+        if self.resize_id is not None:
+            self.canvas.after_cancel(self.resize_id)
+
+        self.resize_id = self.canvas.after(delay, self.update_scale)
+
+    def apply_scale(self) -> None:
+        scale = self.get_scale()
+
+        if scale != self.scale:
+            self.scale = scale
+            self.scaled.set_scale(scale)
+            self.photos.clear()
+            self.readahead.flush()
 
-    def adjust_image(self, image: Image.Image) -> Image.Image:
-        width_prod, height_prod = image.width / self.size[0], image.height / self.size[1]
+    def update_scale(self) -> None:
+        self.resize_id = None
 
-        scale = width_prod if width_prod > height_prod else height_prod
+        self.apply_scale()
+        self.renderer.reset()
 
-        image = ImageOps.scale(image, 1 / scale)
-        image = ImageOps.pad(image, self.size)
+        if self.n_frames > 0:
+            self.display_frame(self.current_frame)
 
-        return image
-    
-    def ins_frame(self, index: int | Literal["end"], image: Image.Image) -> None:
-        if index == "end":
-            index = self.n_frames
+    def get_display_image(self, frame: Frame) -> Image.Image:
+        if (image := self.readahead.take(frame)) is not None:
+            return image
 
-        self.images.insert(index, image)
-        self.frames.insert(index, ImageTk.PhotoImage(image=image))
-        self.n_frames += 1
-        
-    def del_frame(self, index: int) -> None:
-        del self.images[index]
-        del self.frames[index]
-        self.n_frames -= 1
+        return self.decode_display_image(frame)
 
-    def save_frame(self, index: int, path: Path) -> None:
-        image = self.images[index]
-        image.save(path)
+    def decode_display_image(self, frame: Frame) -> Image.Image:
+        if isinstance(self.renderer, TileRenderer):
+            return frame.get_image()
 
-    def save_as_gif(self, path: Path) -> None:
+        return self.scaled.get(frame)
+
+    def get_frame(self, index: int) -> Frame | None:
         images = self.images
-        topimg = images.pop(0)
-        topimg.save(path, save_all=True, append_images=images, optimize=False, loop=0, comment="test")
+
+        return images[index] if index < len(images) else None
+
+    def has_photo(self, frame: Frame) -> bool:
+        return isinstance(self.renderer, ItemRenderer) and frame.content in self.photos
+
+    def begin_load(self, path: Path) -> tuple[int, int]:
+        size = super().begin_load(path)
+
+        self.apply_scale()
+
+        return size
+
+    def create_gif(self, size: tuple[int, int]) -> None:
+        super().create_gif(size)
+
+        self.apply_scale()
+
+    def load_gif(self, path: Path) -> tuple[tuple[int, int], list[str]]:
+        size, frames_name = super().load_gif(path)
+
+        self.display_frame(0)
+
+        return size, frames_name
+
+    def get_photo(self, index: int) -> ImageTk.PhotoImage:
+        frame = self.images[index]
+
+        if (photo := self.photos.get(frame.content)) is None:
+            start = perf_counter()
+            image = self.get_display_image(frame)
+            decoded = perf_counter()
+            photo = ImageTk.PhotoImage(image=image)
+
+            self.telemetry.add("decode", decoded - start)
+            self.telemetry.add("photo", perf_counter() - decoded)
+
+            self.photos.put(frame.content, photo, image.width * image.height * 4)
+
+            if self.memory_budget is not None and self.photos.n_bytes + self.frame_bytes > self.memory_budget:
+                self.evict_photos()
+
+        return photo
 
     def start_loop(self):
-        thread = Thread(target=self.loop_gif, daemon=True)
-        thread.start()
+        if not self.visible:
+            self.resume = True
+            return
+
+        self.telemetry.reset()
+        self.readahead.set_playing(True)
+        self.scheduler.start(self.current_frame)
 
-    def loop_gif(self) -> None:
-        index = self.current_frame
+    def loop_gif(self, index: int) -> None:
+        self.display_frame(index)
 
-        while self.stop_request == 0:
-            self.display_frame(index)
-            
-            self.bound_func(self.current_frame)
+        start = perf_counter()
+        self.bound_func(self.current_frame)
+        self.telemetry.add("sync", perf_counter() - start)
 
-            sleep(1 / self.fps)
+        self.telemetry.end_frame(index, self.get_frame_delay(index), self.scheduler.late, self.scheduler.dropped)
 
-            if index < self.n_frames - 1:
-                index += 1
+    def set_telemetry(self, enabled: bool) -> None:
+        self.telemetry.set_enabled(enabled)
+
+    def get_telemetry(self) -> dict[str, Any]:
+        return self.telemetry.get_summary() | self.readahead.get_stats()
+
+    def export_telemetry(self, path: Path) -> None:
+        self.telemetry.export(path)
+
+    def request_stop(self, stop: Literal[0, 1, 2]) -> None:
+        self.stop_request = stop
 
-            else:
-                index = 0
-        
         if self.stop_request == 0:
-            raise ValueError("Invaild request. (Not 1 or 2)")
+            return
+
+        self.resume = False
 
-        elif self.stop_request == 1:
+        self.scheduler.stop()
+        self.readahead.set_playing(False)
+
+        if self.stop_request == 1:
             self.display_frame(0)
 
         elif self.stop_request == 2:
@@ -161,21 +466,21 @@ class Model():
         else:
             raise ValueError("Invaild request. (Not 1 or 2)")
 
-    def request_stop(self, stop: Literal[0, 1, 2]) -> None:
-        self.stop_request = stop
-
     def display_frame(self, index: int) -> None:
-        w, h = self.get_canvas_size()
+        self.telemetry.begin_frame()
 
-        before = self.before
-        self.before = self.canvas.create_image(w/2, h/2, image=self.frames[index])
-        self.canvas.delete(before)
+        start = perf_counter()
+        self.renderer.show(index)
 
-        self.current_frame = index
+        current = self.telemetry.current
+        self.telemetry.add("canvas", perf_counter() - start - current["decode"] - current["photo"])
 
-    def replace_frame(self, index: int, ins_index: int) -> None:
-        image = self.images[index]
+        self.current_frame = index
 
-        self.del_frame(index)
+        # only frames that are decoded or scaled on demand are worth reading ahead
+        if self.source is not None or self.scale != 1 or self.n_spilled > 0:
+            self.readahead.advance(index, self.get_frame_delay(index))
 
-        self.ins_frame(ins_index, image)
\ No newline at end of file
+    def seek_frame(self, index: int) -> None:
+        self.readahead.flush()
+        self.display_frame(index)
\ No newline at end of file
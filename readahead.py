@@ -0,0 +1,281 @@
+from collections import OrderedDict
+from threading import Thread, Condition
+from time import perf_counter
+from math import ceil
+from typing import Callable
+from PIL import Image
+
+from frames import Frame
+
+
+class DecodePool():
+
+    condition: Condition
+    clients: list["ReadAhead"]
+    threads: list[Thread]
+    n_workers: int
+    closed: bool
+
+    def __init__(self, n_workers: int = 1) -> None:
+        self.condition = Condition()
+        self.clients = []
+        self.threads = []
+        self.n_workers = n_workers
+        self.closed = False
+
+    def add(self, client: "ReadAhead") -> None:
+        with self.condition:
+            self.clients.append(client)
+
+    def remove(self, client: "ReadAhead") -> None:
+        with self.condition:
+            if client in self.clients:
+                self.clients.remove(client)
+
+            self.condition.notify_all()
+
+    def start(self) -> None:
+        with self.condition:
+            while len(self.threads) < self.n_workers and not self.closed:
+                thread = Thread(target=self.run, name="readahead", daemon=True)
+                thread.start()
+
+                self.threads.append(thread)
+
+    def get_next(self) -> tuple["ReadAhead", Frame] | None:
+        best: tuple[float, ReadAhead, Frame] | None = None
+
+        # the document whose queue would run dry soonest is served first
+        for client in self.clients:
+            if (frame := client.get_next()) is not None and (best is None or client.get_slack() < best[0]):
+                best = (client.get_slack(), client, frame)
+
+        return best[1:] if best is not None else None
+
+    def run(self) -> None:
+        while True:
+            with self.condition:
+                while not self.closed and (job := self.get_next()) is None:
+                    self.condition.wait()
+
+                if self.closed:
+                    return
+
+                client, frame = job
+                generation = client.begin(frame)
+
+            client.work(frame, generation)
+
+    def close(self) -> None:
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class ReadAhead():
+
+    get_frame: Callable[[int], Frame | None]
+    get_n_frames: Callable[[], int]
+    decode: Callable[[Frame], Image.Image]
+    skip: Callable[[Frame], bool]
+
+    pool: DecodePool
+    own_pool: bool
+    condition: Condition
+    ready: OrderedDict[object, Image.Image]
+    busy: set[object]
+    shown: object | None
+    n_bytes: int
+    max_bytes: int
+
+    playhead: int
+    direction: int
+    active: bool
+    playing: bool
+    closed: bool
+    generation: int
+
+    depth: int
+    min_depth: int
+    max_depth: int
+    headroom: float
+    cost: float
+    peak: float
+    delay: float
+    n_underruns: int
+
+    def __init__(self, get_frame: Callable[[int], Frame | None], get_n_frames: Callable[[], int], decode: Callable[[Frame], Image.Image], skip: Callable[[Frame], bool], min_depth: int = 2, max_depth: int = 64, max_bytes: int = 128 * 1024 ** 2, headroom: float = 4.0, pool: DecodePool | None = None) -> None:
+        self.get_frame = get_frame
+        self.get_n_frames = get_n_frames
+        self.decode = decode
+        self.skip = skip
+
+        self.pool = pool if pool is not None else DecodePool()
+        self.own_pool = pool is None
+        self.condition = self.pool.condition
+        self.ready = OrderedDict()
+        self.busy = set()
+        self.shown = None
+        self.n_bytes = 0
+        self.max_bytes = max_bytes
+
+        self.playhead = 0
+        self.direction = 1
+        self.active = False
+        self.playing = False
+        self.closed = False
+        self.generation = 0
+
+        self.depth = min_depth
+        self.min_depth = min_depth
+        self.max_depth = max_depth
+        self.headroom = headroom
+        self.cost = 0.0
+        self.peak = 0.0
+        self.delay = 0.0
+        self.n_underruns = 0
+
+        self.pool.add(self)
+
+    def set_playing(self, playing: bool) -> None:
+        with self.condition:
+            self.playing = playing
+
+            if playing:
+                self.n_underruns = 0
+
+    def get_depth(self) -> int:
+        if self.delay <= 0:
+            return self.min_depth
+
+        # enough frames queued to ride out a few of the slowest recent decodes in a row
+        depth = ceil(self.headroom * self.peak / self.delay) + 1
+
+        return min(max(depth, self.min_depth), self.max_depth)
+
+    def get_window(self, n_frames: int) -> list[int]:
+        depth = min(self.depth, n_frames - 1)
+
+        return [(self.playhead + self.direction * step) % n_frames for step in range(1, depth + 1)]
+
+    def advance(self, index: int, delay: float) -> None:
+        with self.condition:
+            if (n_frames := self.get_n_frames()) == 0:
+                return
+
+            # the playhead survives a flush, so stepping back through the list reads backwards too
+            if index != self.playhead:
+                self.direction = -1 if index == (self.playhead - 1) % n_frames else 1
+
+            self.playhead = index
+            self.active = True
+            self.delay = delay if self.delay == 0 else self.delay * 0.9 + delay * 0.1
+            self.depth = self.get_depth()
+
+            # frames the playhead has passed, or that fell out of a shorter window, are let go
+            wanted = {frame.content for i in self.get_window(n_frames) if (frame := self.get_frame(i)) is not None}
+
+            for content in [content for content in self.ready if content not in wanted]:
+                self.pop(content)
+
+            self.pool.start()
+            self.condition.notify_all()
+
+    def take(self, frame: Frame) -> Image.Image | None:
+        with self.condition:
+            # until the playhead moves on, the frame on screen still sits in the window
+            self.shown = frame.content
+
+            if (image := self.pop(frame.content)) is not None:
+                return image
+
+            if self.active and self.playing:
+                self.n_underruns += 1
+
+            # the frame being decoded right now is waited for rather than decoded a second time
+            while frame.content in self.busy:
+                self.condition.wait()
+
+            return self.pop(frame.content)
+
+    def flush(self) -> None:
+        with self.condition:
+            self.generation += 1
+            self.active = False
+            self.ready.clear()
+            self.n_bytes = 0
+
+    def pop(self, content: object) -> Image.Image | None:
+        if (image := self.ready.pop(content, None)) is not None:
+            self.n_bytes -= self.get_bytes(image)
+
+        return image
+
+    def get_bytes(self, image: Image.Image) -> int:
+        return image.width * image.height * len(image.getbands())
+
+    def get_slack(self) -> float:
+        return len(self.ready) * self.delay
+
+    def get_next(self) -> Frame | None:
+        if self.closed or not self.active or (n_frames := self.get_n_frames()) == 0 or self.n_bytes >= self.max_bytes:
+            return None
+
+        for i in self.get_window(n_frames):
+            if (frame := self.get_frame(i)) is None:
+                return None
+
+            if frame.content not in self.ready and frame.content not in self.busy and frame.content is not self.shown and not self.skip(frame):
+                return frame
+
+        return None
+
+    def begin(self, frame: Frame) -> int:
+        self.busy.add(frame.content)
+
+        return self.generation
+
+    def work(self, frame: Frame, generation: int) -> None:
+        start = perf_counter()
+
+        # a frame removed while it was being decoded may have lost its source, the display path reports it
+        try:
+            image = self.decode(frame)
+
+        except Exception:
+            image = None
+
+        cost = perf_counter() - start
+
+        with self.condition:
+            self.busy.discard(frame.content)
+
+            if image is not None:
+                self.cost = cost if self.cost == 0 else self.cost * 0.9 + cost * 0.1
+                self.peak = max(cost, self.peak * 0.95)
+
+                if generation == self.generation and not self.closed:
+                    self.ready[frame.content] = image
+                    self.n_bytes += self.get_bytes(image)
+
+            self.condition.notify_all()
+
+    def get_stats(self) -> dict[str, float]:
+        with self.condition:
+            return {
+                "readahead_depth": self.depth,
+                "readahead_queued": len(self.ready),
+                "readahead_decode_ms": self.cost * 1000,
+                "underruns": self.n_underruns,
+            }
+
+    def close(self) -> None:
+        with self.condition:
+            self.closed = True
+            self.ready.clear()
+            self.n_bytes = 0
+
+        self.pool.remove(self)
+
+        if self.own_pool:
+            self.pool.close()
\ No newline at end of file
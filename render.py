@@ -0,0 +1,267 @@
+from tkinter import Canvas, PhotoImage, NW
+from typing import TYPE_CHECKING
+from time import perf_counter
+from math import floor, ceil
+from PIL import Image, ImageChops, ImageTk
+
+from frames import Frame
+from lru import LRUCache
+from scaling import scale_box
+
+if TYPE_CHECKING:
+    from model import Model
+
+
+def get_changed_box(frame: Frame, last_frame: Frame) -> tuple[int, int, int, int] | None:
+    if frame.source is None or frame.source is not last_frame.source or frame.index != last_frame.index + 1:
+        return None
+
+    if not frame.box or not last_frame.box:
+        return None
+
+    return (
+        min(frame.box[0], last_frame.box[0]), min(frame.box[1], last_frame.box[1]),
+        max(frame.box[2], last_frame.box[2]), max(frame.box[3], last_frame.box[3]),
+    )
+
+
+def get_difference(image: Image.Image, last_image: Image.Image) -> Image.Image:
+    if image.mode != last_image.mode or image.mode == "P":
+        return ImageChops.difference(image.convert("RGBA"), last_image.convert("RGBA"))
+
+    return ImageChops.difference(image, last_image)
+
+
+class ItemRenderer():
+
+    model: "Model"
+    canvas: Canvas
+    before: int | None
+
+    def __init__(self, model: "Model", canvas: Canvas) -> None:
+        self.model = model
+        self.canvas = canvas
+        self.before = None
+
+    def show(self, index: int) -> None:
+        photo = self.model.get_photo(index)
+        x, y = self.model.get_view_origin((photo.width(), photo.height()))
+
+        before = self.before
+        self.before = self.canvas.create_image(x, y, image=photo, anchor=NW)
+        self.canvas.delete(before)
+
+    def reset(self) -> None:
+        self.canvas.delete(self.before)
+        self.before = None
+
+
+class BlitRenderer():
+
+    model: "Model"
+    canvas: Canvas
+    buffer: PhotoImage | None
+    item: int | None
+    last_frame: Frame | None
+    last_image: Image.Image | None
+
+    def __init__(self, model: "Model", canvas: Canvas) -> None:
+        self.model = model
+        self.canvas = canvas
+        self.buffer = None
+        self.item = None
+        self.last_frame = None
+        self.last_image = None
+
+    def show(self, index: int) -> None:
+        frame = self.model.images[index]
+
+        start = perf_counter()
+        image = self.model.get_display_image(frame)
+        self.model.telemetry.add("decode", perf_counter() - start)
+
+        if self.buffer is None or (self.buffer.width(), self.buffer.height()) != image.size:
+            self.reset()
+
+            self.buffer = PhotoImage(width=image.width, height=image.height)
+            self.item = self.canvas.create_image(0, 0, image=self.buffer, anchor=NW)
+
+        self.canvas.coords(self.item, *self.model.get_view_origin(image.size))
+
+        box = self.get_dirty_box(frame, image)
+
+        if box is not None:
+            start = perf_counter()
+            patch = ImageTk.PhotoImage(image=image.crop(box))
+            self.model.telemetry.add("photo", perf_counter() - start)
+
+            self.buffer.tk.call(self.buffer, "copy", str(patch), "-to", box[0], box[1], "-compositingrule", "set")
+
+        self.last_frame = frame
+        self.last_image = image
+
+    def get_dirty_box(self, frame: Frame, image: Image.Image) -> tuple[int, int, int, int] | None:
+        last_frame, last_image = self.last_frame, self.last_image
+
+        if last_frame is None or last_image is None:
+            return (0, 0) + image.size
+
+        if frame.content is last_frame.content:
+            return None
+
+        if (box := get_changed_box(frame, last_frame)) is not None:
+            box = scale_box(box, self.model.scale, image.size)
+
+            return (max(box[0], 0), max(box[1], 0), min(box[2], image.width), min(box[3], image.height))
+
+        return get_difference(image, last_image).getbbox(alpha_only=False)
+
+    def reset(self) -> None:
+        if self.item is not None:
+            self.canvas.delete(self.item)
+
+        self.buffer = None
+        self.item = None
+        self.last_frame = None
+        self.last_image = None
+
+
+class TileRenderer():
+
+    model: "Model"
+    canvas: Canvas
+    tile_size: int
+    tiles: dict[tuple[int, int], tuple[int, ImageTk.PhotoImage]]
+    cache: LRUCache[tuple[object, float, int, int], ImageTk.PhotoImage]
+    scale: float
+    last_frame: Frame | None
+    last_image: Image.Image | None
+
+    def __init__(self, model: "Model", canvas: Canvas, tile_size: int = 256, max_bytes: int | None = 64 * 1024 ** 2) -> None:
+        self.model = model
+        self.canvas = canvas
+        self.tile_size = tile_size
+        self.tiles = {}
+        self.cache = LRUCache(max_bytes=max_bytes)
+        self.scale = 1.0
+        self.last_frame = None
+        self.last_image = None
+
+    def show(self, index: int) -> None:
+        frame = self.model.images[index]
+
+        start = perf_counter()
+        image = self.model.get_display_image(frame)
+        self.model.telemetry.add("decode", perf_counter() - start)
+
+        if self.scale != self.model.scale or (self.last_image is not None and self.last_image.size != image.size):
+            self.reset()
+            self.scale = self.model.scale
+
+        size = max(1, round(image.width * self.scale)), max(1, round(image.height * self.scale))
+        x, y = self.model.get_view_origin(size)
+        w, h = self.model.get_canvas_size()
+        t = self.tile_size
+
+        visible = {
+            (tx, ty)
+            for tx in range(max(0, -x) // t, ceil(min(size[0], w - x) / t))
+            for ty in range(max(0, -y) // t, ceil(min(size[1], h - y) / t))
+        }
+
+        for key in [key for key in self.tiles if key not in visible]:
+            self.canvas.delete(self.tiles.pop(key)[0])
+
+        changed = get_changed_box(frame, self.last_frame) if self.last_frame is not None else None
+
+        for tx, ty in visible:
+            if (tile := self.tiles.get((tx, ty))) is None:
+                item = self.canvas.create_image(x + tx * t, y + ty * t, anchor=NW)
+
+            else:
+                item = tile[0]
+                self.canvas.coords(item, x + tx * t, y + ty * t)
+
+                if not self.is_dirty(frame, image, self.get_source_box(tx, ty, size, image.size), changed):
+                    continue
+
+            photo = self.get_tile(frame, image, tx, ty, size)
+
+            self.canvas.itemconfigure(item, image=photo)
+            self.tiles[(tx, ty)] = (item, photo)
+
+        self.last_frame = frame
+        self.last_image = image
+
+    def get_source_box(self, tx: int, ty: int, size: tuple[int, int], image_size: tuple[int, int]) -> tuple[int, int, int, int]:
+        t = self.tile_size
+        margin = ceil(1 / self.scale) + 1
+
+        return (
+            max(floor(tx * t / self.scale) - margin, 0), max(floor(ty * t / self.scale) - margin, 0),
+            min(ceil(min((tx + 1) * t, size[0]) / self.scale) + margin, image_size[0]), min(ceil(min((ty + 1) * t, size[1]) / self.scale) + margin, image_size[1]),
+        )
+
+    def is_dirty(self, frame: Frame, image: Image.Image, box: tuple[int, int, int, int], changed: tuple[int, int, int, int] | None) -> bool:
+        if self.last_frame is not None and frame.content is self.last_frame.content:
+            return False
+
+        if self.last_image is None:
+            return True
+
+        if changed is not None:
+            return changed[0] < box[2] and box[0] < changed[2] and changed[1] < box[3] and box[1] < changed[3]
+
+        return get_difference(image.crop(box), self.last_image.crop(box)).getbbox(alpha_only=False) is not None
+
+    def get_tile(self, frame: Frame, image: Image.Image, tx: int, ty: int, size: tuple[int, int]) -> ImageTk.PhotoImage:
+        key = (frame.content, self.scale, tx, ty)
+
+        if (photo := self.cache.get(key)) is not None:
+            return photo
+
+        start = perf_counter()
+
+        t = self.tile_size
+        w, h = min(t, size[0] - tx * t), min(t, size[1] - ty * t)
+
+        if self.scale == 1:
+            tile = image.crop((tx * t, ty * t, tx * t + w, ty * t + h))
+
+        else:
+            # only the source pixels under this tile, plus the filter support around it, are resampled
+            x0, y0 = tx * t / self.scale, ty * t / self.scale
+            x1, y1 = min((tx * t + w) / self.scale, image.width), min((ty * t + h) / self.scale, image.height)
+            margin = ceil(1 / self.scale) + 1
+            box = (max(floor(x0) - margin, 0), max(floor(y0) - margin, 0), min(ceil(x1) + margin, image.width), min(ceil(y1) + margin, image.height))
+
+            tile = image.crop(box)
+
+            if tile.mode not in ("RGB", "RGBA"):
+                tile = tile.convert("RGBA")
+
+            resample = Image.Resampling.NEAREST if self.scale >= 1 and self.scale == int(self.scale) else Image.Resampling.BILINEAR
+            tile = tile.resize((w, h), resample, box=(x0 - box[0], y0 - box[1], x1 - box[0], y1 - box[1]))
+
+        photo = ImageTk.PhotoImage(image=tile)
+
+        self.cache.put(key, photo, w * h * 4)
+        self.model.telemetry.add("photo", perf_counter() - start)
+
+        return photo
+
+    def discard(self, frame: Frame) -> None:
+        for key in [key for key in self.cache.items if key[0] is frame.content]:
+            self.cache.discard(key)
+
+    def clear(self) -> None:
+        self.reset()
+        self.cache.clear()
+
+    def reset(self) -> None:
+        for item, _ in self.tiles.values():
+            self.canvas.delete(item)
+
+        self.tiles = {}
+        self.last_frame = None
+        self.last_image = None
\ No newline at end of file
@@ -0,0 +1,86 @@
+from threading import Lock
+from PIL import Image
+
+from frames import Frame
+from lru import LRUCache
+
+
+def scale_image(image: Image.Image, scale: float) -> Image.Image:
+    if scale == 1:
+        return image
+
+    size = max(1, round(image.width * scale)), max(1, round(image.height * scale))
+
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA")
+
+    # pixel art stays sharp when it is only enlarged by a whole factor
+    if scale >= 1 and scale == int(scale):
+        return image.resize(size, Image.Resampling.NEAREST)
+
+    return image.resize(size, Image.Resampling.BILINEAR, reducing_gap=2.0)
+
+
+def scale_box(box: tuple[int, int, int, int], scale: float, size: tuple[int, int], margin: int = 2) -> tuple[int, int, int, int]:
+    if scale == 1:
+        return box
+
+    return (
+        max(int(box[0] * scale) - margin, 0), max(int(box[1] * scale) - margin, 0),
+        min(int(box[2] * scale + 1) + margin, size[0]), min(int(box[3] * scale + 1) + margin, size[1]),
+    )
+
+
+class ScaledFrameCache():
+
+    images: LRUCache[tuple[object, float], Image.Image]
+    lock: Lock
+    scale: float
+
+    def __init__(self, max_bytes: int | None = 128 * 1024 ** 2) -> None:
+        self.images = LRUCache(max_bytes=max_bytes)
+        self.lock = Lock()
+        self.scale = 1.0
+
+    def set_scale(self, scale: float) -> bool:
+        if scale == self.scale:
+            return False
+
+        self.scale = scale
+
+        return True
+
+    def set_limit(self, max_bytes: int | None) -> None:
+        with self.lock:
+            self.images.set_limits(max_bytes=max_bytes)
+
+    def get(self, frame: Frame) -> Image.Image:
+        if self.scale == 1:
+            return frame.get_image()
+
+        key = (frame.content, self.scale)
+
+        with self.lock:
+            image = self.images.get(key)
+
+        if image is not None:
+            return image
+
+        return self.build(frame, self.scale)
+
+    def build(self, frame: Frame, scale: float) -> Image.Image:
+        image = scale_image(frame.get_image(), scale)
+
+        with self.lock:
+            self.images.put((frame.content, scale), image, image.width * image.height * len(image.getbands()))
+
+        return image
+
+    def discard(self, frame: Frame) -> None:
+        with self.lock:
+            for key in [key for key in self.images.items if key[0] is frame.content]:
+                self.images.discard(key)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.images.clear()
\ No newline at end of file
@@ -0,0 +1,144 @@
+from tkinter import Misc
+from time import monotonic
+from typing import Callable
+
+
+class PlaybackClock():
+
+    widget: Misc
+    schedulers: list["PlaybackScheduler"]
+    after_id: str | None
+    wake_at: float | None
+
+    def __init__(self, widget: Misc) -> None:
+        self.widget = widget
+        self.schedulers = []
+        self.after_id = None
+        self.wake_at = None
+
+    def add(self, scheduler: "PlaybackScheduler") -> None:
+        if scheduler not in self.schedulers:
+            self.schedulers.append(scheduler)
+
+        self.wake()
+
+    def remove(self, scheduler: "PlaybackScheduler") -> None:
+        if scheduler in self.schedulers:
+            self.schedulers.remove(scheduler)
+
+        if not self.schedulers and self.after_id is not None:
+            self.widget.after_cancel(self.after_id)
+            self.after_id = None
+            self.wake_at = None
+
+    def wake(self) -> None:
+        if not self.schedulers:
+            return
+
+        deadline = min(scheduler.deadline for scheduler in self.schedulers)
+
+        # one timer for every document, always set for the earliest frame that is due
+        if self.after_id is not None:
+            if self.wake_at is not None and self.wake_at <= deadline:
+                return
+
+            self.widget.after_cancel(self.after_id)
+
+        self.wake_at = deadline
+        self.after_id = self.widget.after(max(0, round((deadline - monotonic()) * 1000)), self.tick)
+
+    def tick(self) -> None:
+        self.after_id = None
+        self.wake_at = None
+
+        now = monotonic()
+
+        # one document failing to draw is taken off the clock, and the others keep their timer
+        try:
+            for scheduler in [scheduler for scheduler in self.schedulers if scheduler.deadline <= now]:
+                if scheduler in self.schedulers:
+                    try:
+                        scheduler.tick()
+
+                    except Exception:
+                        scheduler.stop()
+                        raise
+
+        finally:
+            self.wake()
+
+
+class PlaybackScheduler():
+
+    clock: PlaybackClock
+    show: Callable[[int], None]
+    get_delay: Callable[[int], float]
+    get_n_frames: Callable[[], int]
+
+    index: int
+    deadline: float
+    running: bool
+    n_dropped: int
+    late: float
+    dropped: int
+
+    def __init__(self, widget: Misc, show: Callable[[int], None], get_delay: Callable[[int], float], get_n_frames: Callable[[], int], clock: PlaybackClock | None = None) -> None:
+        self.clock = clock if clock is not None else PlaybackClock(widget)
+        self.show = show
+        self.get_delay = get_delay
+        self.get_n_frames = get_n_frames
+
+        self.index = 0
+        self.deadline = 0.0
+        self.running = False
+        self.n_dropped = 0
+        self.late = 0.0
+        self.dropped = 0
+
+    def is_running(self) -> bool:
+        return self.running
+
+    def start(self, index: int) -> None:
+        self.stop()
+
+        self.index = index
+        self.deadline = monotonic()
+        self.running = True
+        self.clock.add(self)
+
+    def stop(self) -> None:
+        if self.running:
+            self.running = False
+            self.clock.remove(self)
+
+    def tick(self) -> None:
+        if (n_frames := self.get_n_frames()) == 0:
+            self.stop()
+            return
+
+        index = self.index % n_frames
+        now = monotonic()
+        dropped = 0
+
+        # a frame whose whole display slot has already passed is dropped
+        for _ in range(n_frames - 1):
+            delay = self.get_delay(index)
+
+            if now < self.deadline + delay:
+                break
+
+            self.deadline += delay
+            index = (index + 1) % n_frames
+            dropped += 1
+
+        self.late = now - self.deadline
+        self.dropped = dropped
+        self.n_dropped += dropped
+
+        if now - self.deadline > self.get_delay(index) * n_frames:
+            self.deadline = now
+
+        self.show(index)
+
+        self.deadline += self.get_delay(index)
+        self.index = (index + 1) % n_frames
\ No newline at end of file
@@ -0,0 +1,83 @@
+from tempfile import TemporaryFile
+from threading import Lock
+from typing import BinaryIO, NamedTuple
+from PIL import Image
+
+
+class SpillEntry(NamedTuple):
+    offset: int
+    length: int
+    mode: str
+    size: tuple[int, int]
+    palette: bytes | None
+    transparency: int | bytes | None
+
+
+class SpillStore():
+
+    file: BinaryIO | None
+    entries: dict[int, SpillEntry]
+    end: int
+    next_key: int
+    lock: Lock
+
+    def __init__(self) -> None:
+        self.file = None
+        self.entries = {}
+        self.end = 0
+        self.next_key = 0
+        self.lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get_bytes(self) -> int:
+        return sum(entry.length for entry in self.entries.values())
+
+    def put(self, image: Image.Image) -> int:
+        if image.mode not in ("1", "L", "P", "RGB", "RGBA"):
+            image = image.convert("RGBA")
+
+        data = image.tobytes()
+        palette = bytes(image.getpalette()) if image.mode == "P" else None
+
+        with self.lock:
+            if self.file is None:
+                self.file = TemporaryFile(prefix="tk-gif-player-")
+
+            self.file.seek(self.end)
+            self.file.write(data)
+
+            key = self.next_key
+            self.entries[key] = SpillEntry(self.end, len(data), image.mode, image.size, palette, image.info.get("transparency"))
+
+            self.end += len(data)
+            self.next_key += 1
+
+        return key
+
+    def get(self, key: int) -> Image.Image:
+        with self.lock:
+            entry = self.entries[key]
+
+            self.file.seek(entry.offset)
+            data = self.file.read(entry.length)
+
+        image = Image.frombytes(entry.mode, entry.size, data)
+
+        if entry.palette is not None:
+            image.putpalette(entry.palette)
+
+        if entry.transparency is not None:
+            image.info["transparency"] = entry.transparency
+
+        return image
+
+    def clear(self) -> None:
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+
+            self.file = None
+            self.entries = {}
+            self.end = 0
\ No newline at end of file
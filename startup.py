@@ -0,0 +1,42 @@
+from time import perf_counter
+import sys
+
+# imported first by view.py, so this is as close to the start of the process as the app gets
+STARTED = perf_counter()
+
+
+class StartupProfile():
+
+    enabled: bool
+    marks: list[tuple[str, float]]
+    n_reported: int
+
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self.marks = []
+        self.n_reported = 0
+
+    def mark(self, name: str) -> None:
+        self.marks.append((name, perf_counter()))
+
+    def format(self, start: int = 0) -> str:
+        lines = []
+
+        for i in range(start, len(self.marks)):
+            name, at = self.marks[i]
+            last = self.marks[i - 1][1] if i > 0 else STARTED
+
+            lines.append(f"{name:<20}{(at - last) * 1000:8.1f}ms{(at - STARTED) * 1000:9.1f}ms")
+
+        return "\n".join(lines)
+
+    def report(self) -> None:
+        if not self.enabled or self.n_reported == len(self.marks):
+            return
+
+        if self.n_reported == 0:
+            print("startup profile: step, since the previous step, since start", file=sys.stderr)
+
+        print(self.format(self.n_reported), file=sys.stderr)
+
+        self.n_reported = len(self.marks)
\ No newline at end of file
@@ -0,0 +1,161 @@
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import BinaryIO, Iterable
+from zlib import compressobj, crc32
+from PIL import Image, ImageChops
+
+from gifencoder import GifEncoder, Palette
+
+
+class StreamWriter(ABC):
+
+    fp: BinaryIO
+    size: tuple[int, int]
+
+    def __init__(self, fp: BinaryIO, size: tuple[int, int]) -> None:
+        self.fp = fp
+        self.size = size
+
+    @abstractmethod
+    def add_frame(self, image: Image.Image, duration: int) -> None:
+        pass
+
+    @abstractmethod
+    def close(self) -> None:
+        pass
+
+
+class GifStreamWriter(StreamWriter):
+
+    encoder: GifEncoder
+
+    def __init__(self, fp: BinaryIO, size: tuple[int, int], palette: Palette, loop: int | None = 0, comment: str | None = None) -> None:
+        super().__init__(fp, size)
+
+        self.encoder = GifEncoder(fp, size, palette, loop, comment)
+
+    def add_frame(self, image: Image.Image, duration: int) -> None:
+        self.encoder.add_frame(image, duration)
+
+    def close(self) -> None:
+        self.encoder.close()
+
+
+class ApngStreamWriter(StreamWriter):
+
+    n_frames: int | None
+    loop: int
+    sequence: int
+    written: int
+    actl_offset: int
+    before: Image.Image | None
+    level: int
+
+    def __init__(self, fp: BinaryIO, size: tuple[int, int], n_frames: int | None = None, loop: int = 0, level: int = 6) -> None:
+        super().__init__(fp, size)
+
+        self.n_frames = n_frames
+        self.loop = loop
+        self.sequence = 0
+        self.written = 0
+        self.before = None
+        self.level = level
+
+        self.fp.write(b"\x89PNG\r\n\x1a\n")
+        self.write_chunk(b"IHDR", size[0].to_bytes(4, "big") + size[1].to_bytes(4, "big") + bytes((8, 6, 0, 0, 0)))
+
+        self.actl_offset = self.fp.tell()
+        self.write_chunk(b"acTL", (self.n_frames or 0).to_bytes(4, "big") + loop.to_bytes(4, "big"))
+
+    def write_chunk(self, kind: bytes, data: bytes) -> None:
+        self.fp.write(len(data).to_bytes(4, "big") + kind + data + crc32(kind + data).to_bytes(4, "big"))
+
+    def add_frame(self, image: Image.Image, duration: int) -> None:
+        image = image.convert("RGBA")
+
+        if self.before is None:
+            box = (0, 0) + self.size
+
+        else:
+            box = ImageChops.difference(image, self.before).getbbox(alpha_only=False) or (0, 0, 1, 1)
+
+        x, y = box[:2]
+        patch = image.crop(box)
+
+        self.write_chunk(b"fcTL", b"".join((
+            self.sequence.to_bytes(4, "big"),
+            patch.width.to_bytes(4, "big"), patch.height.to_bytes(4, "big"),
+            x.to_bytes(4, "big"), y.to_bytes(4, "big"),
+            min(duration, 0xFFFF).to_bytes(2, "big"), (1000).to_bytes(2, "big"),
+            bytes((0, 0)),
+        )))
+        self.sequence += 1
+
+        data = self.compress(patch)
+
+        if self.written == 0:
+            self.write_chunk(b"IDAT", data)
+
+        else:
+            self.write_chunk(b"fdAT", self.sequence.to_bytes(4, "big") + data)
+            self.sequence += 1
+
+        self.before = image
+        self.written += 1
+
+    def compress(self, image: Image.Image) -> bytes:
+        raw = image.tobytes()
+        stride = image.width * 4
+
+        compressor = compressobj(self.level)
+        data = b"".join(compressor.compress(b"\x00" + raw[i:i + stride]) for i in range(0, len(raw), stride))
+
+        return data + compressor.flush()
+
+    def close(self) -> None:
+        # without a single IDAT the file is not a PNG at all
+        if self.written == 0:
+            raise ValueError("An APNG needs at least one frame.")
+
+        self.write_chunk(b"IEND", b"")
+
+        if self.written != self.n_frames:
+            end = self.fp.tell()
+
+            self.fp.seek(self.actl_offset)
+            self.write_chunk(b"acTL", self.written.to_bytes(4, "big") + self.loop.to_bytes(4, "big"))
+            self.fp.seek(end)
+
+
+def open_writer(fp: BinaryIO, path: Path, size: tuple[int, int], n_frames: int | None = None, palette: Palette | None = None, loop: int = 0, comment: str | None = None) -> StreamWriter:
+    if path.suffix.lower() in (".apng", ".png"):
+        return ApngStreamWriter(fp, size, n_frames, loop)
+
+    if palette is None:
+        raise ValueError("A GIF stream needs a palette.")
+
+    return GifStreamWriter(fp, size, palette, loop, comment)
+
+
+def save_animation(path: Path, frames: Iterable[tuple[Image.Image, int]], size: tuple[int, int], n_frames: int | None = None, palette: Palette | None = None, loop: int = 0, comment: str | None = None) -> int:
+    # written beside the target first, the source may be the very file being replaced
+    tmp = path.with_name(path.name + ".tmp")
+
+    try:
+        with open(tmp, "wb") as fp:
+            writer = open_writer(fp, path, size, n_frames, palette, loop, comment)
+
+            written = 0
+
+            for image, duration in frames:
+                writer.add_frame(image, duration)
+                written += 1
+
+            writer.close()
+
+        tmp.replace(path)
+
+    finally:
+        tmp.unlink(missing_ok=True)
+
+    return written
\ No newline at end of file
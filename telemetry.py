@@ -0,0 +1,124 @@
+from pathlib import Path
+from collections import deque
+from time import perf_counter
+from typing import NamedTuple, Any
+import csv
+import json
+
+STAGES = ("decode", "photo", "canvas", "sync")
+
+JITTER_BINS = (1, 2, 4, 8, 16, 33, 66)
+
+
+class FrameSample(NamedTuple):
+    index: int
+    shown_at: float
+    target: float
+    late: float
+    dropped: int
+    decode: float
+    photo: float
+    canvas: float
+    sync: float
+
+
+class PlaybackTelemetry():
+
+    enabled: bool
+    samples: deque[FrameSample]
+    current: dict[str, float]
+    n_frames: int
+    n_dropped: int
+    histogram: list[int]
+    totals: dict[str, float]
+
+    def __init__(self, max_samples: int = 10000) -> None:
+        self.enabled = False
+        self.samples = deque(maxlen=max_samples)
+        self.current = dict.fromkeys(STAGES, 0.0)
+
+        self.reset()
+
+    def reset(self) -> None:
+        self.samples.clear()
+        self.n_frames = 0
+        self.n_dropped = 0
+        self.histogram = [0] * (len(JITTER_BINS) + 1)
+        self.totals = dict.fromkeys(STAGES, 0.0)
+
+    def set_enabled(self, enabled: bool) -> None:
+        self.enabled = enabled
+
+        self.reset()
+
+    def begin_frame(self) -> None:
+        for stage in STAGES:
+            self.current[stage] = 0.0
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.current[stage] += seconds
+
+    def end_frame(self, index: int, target: float, late: float, dropped: int) -> None:
+        if not self.enabled:
+            return
+
+        self.samples.append(FrameSample(index, perf_counter(), target, late, dropped, *(self.current[stage] for stage in STAGES)))
+
+        self.n_frames += 1
+        self.n_dropped += dropped
+
+        for stage in STAGES:
+            self.totals[stage] += self.current[stage]
+
+        late_ms = abs(late) * 1000
+
+        for i, edge in enumerate(JITTER_BINS):
+            if late_ms < edge:
+                self.histogram[i] += 1
+                break
+
+        else:
+            self.histogram[-1] += 1
+
+    def get_histogram(self) -> list[tuple[str, int]]:
+        labels = [f"<{edge}ms" for edge in JITTER_BINS] + [f">={JITTER_BINS[-1]}ms"]
+
+        return list(zip(labels, self.histogram))
+
+    def get_summary(self) -> dict[str, Any]:
+        samples = self.samples
+
+        if len(samples) >= 2 and (elapsed := samples[-1].shown_at - samples[0].shown_at) > 0:
+            achieved_fps = (len(samples) - 1) / elapsed
+
+        else:
+            achieved_fps = 0.0
+
+        target = sum(sample.target for sample in samples) / len(samples) if samples else 0.0
+        lates = [abs(sample.late) for sample in samples]
+
+        return {
+            "frames": self.n_frames,
+            "dropped": self.n_dropped,
+            "achieved_fps": achieved_fps,
+            "target_fps": 1 / target if target else 0.0,
+            "mean_jitter_ms": 1000 * sum(lates) / len(lates) if lates else 0.0,
+            "max_jitter_ms": 1000 * max(lates, default=0.0),
+            "stage_ms": {stage: 1000 * self.totals[stage] / self.n_frames if self.n_frames else 0.0 for stage in STAGES},
+            "histogram": dict(self.get_histogram()),
+        }
+
+    def export(self, path: Path) -> None:
+        if path.suffix.lower() == ".json":
+            data = {
+                "summary": self.get_summary(),
+                "samples": [sample._asdict() for sample in self.samples],
+            }
+
+            path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+        else:
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(FrameSample._fields)
+                writer.writerows(self.samples)
\ No newline at end of file
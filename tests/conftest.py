@@ -0,0 +1,51 @@
+import sys
+from pathlib import Path
+from typing import Callable
+from PIL import Image, ImageDraw, ImageSequence
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+SIZE = (24, 16)
+N_FRAMES = 8
+
+
+def draw_frames(n_frames: int = N_FRAMES, transparent: bool = False) -> list[Image.Image]:
+    frames = []
+
+    # a small moving block, so that the writer stores most frames as sub-rectangles
+    for i in range(n_frames):
+        image = Image.new("RGBA", SIZE, (0, 0, 0, 0) if transparent else (20, 40, 60, 255))
+        ImageDraw.Draw(image).rectangle((i * 2, i, i * 2 + 5, i + 4), fill=(200, 30 * i % 256, 90, 255))
+
+        frames.append(image if transparent else image.convert("RGB"))
+
+    return frames
+
+
+def flatten(image: Image.Image) -> list[bytes]:
+    data = image.convert("RGBA").tobytes()
+
+    # fully transparent pixels are equal whatever colour they carry
+    return [data[i:i + 4] if data[i + 3] else bytes(4) for i in range(0, len(data), 4)]
+
+
+def decode(path: Path) -> list[list[bytes]]:
+    with Image.open(path) as image:
+        return [flatten(frame) for frame in ImageSequence.Iterator(image)]
+
+
+@pytest.fixture
+def make_gif(tmp_path: Path) -> Callable[..., Path]:
+    def make(disposal: int = 1, transparent: bool = False, name: str = "source.gif") -> Path:
+        path = tmp_path / name
+        frames = draw_frames(transparent=transparent)
+
+        # a "restore to previous" first frame has nothing to restore to, the rest of the frames carry it
+        disposals = [1] + [disposal] * (len(frames) - 1) if disposal == 3 else disposal
+
+        frames[0].save(path, save_all=True, append_images=frames[1:], duration=[30 + i * 10 for i in range(len(frames))], disposal=disposals, loop=0)
+
+        return path
+
+    return make
\ No newline at end of file
@@ -0,0 +1,62 @@
+from typing import Callable
+import pytest
+
+from bulk import decimate_order, delete_order, duplicate_order, move_order, reverse_order
+
+
+@pytest.mark.parametrize("indices, to, expected", [
+    ([2, 3], 0, [2, 3, 0, 1, 4, 5]),
+    ([2, 3], 4, [0, 1, 4, 5, 2, 3]),
+    ([3, 1], 1, [0, 1, 3, 2, 4, 5]),
+    ([0, 5], 2, [1, 2, 0, 5, 3, 4]),
+    ([4], -3, [4, 0, 1, 2, 3, 5]),
+    ([1], 99, [0, 2, 3, 4, 5, 1]),
+])
+def test_move_order(indices: list[int], to: int, expected: list[int]) -> None:
+    assert move_order(6, indices, to) == expected
+
+
+@pytest.mark.parametrize("indices, expected", [
+    ([1, 4], [0, 2, 3, 5]),
+    ([4, 1, 1], [0, 2, 3, 5]),
+    ([0, 1, 2, 3, 4, 5], []),
+])
+def test_delete_order(indices: list[int], expected: list[int]) -> None:
+    assert delete_order(6, indices) == expected
+
+
+@pytest.mark.parametrize("indices, expected", [
+    ([2], [0, 1, 2, 2, 3, 4, 5]),
+    ([3, 1], [0, 1, 2, 3, 1, 3, 4, 5]),
+    ([5], [0, 1, 2, 3, 4, 5, 5]),
+])
+def test_duplicate_order(indices: list[int], expected: list[int]) -> None:
+    assert duplicate_order(6, indices) == expected
+
+
+@pytest.mark.parametrize("indices, expected", [
+    ([1, 2, 3], [0, 3, 2, 1, 4, 5]),
+    ([0, 5], [5, 1, 2, 3, 4, 0]),
+    ([4, 1, 2], [0, 4, 2, 3, 1, 5]),
+    ([2], [0, 1, 2, 3, 4, 5]),
+])
+def test_reverse_order(indices: list[int], expected: list[int]) -> None:
+    assert reverse_order(6, indices) == expected
+
+
+@pytest.mark.parametrize("indices, step, expected, groups", [
+    ([0, 1, 2, 3, 4, 5], 2, [0, 2, 4], {0: [0, 1], 2: [2, 3], 4: [4, 5]}),
+    ([1, 2, 3, 4], 3, [0, 1, 4, 5], {1: [1, 2, 3], 4: [4]}),
+    ([5, 3, 1], 2, [0, 1, 2, 4, 5], {1: [1, 3], 5: [5]}),
+])
+def test_decimate_order(indices: list[int], step: int, expected: list[int], groups: dict[int, list[int]]) -> None:
+    assert decimate_order(6, indices, step) == (expected, groups)
+
+
+@pytest.mark.parametrize("order", [
+    lambda indices: move_order(6, indices, 3),
+    lambda indices: reverse_order(6, indices),
+])
+def test_reorders_keep_every_frame_once(order: Callable[[list[int]], list[int]]) -> None:
+    for indices in ([0], [1, 4], [0, 2, 5], [0, 1, 2, 3, 4, 5]):
+        assert sorted(order(indices)) == list(range(6))
\ No newline at end of file
@@ -0,0 +1,97 @@
+from pathlib import Path
+from typing import Callable
+import pytest
+
+from conftest import N_FRAMES, SIZE, decode, flatten
+from core import GifCore
+from frames import SeekIndex, FrameSource, scan_gif
+
+
+@pytest.mark.parametrize("transparent", [False, True])
+@pytest.mark.parametrize("disposal", [0, 1, 2, 3])
+def test_scan_gif(make_gif: Callable[..., Path], disposal: int, transparent: bool) -> None:
+    size, infos = scan_gif(make_gif(disposal, transparent))
+
+    assert size == SIZE
+    assert len(infos) == N_FRAMES
+    assert [info.duration for info in infos] == [30 + i * 10 for i in range(N_FRAMES)]
+    assert infos[-1].disposal == disposal
+    assert all(info.start <= info.descriptor < info.end for info in infos)
+
+    if transparent:
+        assert all(info.transparency is not None for info in infos)
+
+
+def test_scan_gif_rejects_other_files(tmp_path: Path) -> None:
+    path = tmp_path / "not.gif"
+    path.write_bytes(b"\x89PNG\r\n\x1a\n" + bytes(32))
+
+    with pytest.raises(ValueError):
+        scan_gif(path)
+
+
+@pytest.mark.parametrize("transparent", [False, True])
+@pytest.mark.parametrize("disposal", [0, 1, 2, 3])
+def test_seek_index_matches_sequential_decode(make_gif: Callable[..., Path], disposal: int, transparent: bool) -> None:
+    path = make_gif(disposal, transparent)
+    index = SeekIndex(path, interval=3)
+
+    try:
+        # backwards, so every frame is rebuilt from a checkpoint rather than from the cursor
+        frames = [flatten(index.get(i)) for i in reversed(range(N_FRAMES))][::-1]
+
+    finally:
+        index.close()
+
+    assert frames == decode(path)
+
+
+@pytest.mark.parametrize("order", [[0, 5, 2, 7, 1], [7, 6, 5, 4], [3, 3, 4]])
+def test_frame_source_random_access(make_gif: Callable[..., Path], order: list[int]) -> None:
+    path = make_gif(3, True)
+    expected = decode(path)
+    source = FrameSource(path, cache_size=2, checkpoint_interval=3)
+
+    try:
+        assert source.n_frames == N_FRAMES
+        assert [flatten(source.get(i)) for i in order] == [expected[i] for i in order]
+
+    finally:
+        source.close()
+
+
+@pytest.mark.parametrize("transparent", [False, True])
+@pytest.mark.parametrize("disposal", [1, 2, 3])
+def test_lazy_and_eager_loading_agree(make_gif: Callable[..., Path], disposal: int, transparent: bool) -> None:
+    path = make_gif(disposal, transparent)
+    loaded = []
+
+    for lazy in (False, True):
+        core = GifCore()
+        core.set_lazy(lazy)
+        core.load_gif(path)
+
+        loaded.append(([flatten(core.get_image(i)) for i in range(core.n_frames)], [core.get_frame_duration(i) for i in range(core.n_frames)]))
+
+    assert loaded[0] == loaded[1]
+    assert loaded[0][0] == decode(path)
+
+@pytest.mark.parametrize("lazy", [False, True])
+@pytest.mark.parametrize("fraction", [0.34, 0.67, 0.99])
+def test_truncated_file_stops_at_last_whole_frame(make_gif: Callable[..., Path], tmp_path: Path, fraction: float, lazy: bool) -> None:
+    path = make_gif(1, True)
+    data = path.read_bytes()
+
+    cut = tmp_path / "cut.gif"
+    cut.write_bytes(data[:int(len(data) * fraction)])
+
+    _, infos = scan_gif(cut)
+
+    assert 0 < len(infos) < N_FRAMES
+    assert infos[-1].end <= len(data) * fraction
+
+    core = GifCore()
+    core.set_lazy(lazy)
+    core.load_gif(cut)
+
+    assert [flatten(core.get_image(i)) for i in range(core.n_frames)] == decode(path)[:core.n_frames]
\ No newline at end of file
@@ -0,0 +1,152 @@
+from pathlib import Path
+from typing import Callable
+from PIL import Image
+import pytest
+
+from conftest import N_FRAMES, SIZE, decode, flatten
+from core import GifCore
+from frames import scan_gif
+from gifsplice import GifOrigin, save_spliced
+from jobs import JobCancelled
+
+
+def load(path: Path, lazy: bool) -> GifCore:
+    core = GifCore()
+    core.set_lazy(lazy)
+    core.load_gif(path)
+
+    return core
+
+
+def expected(core: GifCore) -> tuple[list[list[bytes]], list[int]]:
+    return [flatten(core.get_image(i)) for i in range(core.n_frames)], [core.get_frame_duration(i) for i in range(core.n_frames)]
+
+
+def saved(path: Path) -> tuple[list[list[bytes]], list[int]]:
+    return decode(path), [info.duration for info in scan_gif(path)[1]]
+
+
+@pytest.mark.parametrize("disposal", [0, 1, 2, 3])
+def test_origin_is_copyable_only_without_restore_disposals(make_gif: Callable[..., Path], disposal: int) -> None:
+    origin = GifOrigin(make_gif(disposal))
+
+    assert origin.is_copyable(SIZE) == (disposal in (0, 1))
+    assert not origin.is_copyable((SIZE[0] + 1, SIZE[1]))
+
+
+def test_origin_is_not_copyable_once_the_file_changes(make_gif: Callable[..., Path]) -> None:
+    path = make_gif()
+    origin = GifOrigin(path)
+
+    path.write_bytes(path.read_bytes() + b"\0")
+
+    assert not origin.is_copyable(SIZE)
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+@pytest.mark.parametrize("transparent", [False, True])
+def test_unedited_save_copies_every_frame(make_gif: Callable[..., Path], tmp_path: Path, transparent: bool, lazy: bool) -> None:
+    path = make_gif(1, transparent)
+    core = load(path, lazy)
+    out = tmp_path / "out.gif"
+
+    written, copied = save_spliced(out, core.origin, core.iter_spliced_frames())
+
+    assert (written, copied) == (N_FRAMES, N_FRAMES)
+    assert saved(out) == saved(path)
+
+
+def edit_delete(core: GifCore) -> None:
+    core.delete_frames([2, 5])
+
+
+def edit_insert(core: GifCore) -> None:
+    core.ins_frame(4, Image.new("RGB", SIZE, (9, 9, 9)), 50)
+
+
+def edit_insert_and_delete(core: GifCore) -> None:
+    core.delete_frames([2])
+    core.ins_frame(0, Image.new("RGBA", SIZE, (0, 0, 0, 0)), 70)
+    core.ins_frame("end", Image.new("RGB", SIZE, (250, 250, 250)), 20)
+
+
+def edit_reverse(core: GifCore) -> None:
+    core.reorder(list(reversed(range(core.n_frames))))
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+@pytest.mark.parametrize("transparent", [False, True])
+@pytest.mark.parametrize("edit", [edit_delete, edit_insert, edit_insert_and_delete, edit_reverse])
+def test_spliced_save_after_edit(make_gif: Callable[..., Path], tmp_path: Path, edit: Callable[[GifCore], None], transparent: bool, lazy: bool) -> None:
+    core = load(make_gif(1, transparent), lazy)
+    edit(core)
+
+    out = tmp_path / "out.gif"
+
+    assert core.can_splice(out)
+
+    written, copied = save_spliced(out, core.origin, core.iter_spliced_frames())
+
+    assert written == core.n_frames
+    assert copied < written
+
+    # the untouched runs between the edits are still copied
+    if edit is not edit_reverse:
+        assert copied > 0
+    assert saved(out) == expected(core)
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+@pytest.mark.parametrize("transparent", [False, True])
+@pytest.mark.parametrize("disposal", [2, 3])
+def test_restore_disposals_are_encoded(make_gif: Callable[..., Path], tmp_path: Path, disposal: int, transparent: bool, lazy: bool) -> None:
+    core = load(make_gif(disposal, transparent), lazy)
+    edit_insert_and_delete(core)
+
+    out = tmp_path / "out.gif"
+
+    assert not core.can_splice(out)
+    assert core.save_as_gif(out) == core.n_frames
+    assert saved(out) == expected(core)
+
+
+@pytest.mark.parametrize("disposal", [1, 2])
+def test_save_over_the_lazily_opened_source(make_gif: Callable[..., Path], disposal: int) -> None:
+    path = make_gif(disposal)
+    core = load(path, True)
+    edit_delete(core)
+    before = expected(core)
+
+    assert core.save_as_gif(path) == core.n_frames
+    assert saved(path) == before
+    assert [p.name for p in path.parent.iterdir()] == [path.name]
+
+
+def test_cancelled_save_keeps_the_target(make_gif: Callable[..., Path]) -> None:
+    path = make_gif(2)
+    core = load(path, True)
+    original = path.read_bytes()
+
+    def progress(done: int, total: int) -> None:
+        if done == 4:
+            raise JobCancelled("save")
+
+    with pytest.raises(JobCancelled):
+        core.save_as_gif(path, progress)
+
+    assert path.read_bytes() == original
+    assert [p.name for p in path.parent.iterdir()] == [path.name]
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_fps_override_does_not_change_saved_durations(make_gif: Callable[..., Path], tmp_path: Path, lazy: bool) -> None:
+    path = make_gif()
+    core = load(path, lazy)
+    core.set_fps(5)
+    core.set_fps_override(True)
+    out = tmp_path / "out.gif"
+
+    save_spliced(out, core.origin, core.iter_spliced_frames())
+    core.decimate_frames(list(range(N_FRAMES)), 2)
+
+    assert saved(out) == saved(path)
+    assert [core.get_frame_duration(i) for i in range(core.n_frames)] == [30 + i * 10 + 40 + i * 10 for i in range(0, N_FRAMES, 2)]
\ No newline at end of file
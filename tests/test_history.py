@@ -0,0 +1,131 @@
+from pathlib import Path
+from typing import Callable
+from PIL import Image
+import pytest
+
+from conftest import N_FRAMES, SIZE
+from core import GifCore
+from frames import Frame
+from history import History, Splice, diff_frames
+
+
+def make_frames(n_frames: int) -> list[Frame]:
+    return [Frame(image=Image.new("RGBA", SIZE), name=f"frame_{i}") for i in range(n_frames)]
+
+
+def test_diff_of_the_same_frames_is_none() -> None:
+    frames = make_frames(4)
+
+    assert diff_frames(frames, list(frames)) is None
+
+
+@pytest.mark.parametrize("edit, expected", [
+    (lambda frames: frames[:2] + frames[3:], (2, (2,), ())),
+    (lambda frames: frames[:1] + make_frames(2) + frames[1:], (1, (), (None, None))),
+    (lambda frames: frames[:1] + [frames[2], frames[1]] + frames[3:], (1, (1, 2), (2, 1))),
+    (lambda frames: frames + make_frames(1), (5, (), (None,))),
+    (lambda frames: [], (0, (0, 1, 2, 3, 4), ())),
+])
+def test_diff_covers_only_the_changed_run(edit: Callable[[list[Frame]], list[Frame]], expected: tuple[int, tuple[int, ...], tuple[int | None, ...]]) -> None:
+    before = make_frames(5)
+    after = edit(list(before))
+
+    splice = diff_frames(before, after)
+    index, removed, inserted = expected
+
+    assert splice is not None
+    assert splice.index == index
+    assert splice.removed == tuple(before[i] for i in removed)
+    assert len(splice.inserted) == len(inserted)
+    assert all(frame is before[i] for frame, i in zip(splice.inserted, inserted) if i is not None)
+    assert before[:splice.index] + list(splice.inserted) + before[splice.index + len(splice.removed):] == after
+
+
+def test_undo_and_redo_restore_every_step(make_gif: Callable[..., Path]) -> None:
+    core = GifCore()
+    core.load_gif(make_gif())
+
+    steps = [list(core.images)]
+
+    for edit in (
+        lambda: core.delete_frames([1, 4]),
+        lambda: core.replace_frame(0, 3),
+        lambda: core.ins_frame(2, Image.new("RGBA", SIZE), 50, "inserted"),
+        lambda: core.reverse_frames([0, 1, 2]),
+        lambda: core.duplicate_frames([5]),
+        lambda: core.del_frame(0),
+    ):
+        edit()
+        steps.append(list(core.images))
+
+    for expected in reversed(steps[:-1]):
+        assert core.undo() is not None
+        assert core.images == expected
+        assert core.n_frames == len(expected)
+
+    assert core.undo() is None
+
+    for expected in steps[1:]:
+        assert core.redo() is not None
+        assert core.images == expected
+
+    assert core.redo() is None
+
+
+def test_new_edit_drops_the_redo_steps(make_gif: Callable[..., Path]) -> None:
+    core = GifCore()
+    core.load_gif(make_gif())
+
+    core.delete_frames([0])
+    core.undo()
+    core.delete_frames([1])
+
+    assert core.redo() is None
+    assert core.n_frames == N_FRAMES - 1
+
+
+def test_group_folds_appends_into_one_splice() -> None:
+    history = History()
+    frames = make_frames(3)
+
+    history.begin("import")
+
+    for i, frame in enumerate(frames):
+        history.record("insert", Splice(i, (), (frame,)))
+
+    history.end()
+
+    command = history.undo()
+
+    assert command is not None
+    assert command.splices == [Splice(0, (), tuple(frames))]
+    assert history.undo() is None
+
+
+def test_empty_group_is_not_recorded() -> None:
+    history = History()
+
+    history.begin("transform")
+    history.record_size("transform", SIZE, SIZE)
+    history.end()
+
+    assert history.undo() is None
+
+
+def test_step_limit_drops_the_oldest_commands() -> None:
+    history = History(max_steps=2)
+
+    for i, frame in enumerate(make_frames(3)):
+        history.record(f"insert_{i}", Splice(i, (), (frame,)))
+
+    assert [command.name for command in history.undo_stack] == ["insert_1", "insert_2"]
+
+
+def test_byte_limit_keeps_the_newest_command() -> None:
+    history = History(max_steps=None, max_bytes=1)
+
+    for i, frame in enumerate(make_frames(3)):
+        history.record(f"delete_{i}", Splice(0, (frame,), ()))
+
+    assert [command.name for command in history.undo_stack] == ["delete_2"]
+    assert history.get_bytes() > 1
\ No newline at end of file
@@ -0,0 +1,157 @@
+from typing import Callable
+import pytest
+
+import scheduler
+from scheduler import PlaybackClock, PlaybackScheduler
+
+
+class FakeWidget():
+
+    timers: dict[str, tuple[int, Callable[[], None]]]
+    n_timers: int
+
+    def __init__(self) -> None:
+        self.timers = {}
+        self.n_timers = 0
+
+    def after(self, ms: int, func: Callable[[], None]) -> str:
+        self.n_timers += 1
+        self.timers[f"after#{self.n_timers}"] = (ms, func)
+
+        return f"after#{self.n_timers}"
+
+    def after_cancel(self, after_id: str) -> None:
+        del self.timers[after_id]
+
+    def fire(self) -> None:
+        after_id = min(self.timers, key=lambda after_id: self.timers[after_id][0])
+        _, func = self.timers.pop(after_id)
+
+        func()
+
+
+class FakeTime():
+
+    now: float
+
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeTime:
+    time = FakeTime()
+    monkeypatch.setattr(scheduler, "monotonic", time)
+
+    return time
+
+
+def make_scheduler(n_frames: int = 5, delay: float = 0.1, clock: PlaybackClock | None = None) -> tuple[PlaybackScheduler, list[int]]:
+    shown = []
+
+    return PlaybackScheduler(FakeWidget(), shown.append, lambda index: delay, lambda: n_frames, clock), shown
+
+
+def test_on_time_ticks_show_every_frame(clock: FakeTime) -> None:
+    player, shown = make_scheduler()
+    player.start(3)
+
+    for _ in range(6):
+        player.tick()
+        clock.now += 0.1
+
+    assert shown == [3, 4, 0, 1, 2, 3]
+    assert player.n_dropped == 0
+
+
+def test_late_tick_drops_the_frames_whose_slot_passed(clock: FakeTime) -> None:
+    player, shown = make_scheduler()
+    player.start(0)
+    player.tick()
+
+    clock.now += 0.35
+    player.tick()
+
+    assert shown == [0, 3]
+    assert player.dropped == 2
+    assert player.late == pytest.approx(0.05)
+
+    # the frame after the late one keeps the original timeline
+    clock.now = 100.4
+    player.tick()
+
+    assert shown == [0, 3, 4]
+    assert player.dropped == 0
+    assert player.n_dropped == 2
+
+
+def test_far_behind_drops_less_than_a_loop_and_resyncs(clock: FakeTime) -> None:
+    player, shown = make_scheduler()
+    player.start(0)
+    player.tick()
+
+    clock.now += 10.0
+    player.tick()
+
+    assert shown == [0, 0]
+    assert player.dropped == 4
+    assert player.deadline == pytest.approx(clock.now + 0.1)
+
+
+def test_no_frames_stops_the_scheduler(clock: FakeTime) -> None:
+    playback = PlaybackClock(FakeWidget())
+    player, shown = make_scheduler(0, clock=playback)
+    player.start(0)
+
+    player.tick()
+
+    assert not player.is_running()
+    assert shown == []
+    assert playback.schedulers == []
+    assert playback.widget.timers == {}
+
+
+def test_clock_keeps_one_timer_for_the_earliest_deadline(clock: FakeTime) -> None:
+    widget = FakeWidget()
+    playback = PlaybackClock(widget)
+
+    slow, slow_shown = make_scheduler(delay=0.5, clock=playback)
+    fast, fast_shown = make_scheduler(delay=0.1, clock=playback)
+    slow.start(0)
+    fast.start(0)
+
+    assert len(widget.timers) == 1
+
+    widget.fire()
+
+    assert (slow_shown, fast_shown) == ([0], [0])
+    assert [ms for ms, _ in widget.timers.values()] == [100]
+
+    clock.now += 0.1
+    widget.fire()
+
+    assert (slow_shown, fast_shown) == ([0], [0, 1])
+    assert len(widget.timers) == 1
+
+
+def test_clock_stops_a_failing_scheduler_and_keeps_the_others(clock: FakeTime) -> None:
+    widget = FakeWidget()
+    playback = PlaybackClock(widget)
+
+    def fail(index: int) -> None:
+        raise RuntimeError("draw failed")
+
+    broken = PlaybackScheduler(widget, fail, lambda index: 0.1, lambda: 5, playback)
+    player, shown = make_scheduler(clock=playback)
+    broken.start(0)
+    player.start(0)
+
+    with pytest.raises(RuntimeError):
+        widget.fire()
+
+    assert not broken.is_running()
+    assert playback.schedulers == [player]
+    assert len(widget.timers) == 1
\ No newline at end of file
@@ -0,0 +1,31 @@
+from pathlib import Path
+from PIL import Image
+import pytest
+
+from conftest import N_FRAMES, SIZE, draw_frames, flatten
+from streamwriter import save_animation
+
+
+def test_apng_round_trip(tmp_path: Path) -> None:
+    frames = draw_frames()
+    out = tmp_path / "out.png"
+
+    written = save_animation(out, [(image, 40) for image in frames], SIZE)
+
+    with Image.open(out) as image:
+        assert image.n_frames == written == N_FRAMES
+
+        for i, frame in enumerate(frames):
+            image.seek(i)
+            assert flatten(image) == flatten(frame)
+
+
+def test_apng_without_frames_keeps_the_target(tmp_path: Path) -> None:
+    out = tmp_path / "out.png"
+    out.write_bytes(b"previous")
+
+    with pytest.raises(ValueError):
+        save_animation(out, [], SIZE)
+
+    assert out.read_bytes() == b"previous"
+    assert list(tmp_path.iterdir()) == [out]
\ No newline at end of file
@@ -0,0 +1,106 @@
+from PIL import Image
+import pytest
+
+import transforms
+from transforms import Adjust, Crop, Fade, Flip, Resize, Rotate, Transform, get_output_size, transform_images
+
+np = pytest.importorskip("numpy")
+
+
+def apply(transform: Transform, image: Image.Image, position: int = 0, n_frames: int = 1) -> "np.ndarray":
+    batch = np.asarray(image.convert("RGBA"))[None]
+
+    return transform.apply(batch, np.array([position]), n_frames)[0]
+
+
+@pytest.mark.parametrize("size, target", [((2000, 10), (2, 2)), ((10, 2000), (2, 2)), ((3000, 3000), (3, 3))])
+def test_large_reduction_keeps_full_values(size: tuple[int, int], target: tuple[int, int]) -> None:
+    # a reduction by more than 257 times overflowed a 16 bit block sum
+    out = apply(Resize(target), Image.new("RGBA", size, (255, 255, 255, 255)))
+
+    assert out[..., 3].max() == 255
+    assert (out[out[..., 3] > 0] == 255).all()
+
+
+def gradient(size: tuple[int, int]) -> Image.Image:
+    y, x = np.indices(size[::-1])
+    red = (x * 255 // max(size[0] - 1, 1)).astype(np.uint8)
+    green = (y * 255 // max(size[1] - 1, 1)).astype(np.uint8)
+
+    return Image.fromarray(np.dstack([red, green, red[:, ::-1], np.full_like(red, 255)]))
+
+
+@pytest.mark.parametrize("size, target", [((64, 48), (30, 20)), ((50, 50), (31, 20)), ((48, 64), (21, 30)), ((10, 7), (33, 40)), ((640, 480), (31, 9))])
+def test_resize_paths_agree(size: tuple[int, int], target: tuple[int, int]) -> None:
+    image = gradient(size)
+    transform = Resize(target)
+
+    array = apply(transform, image).astype(int)
+    fallback = np.asarray(transform.apply_image(image, 0, 1).convert("RGBA")).astype(int)
+
+    # the image lands on the same pixels whichever path runs, only the filters round differently
+    assert (array[..., 3] == fallback[..., 3]).all()
+    assert np.abs(array - fallback).max() <= 8
+
+
+def noise(size: tuple[int, int], seed: int = 0) -> Image.Image:
+    return Image.fromarray(np.random.default_rng(seed).integers(0, 256, size[::-1] + (4,), dtype=np.uint8))
+
+
+EXACT = [Crop((3, 2, 17, 11)), Rotate(1), Rotate(2), Rotate(3), Flip(True), Flip(False), Adjust(1.3, 0.8), Adjust(0.5, 1.5)]
+
+
+@pytest.mark.parametrize("transform", EXACT, ids=lambda transform: type(transform).__name__)
+def test_exact_paths_agree(transform: Transform) -> None:
+    image = noise((24, 16))
+
+    array = apply(transform, image)
+    fallback = np.asarray(transform.apply_image(image, 0, 1))
+
+    assert array.shape[1::-1] == transform.get_size(image.size)
+    assert (array == fallback).all()
+
+
+@pytest.mark.parametrize("n_in, n_out", [(3, 0), (0, 2), (4, 4)])
+def test_fade_paths_agree(n_in: int, n_out: int) -> None:
+    image = noise((8, 6))
+    transform = Fade(n_in, n_out)
+    batch = np.stack([np.asarray(image)] * 10)
+
+    array = transform.apply(batch, np.arange(10), 10)
+
+    for position in range(10):
+        fallback = np.asarray(transform.apply_image(image, position, 10)).astype(int)
+
+        assert (array[position, ..., 3] == batch[position, ..., 3]).all()
+        assert np.abs(array[position].astype(int) - fallback).max() <= 1
+
+    # frames away from both ends are left alone
+    untouched = [position for position in range(10) if n_in <= position < 10 - n_out]
+    assert (array[untouched] == batch[untouched]).all()
+
+
+def test_transform_needs_both_paths() -> None:
+    class Partial(Transform):
+
+        def apply(self, batch: "np.ndarray", positions: "np.ndarray", n_frames: int) -> "np.ndarray":
+            return batch
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+@pytest.mark.parametrize("max_bytes", [1, 256 * 1024 ** 2])
+def test_transform_images_matches_without_numpy(monkeypatch: pytest.MonkeyPatch, max_bytes: int) -> None:
+    images = [(position, noise((20, 12), position)) for position in range(6)]
+    chain = [Crop((1, 1, 19, 11)), Rotate(1), Flip(), Adjust(1.2), Fade(2, 2)]
+
+    array = list(transform_images(images, 6, (20, 12), chain, max_bytes))
+
+    monkeypatch.setattr(transforms, "np", None)
+    fallback = list(transform_images(images, 6, (20, 12), chain, max_bytes))
+
+    assert [image.size for image in array] == [image.size for image in fallback] == [get_output_size((20, 12), chain)] * 6
+
+    for a, b in zip(array, fallback):
+        assert np.abs(np.asarray(a).astype(int) - np.asarray(b).astype(int)).max() <= 1
\ No newline at end of file
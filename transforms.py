@@ -0,0 +1,276 @@
+from abc import ABC, abstractmethod
+from typing import Iterable, Iterator
+from PIL import Image, ImageOps
+
+try:
+    import numpy as np
+
+except ImportError:
+    np = None
+
+
+def get_fitted_size(size: tuple[int, int], box: tuple[int, int]) -> tuple[int, int]:
+    scale = min(box[0] / size[0], box[1] / size[1])
+
+    return max(1, round(size[0] * scale)), max(1, round(size[1] * scale))
+
+
+def get_fitted_offset(size: tuple[int, int], box: tuple[int, int]) -> tuple[int, int]:
+    return (box[0] - size[0]) // 2, (box[1] - size[1]) // 2
+
+
+def resize_axis(batch: "np.ndarray", axis: int, length: int) -> "np.ndarray":
+    old = batch.shape[axis]
+
+    # a large reduction first averages whole blocks, like PIL's reducing_gap
+    if (factor := old // (length * 2)) > 1:
+        old = old // factor
+        shape = batch.shape[:axis] + (old, factor) + batch.shape[axis + 1:]
+        blocks = np.take(batch, np.arange(old * factor), axis=axis).reshape(shape)
+        batch = ((blocks.sum(axis=axis + 1, dtype=np.uint32) + factor // 2) // factor).astype(np.uint8)
+
+    position = np.clip((np.arange(length, dtype=np.float32) + 0.5) * np.float32(old / length) - 0.5, 0, old - 1)
+    low = position.astype(np.intp)
+    high = np.minimum(low + 1, old - 1)
+    weight = np.round((position - low) * 256).astype(np.uint16).reshape((length,) + (1,) * (batch.ndim - axis - 1))
+
+    # whole RGBA pixels are gathered as one uint32 each, then blended in 8 bit fixed point
+    pixels = np.ascontiguousarray(batch).view(np.uint32)[..., 0]
+
+    out = np.take(pixels, low, axis=axis)[..., None].view(np.uint8).astype(np.uint16)
+    out *= 256 - weight
+
+    other = np.take(pixels, high, axis=axis)[..., None].view(np.uint8).astype(np.uint16)
+    other *= weight
+
+    out += other
+    out += 128
+    out >>= 8
+
+    return out.astype(np.uint8)
+
+
+class Transform(ABC):
+
+    per_frame: bool = False
+
+    def get_size(self, size: tuple[int, int]) -> tuple[int, int]:
+        return size
+
+    @abstractmethod
+    def apply(self, batch: "np.ndarray", positions: "np.ndarray", n_frames: int) -> "np.ndarray":
+        pass
+
+    @abstractmethod
+    def apply_image(self, image: Image.Image, position: int, n_frames: int) -> Image.Image:
+        pass
+
+
+class Resize(Transform):
+
+    size: tuple[int, int]
+
+    def __init__(self, size: tuple[int, int]) -> None:
+        self.size = size
+
+    def get_size(self, size: tuple[int, int]) -> tuple[int, int]:
+        return self.size
+
+    def apply(self, batch: "np.ndarray", positions: "np.ndarray", n_frames: int) -> "np.ndarray":
+        h, w = batch.shape[1:3]
+        fw, fh = get_fitted_size((w, h), self.size)
+
+        out = np.zeros((batch.shape[0], self.size[1], self.size[0], 4), dtype=np.uint8)
+        x, y = get_fitted_offset((fw, fh), self.size)
+
+        if batch[..., 3].min() == 255:
+            out[:, y:y + fh, x:x + fw] = resize_axis(resize_axis(batch, 1, fh), 2, fw)
+
+            return out
+
+        # colour is weighted by alpha so transparent pixels do not bleed into the edges,
+        # GIF alpha is all or nothing so the 8 bit premultiplied colour loses nothing
+        alpha = batch[..., 3:].astype(np.uint16)
+        premultiplied = batch.copy()
+        premultiplied[..., :3] = (batch[..., :3] * alpha + 127) // 255
+
+        resized = resize_axis(resize_axis(premultiplied, 1, fh), 2, fw)
+
+        alpha = resized[..., 3:].astype(np.uint16)
+        color = np.minimum((resized[..., :3] * np.uint16(255) + alpha // 2) // np.maximum(alpha, 1), 255)
+
+        out[:, y:y + fh, x:x + fw, :3] = color
+        out[:, y:y + fh, x:x + fw, 3:] = resized[..., 3:]
+
+        return out
+
+    def apply_image(self, image: Image.Image, position: int, n_frames: int) -> Image.Image:
+        image = image.resize(get_fitted_size(image.size, self.size), Image.Resampling.BILINEAR, reducing_gap=2.0)
+
+        # placed by hand rather than with ImageOps.pad, whose rounding puts odd margins one pixel off the array path
+        padded = Image.new(image.mode, self.size)
+        padded.paste(image, get_fitted_offset(image.size, self.size))
+
+        return padded
+
+
+class Crop(Transform):
+
+    box: tuple[int, int, int, int]
+
+    def __init__(self, box: tuple[int, int, int, int]) -> None:
+        self.box = box
+
+    def get_size(self, size: tuple[int, int]) -> tuple[int, int]:
+        return self.box[2] - self.box[0], self.box[3] - self.box[1]
+
+    def apply(self, batch: "np.ndarray", positions: "np.ndarray", n_frames: int) -> "np.ndarray":
+        x0, y0, x1, y1 = self.box
+
+        return batch[:, y0:y1, x0:x1]
+
+    def apply_image(self, image: Image.Image, position: int, n_frames: int) -> Image.Image:
+        return image.crop(self.box)
+
+
+class Rotate(Transform):
+
+    turns: int
+
+    def __init__(self, turns: int) -> None:
+        self.turns = turns % 4
+
+    def get_size(self, size: tuple[int, int]) -> tuple[int, int]:
+        return size[::-1] if self.turns % 2 else size
+
+    def apply(self, batch: "np.ndarray", positions: "np.ndarray", n_frames: int) -> "np.ndarray":
+        return np.rot90(batch, self.turns, axes=(1, 2))
+
+    def apply_image(self, image: Image.Image, position: int, n_frames: int) -> Image.Image:
+        return image.rotate(90 * self.turns, expand=True)
+
+
+class Flip(Transform):
+
+    horizontal: bool
+
+    def __init__(self, horizontal: bool = True) -> None:
+        self.horizontal = horizontal
+
+    def apply(self, batch: "np.ndarray", positions: "np.ndarray", n_frames: int) -> "np.ndarray":
+        return batch[:, :, ::-1] if self.horizontal else batch[:, ::-1]
+
+    def apply_image(self, image: Image.Image, position: int, n_frames: int) -> Image.Image:
+        return ImageOps.mirror(image) if self.horizontal else ImageOps.flip(image)
+
+
+class Adjust(Transform):
+
+    brightness: float
+    contrast: float
+
+    def __init__(self, brightness: float = 1.0, contrast: float = 1.0) -> None:
+        self.brightness = brightness
+        self.contrast = contrast
+
+    def get_table(self) -> list[int]:
+        return [min(max(int((v * self.brightness - 128) * self.contrast + 128 + 0.5), 0), 255) for v in range(256)]
+
+    def apply(self, batch: "np.ndarray", positions: "np.ndarray", n_frames: int) -> "np.ndarray":
+        # one lookup table serves every pixel of the batch
+        out = np.take(np.array(self.get_table(), dtype=np.uint8), batch)
+        out[..., 3] = batch[..., 3]
+
+        return out
+
+    def apply_image(self, image: Image.Image, position: int, n_frames: int) -> Image.Image:
+        return image.point(self.get_table() * 3 + list(range(256)))
+
+
+class Fade(Transform):
+
+    per_frame = True
+
+    n_in: int
+    n_out: int
+
+    def __init__(self, n_in: int = 0, n_out: int = 0) -> None:
+        self.n_in = n_in
+        self.n_out = n_out
+
+    def get_factor(self, positions: "np.ndarray", n_frames: int) -> "np.ndarray":
+        factor = np.ones(len(positions), dtype=np.float32)
+
+        if self.n_in > 0:
+            factor = np.minimum(factor, (positions + 1) / (self.n_in + 1))
+
+        if self.n_out > 0:
+            factor = np.minimum(factor, (n_frames - positions) / (self.n_out + 1))
+
+        return factor
+
+    def apply(self, batch: "np.ndarray", positions: "np.ndarray", n_frames: int) -> "np.ndarray":
+        factor = self.get_factor(positions, n_frames)
+        faded = np.flatnonzero(factor < 1)
+
+        if len(faded) == 0:
+            return batch
+
+        # only the frames at either end change, and each of them is one table lookup
+        out = batch.copy()
+        tables = (np.arange(256, dtype=np.float32) * factor[faded, None] + 0.5).astype(np.uint8)
+
+        for table, i in zip(tables, faded):
+            out[i, ..., :3] = np.take(table, batch[i, ..., :3])
+
+        return out
+
+    def apply_image(self, image: Image.Image, position: int, n_frames: int) -> Image.Image:
+        factor = 1.0
+
+        if self.n_in > 0:
+            factor = min(factor, (position + 1) / (self.n_in + 1))
+
+        if self.n_out > 0:
+            factor = min(factor, (n_frames - position) / (self.n_out + 1))
+
+        return image.point([int(v * factor + 0.5) for v in range(256)] * 3 + list(range(256)))
+
+
+def get_output_size(size: tuple[int, int], transforms: list[Transform]) -> tuple[int, int]:
+    for transform in transforms:
+        size = transform.get_size(size)
+
+    return size
+
+
+def get_chunk_size(size: tuple[int, int], transforms: list[Transform], max_bytes: int) -> int:
+    largest = max((get_output_size(size, transforms[:i]) for i in range(len(transforms) + 1)), key=lambda s: s[0] * s[1])
+
+    # float32 intermediates of a resize take four times the bytes of the frames
+    return max(1, max_bytes // (largest[0] * largest[1] * 4 * 4))
+
+
+def transform_images(images: Iterable[tuple[int, Image.Image]], n_frames: int, size: tuple[int, int], transforms: list[Transform], max_bytes: int = 256 * 1024 ** 2) -> Iterator[Image.Image]:
+    if np is None:
+        for position, image in images:
+            image = image.convert("RGBA")
+
+            for transform in transforms:
+                image = transform.apply_image(image, position, n_frames)
+
+            yield image
+
+        return
+
+    chunk_size = get_chunk_size(size, transforms, max_bytes)
+    iterator = iter(images)
+
+    while chunk := [item for _, item in zip(range(chunk_size), iterator)]:
+        positions = np.array([position for position, _ in chunk])
+        batch = np.stack([np.asarray(image.convert("RGBA")) for _, image in chunk])
+
+        for transform in transforms:
+            batch = transform.apply(batch, positions, n_frames)
+
+        yield from (Image.fromarray(np.ascontiguousarray(frame)) for frame in batch)
\ No newline at end of file
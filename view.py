@@ -1,19 +1,52 @@
+from startup import StartupProfile
 import tkinter as tk
+from tkinter import messagebox
+from typing import Callable, Any, TYPE_CHECKING
+from math import ceil, sqrt
+import sys
 
-from controller import Controller
+from filmstrip import FrameList
+from icons import load_icons
+
+# the controller pulls in PIL, it is imported when it is first used rather than before the window is up
+if TYPE_CHECKING:
+    from controller import Controller
+    from workspace import Workspace
+    from jobs import Job
+
+class Document():
+
+    canvas: tk.Canvas
+    tab: tk.Radiobutton
+    controller: "Controller | None"
+    title: str
+
+    def __init__(self, canvas: tk.Canvas, tab: tk.Radiobutton) -> None:
+        self.canvas = canvas
+        self.tab = tab
+        self.controller = None
+        self.title = "GIFプレイヤー"
 
 class View():
 
+    workspace: "Workspace"
+    documents: list[Document]
+    document: Document
+    minimized: bool
+    profile: StartupProfile
     icon_images: dict[str, tk.PhotoImage]
+    paint_id: str | None
+    telemetry_id: str | None
 
-    def __init__(self, root: tk.Tk) -> None:
+    def __init__(self, root: tk.Tk, profile: StartupProfile | None = None) -> None:
         self.root = root
         self.root.title("GIFプレイヤー")
         self.root.protocol("WM_DELETE_WINDOW", self.event_destroy)
 
-        self.controller = Controller()
-        
+        self.profile = profile if profile is not None else StartupProfile()
+
         self.init_icons()
+        self.profile.mark("icons")
 
         menu = tk.Menu(self.root, tearoff=False)
         file_menu = tk.Menu(menu, tearoff=False)
@@ -25,13 +58,17 @@ class View():
         menu.add_cascade(label="設定(S)", menu=config_menu, underline=3)
 
         file_menu.add_command(label="gifを新規作成", image=self.icon_images["new"], compound=tk.LEFT, command=self.event_create, accelerator="Ctrl+N")
+        file_menu.add_command(label="新しいタブ", command=self.event_new_document, accelerator="Ctrl+T")
+        file_menu.add_command(label="タブを閉じる", command=self.event_close_document, accelerator="Ctrl+W")
         file_menu.add_separator()
         file_menu.add_command(label="gifを開く", image=self.icon_images["open"], compound=tk.LEFT, command=self.event_open, accelerator="Ctrl+O")
         file_menu.add_command(label="画像を開く", image=self.icon_images["ins"], compound=tk.LEFT, command=self.event_insert, accelerator="Ctrl+Shift+O")
+        file_menu.add_command(label="フォルダから画像を開く", command=self.event_insert_directory)
         file_menu.add_separator()
         file_menu.add_command(label="gifを保存", image=self.icon_images["save"], compound=tk.LEFT, command=self.event_save, accelerator="Ctrl+Shift+S")
         file_menu.add_separator()
         file_menu.add_command(label="現在のフレームをエクスポート", command=self.event_export)
+        file_menu.add_command(label="再生統計をエクスポート", command=self.event_export_telemetry)
         file_menu.add_separator()
         file_menu.add_command(label="終了", command=self.event_destroy)
 
@@ -41,20 +78,86 @@ class View():
         event_up.keysym = "Up"
         event_down.keysym = "Down"
 
+        self.edit_menu.add_command(label="元に戻す", command=self.event_undo, accelerator="Ctrl+Z")
+        self.edit_menu.add_command(label="やり直す", command=self.event_redo, accelerator="Ctrl+Y")
+        self.edit_menu.add_separator()
         self.edit_menu.add_command(label="一層上へ", command=lambda :self.event_replace(event_up), accelerator="Alt+UpArrow")
         self.edit_menu.add_command(label="一層下へ", command=lambda :self.event_replace(event_down), accelerator="Alt+DownArrow")
         self.edit_menu.add_separator()
+        self.edit_menu.add_command(label="選択フレームを複製", command=self.event_duplicate, accelerator="Ctrl+D")
+        self.edit_menu.add_command(label="選択フレームを逆順に", command=self.event_reverse)
+        self.edit_menu.add_command(label="選択フレームを間引く...", command=self.event_decimate)
+        self.edit_menu.add_separator()
+
+        transform_menu = tk.Menu(self.edit_menu, tearoff=False)
+        self.edit_menu.add_cascade(label="アニメーション全体", menu=transform_menu)
+
+        transform_menu.add_command(label="サイズ変更...", command=lambda: self.event_transform("resize"))
+        transform_menu.add_command(label="切り抜き...", command=lambda: self.event_transform("crop"))
+        transform_menu.add_separator()
+        transform_menu.add_command(label="左に回転", command=lambda: self.event_transform("rotate_left"))
+        transform_menu.add_command(label="右に回転", command=lambda: self.event_transform("rotate_right"))
+        transform_menu.add_command(label="左右反転", command=lambda: self.event_transform("flip_h"))
+        transform_menu.add_command(label="上下反転", command=lambda: self.event_transform("flip_v"))
+        transform_menu.add_separator()
+        transform_menu.add_command(label="明るさ・コントラスト...", command=lambda: self.event_transform("adjust"))
+        transform_menu.add_command(label="フェード...", command=lambda: self.event_transform("fade"))
+        self.edit_menu.add_separator()
         self.edit_menu.add_command(label="フレームを削除", image=self.icon_images["del"], compound=tk.LEFT, command=self.event_delete, accelerator="Delete")
 
         config_menu.add_cascade(label="フレームレート", command=self.event_change_fps)
 
+        self.fps_override_var = tk.BooleanVar(value=False)
+        config_menu.add_checkbutton(label="フレームレートで再生(フレーム時間を無視)", variable=self.fps_override_var, command=self.event_change_fps_override)
+
+        self.lazy_var = tk.BooleanVar(value=False)
+        config_menu.add_checkbutton(label="フレームを遅延読み込み", variable=self.lazy_var, command=self.event_change_lazy)
+
+        self.disk_cache_var = tk.BooleanVar(value=False)
+        config_menu.add_checkbutton(label="デコード済みフレームをディスクにキャッシュ", variable=self.disk_cache_var, command=self.event_change_disk_cache)
+        config_menu.add_command(label="ディスクキャッシュを削除", command=self.event_clear_disk_cache)
+        config_menu.add_command(label="メモリ上限...", command=self.event_change_memory_budget)
+
+        self.dedup_var = tk.BooleanVar(value=True)
+        config_menu.add_checkbutton(label="同じ内容のフレームを共有", variable=self.dedup_var, command=self.event_change_dedup)
+
+        self.merge_var = tk.BooleanVar(value=False)
+        config_menu.add_checkbutton(label="保存時に連続する同じフレームをまとめる", variable=self.merge_var, command=self.event_change_merge)
+
+        self.parallel_save_var = tk.BooleanVar(value=False)
+        config_menu.add_checkbutton(label="複数のプロセスで並列に保存", variable=self.parallel_save_var, command=self.event_change_parallel_save)
+        config_menu.add_command(label="元に戻す回数...", command=self.event_change_history_limit)
+
+        self.telemetry_var = tk.BooleanVar(value=False)
+        config_menu.add_checkbutton(label="再生統計を表示", variable=self.telemetry_var, command=self.event_change_telemetry)
+
+        self.zoom_var = tk.StringVar(value="1")
+        config_menu.add_separator()
+        config_menu.add_radiobutton(label="表示: 原寸", variable=self.zoom_var, value="1", command=self.event_change_zoom)
+        config_menu.add_radiobutton(label="表示: ウィンドウに合わせる", variable=self.zoom_var, value="fit", command=self.event_change_zoom)
+        config_menu.add_radiobutton(label="表示: 50%", variable=self.zoom_var, value="0.5", command=self.event_change_zoom)
+        config_menu.add_radiobutton(label="表示: 200%", variable=self.zoom_var, value="2", command=self.event_change_zoom)
+
+        self.grid_var = tk.BooleanVar(value=False)
+        config_menu.add_checkbutton(label="表示: タブを並べて表示", variable=self.grid_var, command=self.layout_documents)
+
+        self.render_mode_var = tk.StringVar(value="items")
+        config_menu.add_separator()
+        config_menu.add_radiobutton(label="描画: フレームごとに画像を作成", variable=self.render_mode_var, value="items", command=self.event_change_render_mode)
+        config_menu.add_radiobutton(label="描画: 差分領域のみ更新", variable=self.render_mode_var, value="blit", command=self.event_change_render_mode)
+        config_menu.add_radiobutton(label="描画: タイル分割(大きな画像向け)", variable=self.render_mode_var, value="tiles", command=self.event_change_render_mode)
+
         self.root.config(menu=menu)
+        self.profile.mark("menus")
 
 
 
         self.n_frames_fmt = "フレーム数: {}"
         self.size_fmt = "サイズ: {} x {}"
         self.fps_fmt = "{}fps"
+        self.progress_fmt = "{}... {} / {}"
+        self.memory_fmt = "メモリ: {}MB / {} 退避 {} 書き出し {} 共有 {}枚({}MB)"
+        self.telemetry_fmt = "{achieved_fps:.1f}/{target_fps:.1f}fps ジッタ {mean_jitter_ms:.1f}ms 欠落 {dropped} 先読み {readahead_queued}/{readahead_depth} 不足 {underruns} | 復号 {decode:.1f} 画像 {photo:.1f} 描画 {canvas:.1f} 同期 {sync:.1f}ms"
 
 
 
@@ -63,17 +166,23 @@ class View():
 
         self.player_frm = tk.Frame(self.root_pane)
 
-        self.canvas = tk.Canvas(self.player_frm, bg="black")
+        self.document_var = tk.StringVar()
+        self.tab_frm = tk.Frame(self.player_frm)
+        self.docs_frm = tk.Frame(self.player_frm, bg="black")
         self.playbtn = tk.Button(self.player_frm, image=self.icon_images["play"], width=40, command=self.event_play)
         self.stopbtn = tk.Button(self.player_frm, image=self.icon_images["stop"], width=20, command=self.event_stop)
         self.n_frames_lab = tk.Label(self.player_frm, relief=tk.SUNKEN, text=self.n_frames_fmt.format(1))
         self.size_lab = tk.Label(self.player_frm, relief=tk.SUNKEN, text=self.size_fmt.format(1,1))
         self.fps_lab = tk.Label(self.player_frm, relief=tk.SUNKEN, text=self.fps_fmt.format(24.00))
+        self.telemetry_lab = tk.Label(self.player_frm, relief=tk.SUNKEN)
+        self.memory_lab = tk.Label(self.player_frm, relief=tk.SUNKEN)
+        self.status_lab = tk.Label(self.player_frm, relief=tk.SUNKEN, anchor=tk.W)
+        self.cancelbtn = tk.Button(self.player_frm, text="キャンセル", command=self.event_cancel)
 
 
         self.listbox_frm = tk.Frame(self.root_pane)
 
-        self.listbox = tk.Listbox(self.listbox_frm)
+        self.listbox = FrameList(self.listbox_frm, width=240)
         self.listbox_scroll = tk.Scrollbar(self.listbox_frm, command=self.listbox.yview, orient=tk.VERTICAL)
         self.listbox.configure(yscrollcommand=self.listbox_scroll.set)
 
@@ -84,13 +193,15 @@ class View():
 
         self.root_pane.add(self.player_frm)
 
-        self.canvas.pack(expand=True, fill=tk.BOTH, side=tk.TOP)
+        self.tab_frm.pack(fill=tk.X, side=tk.TOP)
+        self.docs_frm.pack(expand=True, fill=tk.BOTH, side=tk.TOP)
         self.playbtn.pack(side=tk.LEFT)
         self.stopbtn.pack(side=tk.LEFT)
         self.n_frames_lab.pack(fill=tk.Y, side=tk.LEFT)
         self.size_lab.pack(fill=tk.Y, side=tk.LEFT)
         self.fps_lab.pack(fill=tk.Y, side=tk.LEFT)
-        tk.Label(self.player_frm, relief=tk.SUNKEN).pack(expand=True, fill=tk.BOTH, side=tk.LEFT)
+        self.memory_lab.pack(fill=tk.Y, side=tk.LEFT)
+        self.status_lab.pack(expand=True, fill=tk.BOTH, side=tk.LEFT)
 
 
         self.root_pane.add(self.listbox_frm)
@@ -102,22 +213,274 @@ class View():
 
         self.root.bind("<space>", self.event_play)
         self.root.bind("<Delete>", self.event_delete)
+        self.root.bind("<Escape>", self.event_cancel)
         self.root.bind("<Control-KeyPress>", self.ctrl_bind)
         self.listbox.bind("<Button-3>", lambda event: self.edit_menu.post(event.x_root, event.y_root))
         self.listbox.bind("<Alt-KeyPress>", self.alt_bind)
         self.listbox.bind("<<ListboxSelect>>", self.event_listbox_selected)
+        self.root.bind("<Map>", self.event_root_map)
+        self.root.bind("<Unmap>", self.event_root_map)
+
+        self.documents = []
+        self.minimized = False
+        self.telemetry_id = None
+        self.document = self.add_document()
+        self.document.canvas.configure(highlightbackground="white")
+        self.document_var.set(str(self.document.canvas))
+        self.layout_documents()
+
+        self.paint_id = self.document.canvas.bind("<Expose>", self.event_first_paint, add="+")
+        self.profile.mark("widgets")
+
+        self.update_memory()
+
+    def add_document(self) -> Document:
+        canvas = tk.Canvas(self.docs_frm, bg="black", highlightthickness=1, highlightbackground="black")
+        tab = tk.Radiobutton(self.tab_frm, text="無題", variable=self.document_var, value=str(canvas), indicatoron=False, command=self.event_select_document)
+
+        canvas.bind("<Configure>", self.event_canvas_configure)
+        canvas.bind("<ButtonPress-1>", self.event_pan_start)
+        canvas.bind("<B1-Motion>", self.event_pan)
+        canvas.bind("<Control-MouseWheel>", self.event_zoom)
+        canvas.bind("<Control-Button-4>", self.event_zoom)
+        canvas.bind("<Control-Button-5>", self.event_zoom)
+        tab.pack(side=tk.LEFT)
+
+        document = Document(canvas, tab)
+        self.documents.append(document)
+
+        return document
+
+    def get_document(self, widget: tk.Misc) -> Document:
+        return next(document for document in self.documents if document.canvas is widget)
+
+    def get_controller(self) -> "Controller":
+        return self.get_document_controller(self.document)
+
+    def get_document_controller(self, document: Document) -> "Controller":
+        if document.controller is None:
+            first = not hasattr(self, "workspace")
+
+            if first:
+                self.profile.mark("first use")
+
+            from controller import Controller
+            from workspace import Workspace
+
+            # every document plays from one clock, decodes on one pool and shares one memory budget
+            if first:
+                self.workspace = Workspace(self.root)
+
+            document.controller = Controller(self.workspace)
+
+            self.init_canvas(document)
+            self.bind_sync_func(document)
+            self.bind_progress_func(document)
+            self.apply_settings(document.controller)
+            document.controller.set_visible(self.is_shown(document))
+
+            if document is self.document:
+                self.bind_frame_func()
+
+            if first:
+                self.profile.mark("controller loaded")
+                self.profile.report()
 
-        self.init_canvas()
-        self.bind_sync_func()
+        return document.controller
 
-    def init_canvas(self) -> None:
-        self.controller.init_canvas(self.canvas)
+    def get_controllers(self) -> list["Controller"]:
+        self.get_controller()
+
+        return [document.controller for document in self.documents if document.controller is not None]
+
+    def init_canvas(self, document: Document) -> None:
+        document.controller.init_canvas(document.canvas)
 
     def init_icons(self) -> None:
-        self.icon_images = self.controller.get_icons()
+        self.icon_images = load_icons()
+
+    def bind_sync_func(self, document: Document) -> None:
+        document.controller.bind_sync_func(self.bind_to_document(self.set_listbox_selection, document))
+
+    def bind_progress_func(self, document: Document) -> None:
+        document.controller.bind_progress_func(self.set_progress)
+
+    def bind_frame_func(self) -> None:
+        self.listbox.bind_frame_func(self.get_controller().get_frame)
+
+    def bind_to_document(self, func: Callable[..., Any], document: Document | None = None) -> Callable[..., None]:
+        document = document if document is not None else self.document
+
+        # a document that is not the selected one has no list or labels on screen to update
+        def call(*args: Any) -> None:
+            if document is self.document:
+                func(*args)
+
+        return call
+
+    def apply_settings(self, controller: "Controller") -> None:
+        controller.set_fps_override(self.fps_override_var.get())
+        controller.set_lazy(self.lazy_var.get())
+        controller.set_disk_cache(self.disk_cache_var.get())
+        controller.set_dedup(self.dedup_var.get())
+        controller.set_merge_duplicates(self.merge_var.get())
+        controller.set_parallel_save(self.parallel_save_var.get())
+        controller.set_telemetry(self.telemetry_var.get())
+        controller.set_render_mode(self.render_mode_var.get())
+
+        if zoom := self.zoom_var.get():
+            controller.set_zoom(zoom if zoom == "fit" else float(zoom))
+
+    def is_shown(self, document: Document) -> bool:
+        return not self.minimized and (self.grid_var.get() or document is self.document)
+
+    def update_visibility(self) -> None:
+        for document in self.documents:
+            if document.controller is not None:
+                document.controller.set_visible(self.is_shown(document))
+
+    def layout_documents(self) -> None:
+        shown = self.documents if self.grid_var.get() else [self.document]
+        columns = ceil(sqrt(len(shown)))
+        rows = ceil(len(shown) / columns)
+
+        for document in self.documents:
+            if document not in shown:
+                document.canvas.grid_remove()
+
+        for i, document in enumerate(shown):
+            document.canvas.grid(row=i // columns, column=i % columns, sticky=tk.NSEW)
+
+        for i in range(len(self.documents) + 1):
+            self.docs_frm.columnconfigure(i, weight=int(i < columns), uniform="docs")
+            self.docs_frm.rowconfigure(i, weight=int(i < rows), uniform="docs")
+
+        self.update_visibility()
+
+    def activate(self, document: Document) -> None:
+        if document is self.document:
+            return
+
+        self.document.canvas.configure(highlightbackground="black")
+        document.canvas.configure(highlightbackground="white")
+
+        self.document = document
+        self.document_var.set(str(document.canvas))
+
+        self.layout_documents()
+        self.show_document()
+
+    def show_document(self) -> None:
+        self.root.title(self.document.title)
+        self.listbox.delete(0, tk.END)
+
+        if (controller := self.document.controller) is None:
+            self.n_frames_lab.configure(text=self.n_frames_fmt.format(1))
+            self.size_lab.configure(text=self.size_fmt.format(1, 1))
+            self.fps_lab.configure(text=self.fps_fmt.format(24.00))
+            self.playbtn.configure(image=self.icon_images["play"])
+            return
+
+        self.bind_frame_func()
+
+        names = controller.get_frame_names()
+        self.listbox.insert(tk.END, *names)
+
+        self.n_frames_lab.configure(text=self.n_frames_fmt.format(len(names)))
+        self.set_labels(size=controller.get_size(), fps=controller.get_fps())
+        self.playbtn.configure(image=self.icon_images["pause" if controller.is_playing() else "play"])
+
+    def event_new_document(self, event: tk.Event = None) -> None:
+        self.activate(self.add_document())
+
+    def event_close_document(self, event: tk.Event = None) -> None:
+        document = self.document
+
+        if document.controller is not None:
+            if document.controller.is_busy():
+                return
+
+            document.controller.close()
+
+        self.documents.remove(document)
+
+        if not self.documents:
+            self.add_document()
+
+        self.activate(self.documents[-1])
+
+        document.canvas.destroy()
+        document.tab.destroy()
+
+        self.layout_documents()
 
-    def bind_sync_func(self) -> None:
-        self.controller.bind_sync_func(self.set_listbox_selection)
+    def event_select_document(self) -> None:
+        self.activate(next(document for document in self.documents if str(document.canvas) == self.document_var.get()))
+
+    def event_root_map(self, event: tk.Event) -> None:
+        if event.widget is not self.root:
+            return
+
+        # a minimized window pauses every document, and they carry on when it is restored
+        self.minimized = event.type == tk.EventType.Unmap
+        self.update_visibility()
+
+    def event_first_paint(self, event: tk.Event) -> None:
+        if self.paint_id is not None:
+            event.widget.unbind("<Expose>", self.paint_id)
+            self.paint_id = None
+
+        self.profile.mark("first paint")
+        self.profile.report()
+
+    def set_progress(self, job: "Job | None") -> None:
+        if job is None:
+            self.status_lab.configure(text="")
+            self.cancelbtn.pack_forget()
+
+        else:
+            self.status_lab.configure(text=self.progress_fmt.format(job.name, job.done, job.total))
+
+            if not self.cancelbtn.winfo_ismapped():
+                self.cancelbtn.pack(side=tk.LEFT, before=self.status_lab)
+
+    def update_telemetry(self) -> None:
+        self.telemetry_id = None
+
+        if not self.telemetry_var.get():
+            return
+
+        if self.document.controller is not None:
+            summary = self.document.controller.get_telemetry()
+
+            self.telemetry_lab.configure(text=self.telemetry_fmt.format(**summary, **summary["stage_ms"]))
+
+        self.telemetry_id = self.root.after(500, self.update_telemetry)
+
+    def show_memory(self) -> None:
+        usage = self.workspace.get_memory_usage()
+
+        used = (usage["photos"] + usage["scaled"] + usage["frames"]) // 1024 ** 2
+        budget = f"{usage['budget'] // 1024 ** 2}MB" if usage["budget"] is not None else "無制限"
+
+        self.memory_lab.configure(text=self.memory_fmt.format(used, budget, usage["evicted"], usage["spilled_frames"], usage["shared_frames"], usage["shared"] // 1024 ** 2))
+
+    def update_memory(self) -> None:
+        if hasattr(self, "workspace"):
+            self.show_memory()
+        self.root.after(1000, self.update_memory)
+
+    def show_save_report(self, written: int, merged: int) -> None:
+        if merged:
+            messagebox.showinfo("保存", f"{written}フレームで保存しました。(連続する同じフレーム {merged}枚をまとめました)")
+
+    def show_error(self, error: BaseException) -> None:
+        messagebox.showerror("エラー", str(error))
+
+    def add_frame_names(self, framenames: list[str]) -> None:
+        self.listbox.insert(tk.END, *framenames)
+
+        self.set_labels(n_frames=self.listbox.size())
 
     def set_listbox_selection(self, index: int) -> None:
         self.listbox.selection_clear(0, tk.END)
@@ -126,6 +489,8 @@ class View():
 
     def set_labels(self, title: str | None = None, n_frames: int | None = None, size: tuple[int, int] | None = None, fps: float | None = None) -> None:
         if title:
+            self.document.title = title
+            self.document.tab.configure(text=title)
             self.root.title(title)
 
         if n_frames:
@@ -144,111 +509,274 @@ class View():
         elif key == "o":
             self.event_open()
 
+        elif key == "t":
+            self.event_new_document()
+
+        elif key == "w":
+            self.event_close_document()
+
         elif key == "O":
             self.event_insert()
 
         elif key == "S":
             self.event_save()
 
+        elif key == "d":
+            self.event_duplicate()
+
+        elif key == "z":
+            self.event_undo()
+
+        elif key == "y":
+            self.event_redo()
+
     def alt_bind(self, event: tk.Event) -> None:
         if (key := event.keysym) in ("Up", "Down"):
             self.event_replace(event)
 
     def event_create(self, event: tk.Event = None) -> None:
-        if self.controller.is_transfer_to_state("set"):
-            filename, size = self.controller.create_gif()
+        if self.get_controller().is_transfer_to_state("set"):
+            filename, size = self.get_controller().create_gif()
 
             self.set_labels(title=filename, n_frames=0, size=size)
             self.listbox.delete(0, tk.END)
 
     def event_open(self, event: tk.Event = None) -> None:
-        if self.controller.is_transfer_to_state("set"):
-            n_frames, filename, framenames, size = self.controller.open_gif()
+        if self.get_controller().is_transfer_to_state("set"):
+            opened = self.get_controller().open_gif(self.bind_to_document(self.add_frame_names), self.bind_to_document(self.event_job_done), self.show_error)
 
-            self.set_labels(title=filename, n_frames=n_frames, size=size)
-            self.listbox.delete(0, tk.END)
+            if opened:
+                filename, size = opened
 
-            for framename in framenames:
-                self.listbox.insert(tk.END, framename)
+                self.listbox.delete(0, tk.END)
 
-    def event_insert(self, event: tk.Event = None) -> None:
-        if self.controller.is_transfer_to_state("ins"):
-            n_frames, filenames = self.controller.ins_images()
+                self.set_labels(title=filename, n_frames=0, size=size)
+                self.playbtn.configure(image=self.icon_images["play"])
 
-            self.set_labels(n_frames=n_frames)
+    def event_insert(self, event: tk.Event = None) -> None:
+        if self.get_controller().is_transfer_to_state("ins"):
+            if self.get_controller().ins_images(self.bind_to_document(self.add_frame_names), self.bind_to_document(self.event_job_done), self.show_error):
+                self.playbtn.configure(image=self.icon_images["play"])
 
-            for filename in filenames:
-                self.listbox.insert(tk.END, filename)
+    def event_insert_directory(self, event: tk.Event = None) -> None:
+        if self.get_controller().is_transfer_to_state("ins"):
+            if self.get_controller().ins_directory(self.bind_to_document(self.add_frame_names), self.bind_to_document(self.event_job_done), self.show_error):
+                self.playbtn.configure(image=self.icon_images["play"])
 
     def event_save(self, event: tk.Event = None) -> None:
-        if self.controller.is_transfer_to_state("save"):
-            self.controller.save_gif()
+        if self.get_controller().is_transfer_to_state("save"):
+            if self.get_controller().save_gif(self.show_save_report, self.show_error):
+                self.playbtn.configure(image=self.icon_images["play"])
 
     def event_export(self, event: tk.Event = None) -> None:
-        if self.controller.is_transfer_to_state("save"):
+        if self.get_controller().is_transfer_to_state("save"):
             index = self.listbox.curselection()[0]
             name = self.listbox.get(index)
-            self.controller.export_frame(index, name)
+
+            if self.get_controller().export_frame(index, name, on_error=self.show_error):
+                self.playbtn.configure(image=self.icon_images["play"])
+
+    def event_job_done(self, n_frames: int) -> None:
+        self.set_labels(n_frames=n_frames)
+
+    def event_cancel(self, event: tk.Event = None) -> None:
+        self.get_controller().cancel_job()
 
     def event_play(self, event: tk.Event = None) -> None:
-        if self.controller.is_transfer_to_state("play"):
-            self.controller.animation("play")
+        if self.get_controller().is_transfer_to_state("play"):
+            self.get_controller().animation("play")
             self.playbtn.configure(image=self.icon_images["pause"])
 
-        elif self.controller.is_transfer_to_state("stop"):
-            self.controller.animation("pause")
+        elif self.get_controller().is_transfer_to_state("stop"):
+            self.get_controller().animation("pause")
             self.playbtn.configure(image=self.icon_images["play"])
 
     def event_stop(self, event: tk.Event = None) -> None:
-        if self.controller.is_transfer_to_state("stop"):
-            self.controller.animation("stop")
+        if self.get_controller().is_transfer_to_state("stop"):
+            self.get_controller().animation("stop")
             self.playbtn.configure(image=self.icon_images["play"])
         
         else:
-            self.controller.display_frame(0)
+            self.get_controller().display_frame(0)
         
         self.set_listbox_selection(0)
 
     def event_listbox_selected(self, event: tk.Event = None) -> None:
-        index = self.listbox.curselection()[0]
+        if not (indices := self.listbox.curselection()):
+            return
 
-        self.controller.display_frame(index)
+        self.get_controller().display_frame(indices[0])
 
-    def event_replace(self, event: tk.Event = None) -> None:
-        if self.controller.is_transfer_to_state("edit"):
-            index = self.listbox.curselection()[0]
+    def apply_order(self, order: list[int], selection: list[int]) -> None:
+        names = self.listbox.get(0, tk.END)
 
-            ins_index = self.controller.replace_frame(index, event.keysym)
+        self.set_frame_names([names[i] for i in order], selection)
 
-            title = self.listbox.get(index)
+    def set_frame_names(self, names: list[str], selection: list[int]) -> None:
+        self.listbox.delete(0, tk.END)
+        self.listbox.insert(tk.END, *names)
 
-            self.listbox.delete(index)
+        self.set_labels(n_frames=len(names))
 
-            self.listbox.insert(ins_index, title)
-            self.set_listbox_selection(ins_index)
+        if selection:
+            for index in selection:
+                self.listbox.selection_set(index)
+
+            self.listbox.see(selection[0])
             self.listbox.event_generate("<<ListboxSelect>>")
 
+    def event_undo(self, event: tk.Event = None) -> None:
+        if self.get_controller().is_transfer_to_state("edit"):
+            if result := self.get_controller().undo():
+                self.set_frame_names(*result)
+                self.set_labels(size=self.get_controller().get_size())
+
+    def event_redo(self, event: tk.Event = None) -> None:
+        if self.get_controller().is_transfer_to_state("edit"):
+            if result := self.get_controller().redo():
+                self.set_frame_names(*result)
+                self.set_labels(size=self.get_controller().get_size())
+
+    def event_replace(self, event: tk.Event = None) -> None:
+        if self.get_controller().is_transfer_to_state("edit"):
+            if indices := self.listbox.curselection():
+                self.apply_order(*self.get_controller().move_frames(list(indices), event.keysym))
+
     def event_delete(self, event: tk.Event = None) -> None:
-        if self.controller.is_transfer_to_state("edit"):
-            index = self.listbox.curselection()[0]
-            n_frames = self.controller.delete_frame(index)
+        if self.get_controller().is_transfer_to_state("edit"):
+            if indices := self.listbox.curselection():
+                self.apply_order(*self.get_controller().delete_frames(list(indices)))
+
+                if not self.get_controller().is_playing():
+                    self.playbtn.configure(image=self.icon_images["play"])
 
-            self.set_labels(n_frames=n_frames)
-            self.listbox.delete(index)
+    def event_duplicate(self, event: tk.Event = None) -> None:
+        if self.get_controller().is_transfer_to_state("edit"):
+            if indices := self.listbox.curselection():
+                self.apply_order(*self.get_controller().duplicate_frames(list(indices)))
 
-            self.listbox.selection_clear(0, tk.END)
-            self.listbox.selection_set(index)
+    def event_reverse(self, event: tk.Event = None) -> None:
+        if self.get_controller().is_transfer_to_state("edit"):
+            if indices := self.listbox.curselection():
+                self.apply_order(*self.get_controller().reverse_frames(list(indices)))
+
+    def event_decimate(self, event: tk.Event = None) -> None:
+        if self.get_controller().is_transfer_to_state("edit"):
+            if (indices := self.listbox.curselection()) and (result := self.get_controller().decimate_frames(list(indices))):
+                self.apply_order(*result)
+
+    def event_transform(self, kind: str) -> None:
+        if self.get_controller().is_transfer_to_state("edit"):
+            self.get_controller().transform(kind, self.bind_to_document(lambda size: self.set_labels(size=size)), self.show_error)
 
     def event_change_fps(self) -> None:
-        new_fps = self.controller.set_fps()
+        new_fps = self.get_controller().set_fps()
 
         self.set_labels(fps=new_fps)
         
+    def event_change_fps_override(self) -> None:
+        for controller in self.get_controllers():
+            controller.set_fps_override(self.fps_override_var.get())
+
+    def event_change_telemetry(self) -> None:
+        enabled = self.telemetry_var.get()
+
+        for controller in self.get_controllers():
+            controller.set_telemetry(enabled)
+
+        # a quick off and on again would otherwise leave the old refresh running beside the new one
+        if self.telemetry_id is not None:
+            self.root.after_cancel(self.telemetry_id)
+            self.telemetry_id = None
+
+        if enabled:
+            self.telemetry_lab.pack(fill=tk.Y, side=tk.LEFT, after=self.fps_lab)
+            self.update_telemetry()
+
+        else:
+            self.telemetry_lab.pack_forget()
+
+    def event_export_telemetry(self) -> None:
+        self.get_controller().export_telemetry()
+
+    def event_change_zoom(self) -> None:
+        zoom = self.zoom_var.get()
+
+        for controller in self.get_controllers():
+            controller.set_zoom(zoom if zoom == "fit" else float(zoom))
+
+    def event_canvas_configure(self, event: tk.Event) -> None:
+        if (controller := self.get_document(event.widget).controller) is not None:
+            controller.resize_canvas()
+
+    def event_pan_start(self, event: tk.Event) -> None:
+        self.activate(self.get_document(event.widget))
+        self.pan_from = (event.x, event.y)
+
+    def event_pan(self, event: tk.Event) -> None:
+        x, y = self.pan_from
+        self.pan_from = (event.x, event.y)
+
+        self.get_controller().pan(event.x - x, event.y - y)
+
+    def event_zoom(self, event: tk.Event) -> None:
+        factor = 1.25 if event.num == 4 or event.delta > 0 else 0.8
+
+        self.activate(self.get_document(event.widget))
+        self.zoom_var.set("")
+        self.get_controller().zoom(factor)
+
+    def event_change_render_mode(self) -> None:
+        for controller in self.get_controllers():
+            controller.set_render_mode(self.render_mode_var.get())
+
+    def event_change_lazy(self) -> None:
+        for controller in self.get_controllers():
+            controller.set_lazy(self.lazy_var.get())
+
+    def event_change_disk_cache(self) -> None:
+        for controller in self.get_controllers():
+            controller.set_disk_cache(self.disk_cache_var.get())
+
+    def event_change_dedup(self) -> None:
+        for controller in self.get_controllers():
+            controller.set_dedup(self.dedup_var.get())
+
+    def event_change_merge(self) -> None:
+        for controller in self.get_controllers():
+            controller.set_merge_duplicates(self.merge_var.get())
+
+    def event_change_parallel_save(self) -> None:
+        for controller in self.get_controllers():
+            controller.set_parallel_save(self.parallel_save_var.get())
+
+    def event_clear_disk_cache(self) -> None:
+        self.get_controller().clear_disk_cache()
+
+    def event_change_memory_budget(self) -> None:
+        self.get_controller().set_memory_budget()
+        self.show_memory()
+
+    def event_change_history_limit(self) -> None:
+        self.get_controller().set_history_limit()
+
     def event_destroy(self) -> None:
         print("destroy")
+
+        for document in self.documents:
+            if document.controller is not None:
+                document.controller.close()
+
+        if hasattr(self, "workspace"):
+            self.workspace.shutdown()
         self.root.quit()
 
 if __name__ == "__main__":
+    profile = StartupProfile("--profile-startup" in sys.argv)
+    profile.mark("imports")
+
     root = tk.Tk()
-    View(root)
+    profile.mark("tk")
+
+    View(root, profile)
     root.mainloop()
\ No newline at end of file
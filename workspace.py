@@ -0,0 +1,82 @@
+from tkinter import Misc
+from typing import TYPE_CHECKING
+
+from scheduler import PlaybackClock
+from readahead import DecodePool
+from jobs import JobRunner
+
+if TYPE_CHECKING:
+    from model import Model
+
+
+class Workspace():
+
+    clock: PlaybackClock
+    decode_pool: DecodePool
+    jobs: JobRunner
+    models: list["Model"]
+    memory_budget: int | None
+
+    def __init__(self, widget: Misc, n_decoders: int = 2, memory_budget: int | None = 1024 ** 3) -> None:
+        self.clock = PlaybackClock(widget)
+        self.decode_pool = DecodePool(n_decoders)
+        self.jobs = JobRunner(widget)
+        self.models = []
+        self.memory_budget = memory_budget
+
+    def add(self, model: "Model") -> None:
+        self.models.append(model)
+
+        self.rebalance()
+
+    def remove(self, model: "Model") -> None:
+        if model in self.models:
+            self.models.remove(model)
+
+        self.rebalance()
+
+    def set_visible(self, model: "Model", visible: bool) -> None:
+        if model.visible != visible:
+            model.set_visible(visible)
+
+            self.rebalance()
+
+    def set_memory_budget(self, budget: int | None) -> None:
+        self.memory_budget = budget
+
+        self.rebalance()
+
+    def get_budgets(self) -> list[int | None]:
+        if self.memory_budget is None:
+            return [None] * len(self.models)
+
+        total = sum(model.frame_bytes for model in self.models)
+
+        # frames that do not fit are spilled in proportion to how much each document holds
+        if total >= self.memory_budget:
+            return [model.frame_bytes * self.memory_budget // total for model in self.models]
+
+        # what the frames leave over is cache room, and only documents on screen get a share of it
+        n_visible = sum(model.visible for model in self.models)
+        share = (self.memory_budget - total) // max(n_visible, 1)
+
+        return [model.frame_bytes + (share if model.visible else 0) for model in self.models]
+
+    def rebalance(self) -> None:
+        for model, budget in zip(self.models, self.get_budgets()):
+            model.memory_budget = budget
+            model.fit_budget()
+
+    def get_memory_usage(self) -> dict[str, int | None]:
+        usage: dict[str, int | None] = dict.fromkeys(("photos", "scaled", "frames", "spilled", "evicted", "spilled_frames", "shared", "shared_frames"), 0)
+
+        for model in self.models:
+            for key, value in model.get_memory_usage().items():
+                if key in usage:
+                    usage[key] += value
+
+        return usage | {"budget": self.memory_budget}
+
+    def shutdown(self) -> None:
+        self.jobs.shutdown()
+        self.decode_pool.close()
\ No newline at end of file